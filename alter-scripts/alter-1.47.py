@@ -0,0 +1,35 @@
+import os
+import sys
+
+import django
+
+from connection import execute
+
+os.chdir('..')
+sys.path.append(os.getcwd())
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mulearnbackend.settings')
+django.setup()
+
+
+def create_mail_outbox():
+    execute("""
+        CREATE TABLE IF NOT EXISTS mail_outbox (
+            id              VARCHAR(36)  NOT NULL PRIMARY KEY,
+            subject         VARCHAR(255) NOT NULL,
+            body            LONGTEXT     NOT NULL,
+            from_email      VARCHAR(255) NOT NULL,
+            recipients      TEXT         NOT NULL,
+            status          VARCHAR(10)  NOT NULL DEFAULT 'pending',
+            attempts        INT          NOT NULL DEFAULT 0,
+            last_error      TEXT         NULL,
+            next_attempt_at DATETIME     NOT NULL,
+            sent_at         DATETIME     NULL,
+            created_at      DATETIME     NOT NULL,
+            INDEX mail_outbox_status_next_attempt (status, next_attempt_at)
+        );
+    """)
+
+
+if __name__ == '__main__':
+    create_mail_outbox()
+    execute("UPDATE system_setting SET value = '1.47', updated_at = now() WHERE `key` = 'db.version';")
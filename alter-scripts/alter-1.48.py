@@ -0,0 +1,45 @@
+import os
+import sys
+from os.path import splitext
+
+import django
+
+from connection import execute
+
+os.chdir('..')
+sys.path.append(os.getcwd())
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mulearnbackend.settings')
+django.setup()
+
+from django.core.files.storage import FileSystemStorage
+
+from db.user import User
+from utils.profile_pic import PROFILE_PIC_DIR, save_profile_pic
+
+
+def add_profile_pic_hash():
+    execute("ALTER TABLE user ADD COLUMN profile_pic_hash CHAR(64) NULL;")
+
+
+def hash_profile_pics():
+    """generates the resized variants of the pictures saved as user/profile/{user_id}.png"""
+    fs = FileSystemStorage()
+    if not fs.exists(PROFILE_PIC_DIR):
+        return
+
+    _, files = fs.listdir(PROFILE_PIC_DIR)
+    for name in files:
+        user_id = splitext(name)[0]
+        try:
+            with fs.open(f"{PROFILE_PIC_DIR}/{name}") as pic:
+                content_hash = save_profile_pic(pic)
+        except ValueError as e:
+            print(name, e)
+            continue
+        User.every.filter(id=user_id).update(profile_pic_hash=content_hash)
+
+
+if __name__ == '__main__':
+    add_profile_pic_hash()
+    hash_profile_pics()
+    execute("UPDATE system_setting SET value = '1.48', updated_at = now() WHERE `key` = 'db.version';")
@@ -0,0 +1,25 @@
+import os
+import sys
+
+import django
+
+from connection import execute
+
+os.chdir('..')
+sys.path.append(os.getcwd())
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mulearnbackend.settings')
+django.setup()
+
+
+def add_karma_activity_log_approver_indexes():
+    # lets the moderator leaderboard count approvals per approver and day from the index
+    execute("""
+        ALTER TABLE karma_activity_log
+            ADD INDEX karma_activity_log_peer_approved_by_created_at (peer_approved_by, created_at),
+            ADD INDEX karma_activity_log_appraiser_approved_by_created_at (appraiser_approved_by, created_at);
+    """)
+
+
+if __name__ == '__main__':
+    add_karma_activity_log_approver_indexes()
+    execute("UPDATE system_setting SET value = '1.49', updated_at = now() WHERE `key` = 'db.version';")
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        # Register signal receivers that keep cached views in sync
+        from utils import karma_rank  # noqa: F401
+        from .dashboard.lc import dash_lc_helper  # noqa: F401
+        from .dashboard.profile import profile_helper  # noqa: F401
+        from .top100_coders import top100_helper  # noqa: F401
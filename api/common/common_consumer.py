@@ -1,5 +1,12 @@
+import atexit
 import json
+import threading
+import time
+from collections import Counter
 
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.db.models import Count, Sum
@@ -10,15 +17,51 @@ from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 
 from db.learning_circle import LearningCircle
-from db.learning_circle import UserCircleLink
 from db.organization import Organization
 from db.task import InterestGroup, KarmaActivityLog
-from db.user import User, UserRoleLink
+from db.user import Role, User, UserRoleLink
+
+from utils.karma_award import karma_awarded
+from utils.types import OrganizationType, RoleType
+
+LANDING_ORG_TYPES = [
+    OrganizationType.COLLEGE.value,
+    OrganizationType.COMPANY.value,
+    OrganizationType.COMMUNITY.value,
+]
+LANDING_ROLES = [RoleType.MENTOR.value, RoleType.ENABLER.value]
 
-from utils.types import IntegrationType, OrganizationType
 
 class LandingStats:
-    data = {}
+    """
+    Landing page counters kept in the shared cache.
+
+    Signals apply +1/-1 deltas to the counters instead of re-running the aggregate
+    queries, and a full reconciliation against the database corrects any drift
+    (suspensions, queryset updates, missed signals) at most once per
+    LANDING_STATS_RECONCILE_INTERVAL.
+    """
+
+    KEY_PREFIX = "landing_stats"
+    RECONCILED_AT_KEY = f"{KEY_PREFIX}:reconciled_at"
+
+    _role_titles = None
+
+    @classmethod
+    def key(cls, *parts) -> str:
+        return ":".join((cls.KEY_PREFIX, *map(str, parts)))
+
+    @classmethod
+    def counter_keys(cls) -> list[str]:
+        return [
+            cls.key("members"),
+            cls.key("ig_count"),
+            cls.key("learning_circle_count"),
+            cls.key("karma_count"),
+            cls.key("pow_count"),
+            *(cls.key("org", org_type) for org_type in LANDING_ORG_TYPES),
+            *(cls.key("role", role) for role in LANDING_ROLES),
+        ]
 
     def members_count(self):
         members_count = User.objects.all().count()
@@ -26,8 +69,7 @@ class LandingStats:
 
     def org_type_counts(self):
         org_type_counts = Organization.objects.filter(
-                org_type__in=[OrganizationType.COLLEGE.value, OrganizationType.COMPANY.value,
-                                OrganizationType.COMMUNITY.value]
+                org_type__in=LANDING_ORG_TYPES
             ).values('org_type').annotate(org_count=Coalesce(Count('org_type'), 0))
         org_type_counts = list(org_type_counts)
 
@@ -35,7 +77,7 @@ class LandingStats:
 
     def enablers_mentors_count(self):
         enablers_mentors_count = UserRoleLink.objects.filter(
-            role__title__in=["Mentor", "Enabler"]).values(
+            role__title__in=LANDING_ROLES).values(
             'role__title').annotate(role_count=Coalesce(Count('role__title'), 0))
         enablers_mentors_count = list(enablers_mentors_count)
 
@@ -48,78 +90,241 @@ class LandingStats:
     def learning_circles_count(self):
         learning_circles_count = LearningCircle.objects.all().count()
         return learning_circles_count
-    
+
     def karma_pow_count(self):
         karma_pow_count = KarmaActivityLog.objects.aggregate(karma_count=Coalesce(Sum('karma'), 0), pow_count=Count('id'))
         return karma_pow_count
 
-    def get_data(self, sender):
-        if sender == None:
-            self.data = {
-                'members': self.members_count(),
-                'org_type_counts': self.org_type_counts(),
-                'enablers_mentors_count': self.enablers_mentors_count(),
-                'ig_count': self.interest_groups_count(),
-                'learning_circle_count': self.learning_circles_count(),
-                'karma_pow_count': self.karma_pow_count()
-            }
-        elif sender == User:
-            self.data['members'] = self.members_count()
+    def reconcile(self):
+        """
+        Recomputes every counter from the database and overwrites the cached values.
+        """
+        org_counts = {row['org_type']: row['org_count'] for row in self.org_type_counts()}
+        role_counts = {row['role__title']: row['role_count'] for row in self.enablers_mentors_count()}
+        karma_pow_count = self.karma_pow_count()
+
+        counters = {
+            self.key("members"): self.members_count(),
+            self.key("ig_count"): self.interest_groups_count(),
+            self.key("learning_circle_count"): self.learning_circles_count(),
+            self.key("karma_count"): karma_pow_count['karma_count'],
+            self.key("pow_count"): karma_pow_count['pow_count'],
+        }
+        counters |= {self.key("org", org_type): org_counts.get(org_type, 0) for org_type in LANDING_ORG_TYPES}
+        counters |= {self.key("role", role): role_counts.get(role, 0) for role in LANDING_ROLES}
+
+        cache.set_many(counters, None)
+        cache.set(self.RECONCILED_AT_KEY, time.time(), None)
 
-        elif sender == Organization:
-            self.data['org_type_counts'] = self.org_type_counts()
+    def needs_reconcile(self) -> bool:
+        reconciled_at = cache.get(self.RECONCILED_AT_KEY)
+        return reconciled_at is None or (
+            time.time() - reconciled_at > settings.LANDING_STATS_RECONCILE_INTERVAL
+        )
+
+    def apply_delta(self, key: str, delta: int):
+        """
+        Adds delta to a counter. Missing counters are left for the next
+        reconciliation to fill in.
+        """
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            cache.delete(self.RECONCILED_AT_KEY)
 
-        elif sender == UserRoleLink:
-            self.data['enablers_mentors_count'] = self.enablers_mentors_count()
+    def count_role_links(self, role_ids) -> None:
+        """
+        Counts role links created in bulk, with one delta per landing role
+        instead of one per link. Call it once the links are committed.
+        """
+        deltas = Counter(filter(None, map(self.get_role_title, role_ids)))
+        for title, count in deltas.items():
+            self.apply_delta(self.key("role", title), count)
+        if deltas:
+            LandingStatsBroadcaster.schedule()
 
-        elif sender == InterestGroup:
-            self.data['ig_count'] = self.interest_groups_count()
+    def get_role_title(self, role_id) -> str | None:
+        if LandingStats._role_titles is None:
+            LandingStats._role_titles = dict(
+                Role.objects.filter(title__in=LANDING_ROLES).values_list('id', 'title')
+            )
+        return LandingStats._role_titles.get(role_id)
 
-        elif sender == LearningCircle:
-            self.data['learning_circle_count'] = self.learning_circles_count()
+    def get_data(self) -> dict:
+        """
+        Returns the cached snapshot in the shape the landing page expects.
+        """
+        keys = self.counter_keys()
+        counters = cache.get_many(keys)
+        if len(counters) != len(keys):
+            self.reconcile()
+            counters = cache.get_many(keys)
+
+        return {
+            'members': counters.get(self.key("members"), 0),
+            'org_type_counts': [
+                {'org_type': org_type, 'org_count': count}
+                for org_type in LANDING_ORG_TYPES
+                if (count := counters.get(self.key("org", org_type), 0)) > 0
+            ],
+            'enablers_mentors_count': [
+                {'role__title': role, 'role_count': count}
+                for role in LANDING_ROLES
+                if (count := counters.get(self.key("role", role), 0)) > 0
+            ],
+            'ig_count': counters.get(self.key("ig_count"), 0),
+            'learning_circle_count': counters.get(self.key("learning_circle_count"), 0),
+            'karma_pow_count': {
+                'karma_count': counters.get(self.key("karma_count"), 0),
+                'pow_count': counters.get(self.key("pow_count"), 0),
+            },
+        }
 
 
 landing_stats = LandingStats()
 
+
+class LandingStatsBroadcaster:
+    """
+    Coalesces counter changes into at most one group broadcast per
+    LANDING_STATS_BROADCAST_INTERVAL across all workers. The broadcast runs on a
+    timer thread, so the request that saved the row never waits on the channel layer.
+
+    A broadcast still waiting on its timer when the process exits is sent by the
+    exit handler instead of being dropped.
+    """
+
+    LOCK_KEY = LandingStats.key("broadcast_pending")
+
+    _timer = None
+    _timer_lock = threading.Lock()
+
+    @classmethod
+    def schedule(cls):
+        interval = settings.LANDING_STATS_BROADCAST_INTERVAL
+        if not cache.add(cls.LOCK_KEY, 1, interval):
+            return
+
+        timer = threading.Timer(interval, cls.run)
+        timer.daemon = True
+        with cls._timer_lock:
+            cls._timer = timer
+        timer.start()
+
+    @classmethod
+    def run(cls):
+        with cls._timer_lock:
+            cls._timer = None
+        try:
+            cls.broadcast()
+        finally:
+            # the timer thread has its own database connection, nothing else closes it
+            connections.close_all()
+
+    @classmethod
+    def flush(cls):
+        with cls._timer_lock:
+            timer, cls._timer = cls._timer, None
+        if timer is None:
+            return
+
+        timer.cancel()
+        cache.delete(cls.LOCK_KEY)
+        cls.run()
+
+    @classmethod
+    def broadcast(cls):
+        if landing_stats.needs_reconcile():
+            landing_stats.reconcile()
+
+        async_to_sync(channel_layer.group_send)(
+            GlobalCount.group_name,
+            {"type": "send_data", "data": landing_stats.get_data()}
+        )
+
+
+atexit.register(LandingStatsBroadcaster.flush)
+
+
 class GlobalCount(WebsocketConsumer):
-    data = {}
     group_name = "landing_stats"
 
     def connect(self):
         async_to_sync(self.channel_layer.group_add)(
-                self.group_name, 
+                self.group_name,
                 self.channel_name
             )
         self.accept()
 
-        landing_stats.get_data(None)
-        self.data = landing_stats.data
+        self.send(text_data=json.dumps(landing_stats.get_data()))
+
+        if landing_stats.needs_reconcile():
+            LandingStatsBroadcaster.schedule()
 
-        self.send(text_data=json.dumps(self.data))
-    
     def disconnect(self, code):
-        self.channel_layer.group_discard(self.group_name, self.channel_name)
-    
+        async_to_sync(self.channel_layer.group_discard)(self.group_name, self.channel_name)
+
     def send_data(self, event):
         self.send(text_data=json.dumps(event['data']))
 
 channel_layer = get_channel_layer()
-    
+
+
+def get_landing_deltas(sender, instance, delta):
+    if sender == User:
+        return [(LandingStats.key("members"), delta)]
+
+    if sender == InterestGroup:
+        return [(LandingStats.key("ig_count"), delta)]
+
+    if sender == LearningCircle:
+        return [(LandingStats.key("learning_circle_count"), delta)]
+
+    if sender == Organization and instance.org_type in LANDING_ORG_TYPES:
+        return [(LandingStats.key("org", instance.org_type), delta)]
+
+    if sender == UserRoleLink and (title := landing_stats.get_role_title(instance.role_id)):
+        return [(LandingStats.key("role", title), delta)]
+
+    if sender == KarmaActivityLog:
+        return [
+            (LandingStats.key("karma_count"), delta * (instance.karma or 0)),
+            (LandingStats.key("pow_count"), delta),
+        ]
+
+    return []
+
+
 @receiver(post_save, sender=User)
 @receiver(post_save, sender=LearningCircle)
 @receiver(post_save, sender=InterestGroup)
 @receiver(post_save, sender=UserRoleLink)
 @receiver(post_save, sender=Organization)
+@receiver(post_save, sender=KarmaActivityLog)
 @receiver(post_delete, sender=User)
 @receiver(post_delete, sender=LearningCircle)
 @receiver(post_delete, sender=InterestGroup)
 @receiver(post_delete, sender=UserRoleLink)
 @receiver(post_delete, sender=Organization)
+@receiver(post_delete, sender=KarmaActivityLog)
 def db_signals(sender, instance, created=None, *args, **kwargs):
-    if created or created == None:
-        landing_stats.get_data(sender)
-        data = landing_stats.data
-        async_to_sync(channel_layer.group_send)(
-            "landing_stats",
-            {"type": "send_data", "data": data}
-        )
+    if created is False:
+        return
+
+    deltas = get_landing_deltas(sender, instance, 1 if created else -1)
+    if not deltas:
+        return
+
+    def apply():
+        for key, delta in deltas:
+            landing_stats.apply_delta(key, delta)
+        LandingStatsBroadcaster.schedule()
+
+    transaction.on_commit(apply)
+
+
+@receiver(karma_awarded)
+def landing_stats_for_award(sender, logs, karma, **kwargs):
+    landing_stats.apply_delta(LandingStats.key("karma_count"), karma * len(logs))
+    landing_stats.apply_delta(LandingStats.key("pow_count"), len(logs))
+    LandingStatsBroadcaster.schedule()
@@ -14,6 +14,8 @@ from db.task import InterestGroup, KarmaActivityLog, UserIgLink
 from db.user import User, UserRoleLink
 from utils.response import CustomResponse
 from utils.types import IntegrationType, OrganizationType, RoleType
+from utils.export import StreamingExport
+from utils.profile_pic import PROFILE_PIC_SIZES, get_profile_pic_url
 from utils.utils import CommonUtils
 from .serializer import StudentInfoSerializer, CollegeInfoSerializer, LearningCircleEnrollmentSerializer, \
     UserLeaderboardSerializer,OrgSerializer,DistrictSerializer,StateSerializer,CountrySerializer, LcDetailsSerializer, \
@@ -314,9 +316,11 @@ class LcReportDownloadAPI(APIView):
             )
         )
 
-        student_info_data = StudentInfoSerializer(student_info, many=True).data
-
-        return CommonUtils.generate_csv(student_info_data, "Learning Circle Report")
+        return StreamingExport.from_queryset(
+            student_info,
+            "Learning Circle Report",
+            serializer_class=StudentInfoSerializer,
+        ).get_response(request)
 
 
 class CollegeWiseLcReport(APIView):
@@ -399,9 +403,11 @@ class CollegeWiseLcReportCSV(APIView):
             is_pagination=False
         )
 
-        lc_report = CollegeInfoSerializer(paginated_queryset, many=True).data
-
-        return CommonUtils.generate_csv(lc_report, "Learning Circle Report")
+        return StreamingExport.from_queryset(
+            paginated_queryset,
+            "Learning Circle Report",
+            serializer_class=CollegeInfoSerializer,
+        ).get_response(request)
 
 
 class LearningCircleEnrollment(APIView):
@@ -494,9 +500,11 @@ class LearningCircleEnrollmentCSV(APIView):
                          "organisation": "organisation", "dwms_id": "dwms_id", "karma_earned": "karma_earned"},
             is_pagination=False)
 
-        lc_enrollment = LearningCircleEnrollmentSerializer(paginated_queryset, many=True).data
-
-        return CommonUtils.generate_csv(lc_enrollment, "Learning Enrollment Report")
+        return StreamingExport.from_queryset(
+            paginated_queryset,
+            "Learning Enrollment Report",
+            serializer_class=LearningCircleEnrollmentSerializer,
+        ).get_response(request)
 
 
 class GlobalCountAPI(APIView):
@@ -567,7 +575,14 @@ class GTASANDSHOREAPI(APIView):
 
 class UserProfilePicAPI(APIView):
     def get(self, request, muid):
-        user = User.objects.filter(muid=muid).annotate(image=F("profile_pic")).values("image")
+        size = request.query_params.get("size")
+        if size not in PROFILE_PIC_SIZES:
+            size = "large"
+
+        user = [
+            {"image": get_profile_pic_url(content_hash, size)}
+            for content_hash in User.objects.filter(muid=muid).values_list("profile_pic_hash", flat=True)
+        ]
         return CustomResponse(response=user).get_success_response()
 
 
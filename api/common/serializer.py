@@ -131,7 +131,7 @@ class LcDetailsSerializer(serializers.ModelSerializer):
             member_info.append({
                 'id': member.user.id,
                 'username': f'{member.user.full_name}',
-                'profile_pic': f'{member.user.profile_pic}' or None,
+                'profile_pic': member.user.profile_pic_small,
                 'karma': total_ig_karma,
                 'is_lead': member.lead,
                 'level': member.user.user_lvl_link_user.level.level_order
@@ -5,8 +5,9 @@ from django.db.models import Sum
 from rest_framework import serializers
 
 from db.organization import UserOrganizationLink, College
-from db.task import KarmaActivityLog
 from db.user import User, UserRoleLink
+from utils.karma_rank import OrgRanking
+from utils.karma_series import KarmaSeries
 from utils.types import OrganizationType
 from utils.types import RoleType
 from utils.utils import DateTimeUtils
@@ -88,26 +89,7 @@ class CampusDetailsSerializer(serializers.ModelSerializer):
         )
 
     def get_rank(self, obj):
-        org_karma_dict = (
-            UserOrganizationLink.objects.filter(
-                org__org_type=OrganizationType.COLLEGE.value)
-            .values("org")
-            .annotate(total_karma=Sum("user__wallet_user__karma"))
-        ).order_by("-total_karma", "org__created_at")
-
-        rank_dict = {
-            data["org"]: data["total_karma"] if data["total_karma"] is not None else 0
-            for data in org_karma_dict
-        }
-
-        sorted_rank_dict = dict(
-            sorted(rank_dict.items(), key=lambda x: x[1], reverse=True)
-        )
-
-        if obj.org.id in sorted_rank_dict:
-            keys_list = list(sorted_rank_dict.keys())
-            position = keys_list.index(obj.org.id)
-            return position + 1
+        return OrgRanking(OrgRanking.ORG).get_rank(obj.org.id)
 
 
 class CampusStudentDetailsSerializer(serializers.Serializer):
@@ -148,19 +130,8 @@ class WeeklyKarmaSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         response = super().to_representation(instance)
 
-        today = DateTimeUtils.get_current_utc_time().date()
-        date_range = [today - timedelta(days=i) for i in range(7)]
-
-        for date in date_range:
-            karma_logs = (
-                KarmaActivityLog.objects.filter(
-                    user__user_organization_link_user__org=instance.org,
-                    created_at__date=date,
-                ).aggregate(
-                    karma=Sum("karma"),
-                )
-            )
-            response[str(date)] = karma_logs.get("karma", 0)
+        for date, karma in KarmaSeries(org=instance.org).get(KarmaSeries.DAY, 7).items():
+            response[str(date)] = karma
 
         return response
 
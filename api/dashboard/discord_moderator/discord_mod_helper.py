@@ -0,0 +1,81 @@
+import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Q, QuerySet
+
+from db.task import KarmaActivityLog
+from db.user import User
+
+
+class ModeratorStats:
+    """
+    Moderator analytics over the karma log, computed by the database: approvals
+    are counted with one GROUP BY on the approver column and the pending queue
+    with one conditional aggregate, optionally restricted to a created_at window.
+
+    The pending summary is cached for MODERATOR_PENDING_CACHE_TIMEOUT seconds.
+    """
+
+    APPROVAL_FIELDS = {
+        "peer": "peer_approved_by",
+        "appraiser": "appraiser_approved_by",
+    }
+
+    def __init__(self, start: datetime.date = None, end: datetime.date = None) -> None:
+        """start and end are inclusive days"""
+        self.start = start
+        self.end = end
+
+    def get_logs(self) -> QuerySet:
+        logs = KarmaActivityLog.objects.all()
+        # ranges on created_at itself, so an index on it can be used
+        if self.start:
+            logs = logs.filter(created_at__gte=self.start)
+        if self.end:
+            logs = logs.filter(created_at__lt=self.end + datetime.timedelta(days=1))
+        return logs
+
+    def get_approver_counts(self, option: str) -> QuerySet:
+        """
+        Rows of {"approver": user_id, "count": approvals}, most approvals first.
+        """
+        if not (field := self.APPROVAL_FIELDS.get(option)):
+            raise ValueError(f"Unknown approval option '{option}'")
+
+        return (
+            self.get_logs()
+            .filter(**{f"{field}__isnull": False})
+            .values(approver=F(f"{field}_id"))
+            .annotate(count=Count("id"))
+            .order_by("-count", "approver")
+        )
+
+    @staticmethod
+    def with_approvers(rows) -> list[dict]:
+        """
+        Adds the name and muid of the approvers on a page of approver counts.
+        """
+        rows = list(rows)
+        approvers = User.objects.in_bulk([row["approver"] for row in rows])
+        return [
+            {
+                "name": approver.full_name,
+                "count": row["count"],
+                "muid": approver.muid,
+            }
+            for row in rows
+            if (approver := approvers.get(row["approver"]))
+        ]
+
+    def key(self) -> str:
+        return f"moderator_pending:{self.start}:{self.end}"
+
+    def get_pending_summary(self) -> dict:
+        if (summary := cache.get(self.key())) is None:
+            summary = self.get_logs().aggregate(
+                peer_pending=Count("id", filter=Q(peer_approved=False)),
+                appraise_pending=Count("id", filter=Q(appraiser_approved=False)),
+            )
+            cache.set(self.key(), summary, settings.MODERATOR_PENDING_CACHE_TIMEOUT)
+        return summary
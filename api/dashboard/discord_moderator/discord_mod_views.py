@@ -1,12 +1,12 @@
-from collections import defaultdict
+import datetime
 
-from django.db.models import Q
 from rest_framework.views import APIView
 
 from db.task import KarmaActivityLog
 from utils.utils import CommonUtils
 from utils.permission import CustomizePermission
 from utils.response import CustomResponse
+from .discord_mod_helper import ModeratorStats
 from .serializer import KarmaActivityLogSerializer,LeaderboardSerializer
 
 
@@ -37,21 +37,13 @@ class PendingTasks(APIView):
     authentication_classes = [CustomizePermission]
 
     def get(self, request):
-        date = request.query_params.get("date")
-        if date:
-            tasks = KarmaActivityLog.objects.filter(created_at=date)
-            peerpending = tasks.filter(peer_approved=False).count()
-            appraiserpending = tasks.filter(appraiser_approved=False).count()
-            data = {'peer_pending': peerpending,
-                    'appraise_pending': appraiserpending}
-            return CustomResponse(response=data).get_success_response()
+        try:
+            date = request.query_params.get("date")
+            date = datetime.date.fromisoformat(date) if date else None
+        except ValueError:
+            return CustomResponse(general_message="Invalid date").get_failure_response()
 
-        peerpending = KarmaActivityLog.objects.filter(
-            peer_approved=False).count()
-        appraiserpending = KarmaActivityLog.objects.filter(
-            appraiser_approved=False).count()
-        data = {'peer_pending': peerpending,
-                'appraise_pending': appraiserpending}
+        data = ModeratorStats(start=date, end=date).get_pending_summary()
         return CustomResponse(response=data).get_success_response()
 
 
@@ -61,32 +53,26 @@ class LeaderBoard(APIView):
     def get(self, request):
         choice = request.query_params.get("option", "peer")
 
-        approval_field = f"{choice}_approved_by"
-        logs_with_approval = KarmaActivityLog.objects.filter(
-            Q(**{f"{approval_field}__isnull": False}
-              ) & ~Q(**{approval_field: ''})
-        )
-
-        data = defaultdict(lambda: {"count": 0, "muid": None})
-
-        for obj in logs_with_approval:
-            approver_name = getattr(obj, approval_field).full_name
-            if data[approver_name]["muid"] is None:
-                data[approver_name]["muid"] = getattr(obj, approval_field).muid
-            data[approver_name]["count"] += 1
-
-        response_data = [
-            {"name": name, "count": info["count"], "muid": info["muid"]}
-            for name, info in data.items()
-        ]
+        try:
+            start_date, end_date = (
+                datetime.date.fromisoformat(date) if date else None
+                for date in (
+                    request.query_params.get("startDate"),
+                    request.query_params.get("endDate"),
+                )
+            )
+            approver_counts = ModeratorStats(start_date, end_date).get_approver_counts(choice)
+        except ValueError as e:
+            return CustomResponse(general_message=str(e)).get_failure_response()
 
         paginated_queryset = CommonUtils.get_paginated_queryset(
-            response_data,
+            approver_counts,
             request,
-            []
+            [],
+            {"count": "count"},
         )
         serializer = LeaderboardSerializer(
-            paginated_queryset.get("queryset"),
+            ModeratorStats.with_approvers(paginated_queryset.get("queryset")),
             many=True
         )
         return CustomResponse().paginated_response(
@@ -95,4 +81,3 @@ class LeaderBoard(APIView):
                 "pagination"
             )
         )
-
@@ -6,6 +6,7 @@ from rest_framework import serializers
 from db.organization import UserOrganizationLink, Organization
 from db.task import KarmaActivityLog, Level
 from db.user import User
+from utils.karma_rank import OrgRanking
 from utils.types import OrganizationType, RoleType
 from utils.utils import DateTimeUtils
 
@@ -32,28 +33,7 @@ class DistrictDetailsSerializer(serializers.ModelSerializer):
         )
 
     def get_rank(self, obj):
-        org_karma_dict = (
-            UserOrganizationLink.objects.filter(
-                org__org_type=OrganizationType.COLLEGE.value)
-            .values("org__district")
-            .annotate(total_karma=Sum("user__wallet_user__karma"))
-        ).order_by("-total_karma", "org__created_at")
-
-        rank_dict = {
-            data["org__district"]: data["total_karma"]
-            if data["total_karma"] is not None
-            else 0
-            for data in org_karma_dict
-        }
-
-        sorted_rank_dict = dict(
-            sorted(rank_dict.items(), key=lambda x: x[1], reverse=True)
-        )
-
-        if obj.org.district.id in sorted_rank_dict:
-            keys_list = list(sorted_rank_dict.keys())
-            position = keys_list.index(obj.org.district.id)
-            return position + 1
+        return OrgRanking(OrgRanking.DISTRICT).get_rank(obj.org.district.id)
 
     def get_district_lead(self, obj):
         user_org_link = UserOrganizationLink.objects.filter(
@@ -99,12 +79,10 @@ class DistrictTopThreeCampusSerializer(serializers.ModelSerializer):
         fields = ["rank", "campus_code", "karma"]
 
     def get_rank(self, obj):
-        keys_list = list(self.context.get("ranks").keys())
-        position = keys_list.index(obj.id)
-        return position + 1
+        return self.context.get("ranking").get_rank(obj.id)
 
     def get_karma(self, obj):
-        return self.context.get("ranks")[obj.id]
+        return self.context.get("ranking").get_karma(obj.id)
 
 
 class DistrictStudentLevelStatusSerializer(serializers.ModelSerializer):
@@ -1,11 +1,10 @@
-from itertools import islice
-
-from django.db.models import Sum, F, Case, CharField, When
+from django.db.models import F, Case, CharField, When
 from rest_framework.views import APIView
 
-from db.organization import UserOrganizationLink, Organization
-from db.task import Level, Wallet
+from db.organization import Organization
+from db.task import Level
 from db.user import User
+from utils.karma_rank import KarmaRankEngine, OrgRanking
 from utils.permission import CustomizePermission, JWTUtils, role_required
 from utils.response import CustomResponse
 from utils.types import RoleType, OrganizationType
@@ -39,31 +38,16 @@ class DistrictTopThreeCampusAPI(APIView):
 
         user_org_link = get_user_college_link(user_id)
 
-        org_karma_dict = (
-            UserOrganizationLink.objects.filter(
-                org__org_type=OrganizationType.COLLEGE.value,
-                org__district=user_org_link.org.district,
-                verified=True,
-            )
-            .values("org")
-            .annotate(total_karma=Sum("user__wallet_user__karma")).order_by('-total_karma', 'org__created_at')
-        )
-
-        org_ranks = {
-            data["org"]: data["total_karma"] if data["total_karma"] is not None else 0
-            for data in org_karma_dict
-        }
+        ranking = OrgRanking(OrgRanking.ORG, district=user_org_link.org.district)
+        top_three_orgs = [org_id for org_id, _ in ranking.get_top(3)]
 
-        sorted_org_ranks = dict(
-            sorted(org_ranks.items(), key=lambda x: x[1], reverse=True)
+        user_org = sorted(
+            Organization.objects.filter(id__in=top_three_orgs),
+            key=lambda org: ranking.get_rank(org.id),
         )
 
-        top_three_orgs = dict(islice(sorted_org_ranks.items(), 3))
-
-        user_org = Organization.objects.filter(id__in=top_three_orgs).distinct()
-
         serializer = dash_district_serializer.DistrictTopThreeCampusSerializer(
-            user_org, many=True, context={"ranks": org_ranks}
+            user_org, many=True, context={"ranking": ranking}
         )
 
         return CustomResponse(response=serializer.data).get_success_response()
@@ -97,20 +81,7 @@ class DistrictStudentDetailsAPI(APIView):
 
         user_org_link = get_user_college_link(user_id)
 
-        rank = (
-            Wallet.objects.filter(
-                user__user_organization_link_user__org__district=user_org_link.org.district,
-                user__user_organization_link_user__org__org_type=OrganizationType.COLLEGE.value,
-            )
-            .distinct()
-            .order_by("-karma", '-update_at', "created_at")
-            .values(
-                "user_id",
-                "karma",
-            )
-        )
-
-        ranks = {user["user_id"]: i + 1 for i, user in enumerate(rank)}
+        rank_engine = KarmaRankEngine(district=user_org_link.org.district)
 
         user_org_links = (
             User.objects.filter(
@@ -138,7 +109,9 @@ class DistrictStudentDetailsAPI(APIView):
         )
 
         serializer = dash_district_serializer.DistrictStudentDetailsSerializer(
-            paginated_queryset.get("queryset"), many=True, context={"ranks": ranks}
+            paginated_queryset.get("queryset"),
+            many=True,
+            context={"ranks": rank_engine.get_page_ranks(paginated_queryset.get("queryset"))},
         )
 
         return CustomResponse(
@@ -158,20 +131,7 @@ class DistrictStudentDetailsCSVAPI(APIView):
 
         user_org_link = get_user_college_link(user_id)
 
-        rank = (
-            Wallet.objects.filter(
-                user__user_organization_link_user__org__district=user_org_link.org.district,
-                user__user_organization_link_user__org__org_type=OrganizationType.COLLEGE.value,
-            )
-            .distinct()
-            .order_by("-karma", '-updated_at', "created_at")
-            .values(
-                "user_id",
-                "karma",
-            )
-        )
-
-        ranks = {user["user_id"]: i + 1 for i, user in enumerate(rank)}
+        rank_engine = KarmaRankEngine(district=user_org_link.org.district)
 
         user_org_links = (
             User.objects.filter(
@@ -187,7 +147,7 @@ class DistrictStudentDetailsCSVAPI(APIView):
         )
 
         serializer = dash_district_serializer.DistrictStudentDetailsSerializer(
-            user_org_links, many=True, context={"ranks": ranks}
+            user_org_links, many=True, context={"ranks": rank_engine.get_ranks()}
         )
         return CommonUtils.generate_csv(serializer.data, "District Student Details")
 
@@ -9,7 +9,7 @@ from utils.permission import CustomizePermission, role_required
 from utils.response import CustomResponse
 from utils.types import RoleType
 
-from .log_helper import ManageURLPatterns, logHandler
+from .log_helper import ErrorLogIndex, ManageURLPatterns, logHandler
 
 
 class DownloadErrorLogAPI(APIView):
@@ -122,12 +122,11 @@ class LoggerAPI(APIView):
         """
         error_log = f"{settings.LOG_PATH}/error.log"
         try:
-            with open(error_log, "r") as file:
-                log_data = file.read()
+            log_index = ErrorLogIndex.for_log(error_log)
         except IOError as e:
             return CustomResponse(response=str(e)).get_failure_response()
 
-        log_handler = logHandler(log_data)
+        log_handler = logHandler(log_index)
         formatted_errors = log_handler.parse_logs()
         return CustomResponse(response=formatted_errors).get_success_response()
 
@@ -184,10 +183,7 @@ class ErrorGraphAPI(APIView):
         try:
             error_log = f"{settings.LOG_PATH}/error.log"
 
-            with open(error_log, "r") as file:
-                log_data = file.read()
-
-            log_handler = logHandler(log_data)
+            log_handler = logHandler(ErrorLogIndex.for_log(error_log))
 
             formatted_errors = {
                 "heatmap": log_handler.get_urls_heatmap(),
@@ -231,10 +227,7 @@ class ErrorTabAPI(APIView):
         try:
             error_log = f"{settings.LOG_PATH}/error.log"
 
-            with open(error_log, "r") as file:
-                log_data = file.read()
-
-            log_handler = logHandler(log_data)
+            log_handler = logHandler(ErrorLogIndex.for_log(error_log))
             parsed_errors = log_handler.parse_logs()
         
             urlpatterns = ManageURLPatterns().urlpatterns
@@ -1,7 +1,13 @@
+import fcntl
+import heapq
 import json
+import os
 import re
-from collections import defaultdict
+import tempfile
+import threading
+from collections import Counter, defaultdict
 from datetime import datetime, timezone
+from functools import lru_cache
 
 from django.urls import Resolver404, URLPattern, URLResolver, get_resolver, resolve
 
@@ -103,54 +109,256 @@ class ManageURLPatterns:
         return grouped_apis
 
 
-class logHandler:
-    def __init__(self, log_data) -> None:
-        self.log_data = log_data
-        self.log_pattern = (
-            r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3} ERROR EXCEPTION INFO:"
-            r".*?(?=\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3} ERROR EXCEPTION INFO:|\Z)"
-        )
-        # Log entries their types and how to find them
-        self.log_entries = {
-            "id": {"regex": r"ID: (.+?)\n(?=TYPE:)", "type": str},
-            "timestamp": {"regex": r"\n(.+?) ERROR.*", "type": datetime},
-            "type": {"regex": r"TYPE: (.+?)\n(?=MESSAGE:)", "type": str},
-            "message": {"regex": r"MESSAGE: (.+?)\n(?=METHOD:)", "type": str},
-            "method": {"regex": r"METHOD: (.+?)\n(?=PATH:)", "type": str},
-            "path": {"regex": r"PATH: (.+?)\n(?=AUTH:)", "type": str},
-            "auth": {"regex": r"AUTH: \n(.+?)\n(?=BODY:)", "type": dict},
-            "body": {"regex": r"BODY: \n(.+?)\n(?=TRACEBACK:)", "type": dict},
-            "traceback": {"regex": r"TRACEBACK: (.+)$", "type": str},
-        }
+RECORD_HEADER = r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3} ERROR EXCEPTION INFO:"
+RECORD_PATTERN = re.compile(
+    rf"({RECORD_HEADER}.*?)(?={RECORD_HEADER}|\Z)", re.DOTALL
+)
+TIMESTAMP_PATTERN = re.compile(
+    r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) ERROR EXCEPTION INFO:"
+)
+PATCH_PATTERN = re.compile(
+    r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) ERROR PATCHED : (\w+)"
+)
+# Start of any line written by the logger, and of an error record
+LOG_LINE_PATTERN = re.compile(rb"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3} ", re.MULTILINE)
+RECORD_START_PATTERN = re.compile(RECORD_HEADER.encode())
+MUID_PATTERN = re.compile(r"\n *\"muid\" *: * \"(.+?@mulearn)\",")
+
+# Log entries their types and how to find them
+LOG_ENTRIES = {
+    "id": {"regex": re.compile(r"ID: (.+?)\n(?=TYPE:)", re.DOTALL), "type": str},
+    "timestamp": {"regex": TIMESTAMP_PATTERN, "type": datetime},
+    "type": {"regex": re.compile(r"TYPE: (.+?)\n(?=MESSAGE:)", re.DOTALL), "type": str},
+    "message": {"regex": re.compile(r"MESSAGE: (.+?)\n(?=METHOD:)", re.DOTALL), "type": str},
+    "method": {"regex": re.compile(r"METHOD: (.+?)\n(?=PATH:)", re.DOTALL), "type": str},
+    "path": {"regex": re.compile(r"PATH: (.+?)\n(?=AUTH:)", re.DOTALL), "type": str},
+    "auth": {"regex": re.compile(r"AUTH: \n(.+?)\n(?=BODY:)", re.DOTALL), "type": dict},
+    "body": {"regex": re.compile(r"BODY: \n(.+?)\n(?=TRACEBACK:)", re.DOTALL), "type": dict},
+    "traceback": {"regex": re.compile(r"TRACEBACK: (.+)$", re.DOTALL), "type": str},
+}
+
+
+def get_formatted_time(extracted_timestamp: str) -> datetime:
+    """convert datetime from error log to readable datetime
 
-    def parse_logs(self) -> list[dict]:
-        """parse a log value as str and convert it into
-        appropriate types
+    Args:
+        extracted_timestamp (str): string datetime from error log
 
-        Returns:
-            list[dict]: formatted errors
-        """
-        self.patch_pattern = (
-            r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) ERROR PATCHED : (\w+)"
-        )
-        self.patched_errors = self.extract_patches(self.log_data)
+    Returns:
+        datetime: converted datetime object
+    """
+    return datetime.strptime(
+        extracted_timestamp.replace(",", "."), "%Y-%m-%d %H:%M:%S.%f"
+    )
 
-        # Extract all logs in string format
-        matches = reversed(re.findall(self.log_pattern, self.log_data, re.DOTALL))
-        formatted_errors = {}
-        for error in matches:
-            # Separate each item in log
-            log_entry = self.extract_log_entry(error)
-            # combine them all to formatted_errors dict
-            self.aggregate_log_entry(formatted_errors, log_entry)
 
-        return formatted_errors.values()
+@lru_cache(maxsize=1024)
+def resolve_route(path: str) -> str:
+    """resolves a request path to its url pattern, once per distinct path"""
+    try:
+        return resolve(path).route
+    except Resolver404:
+        return path
+
 
-    def extract_patches(self, log_data):
-        return {
-            patch[2]: self.get_formatted_time(patch[1])
-            for patch in re.finditer(self.patch_pattern, log_data)
+class ErrorLogIndex:
+    """
+    Incremental index of an error log.
+
+    The log is tailed from the byte offset reached by the previous refresh, so only
+    records appended since then are parsed. Parsed entries and patches are
+    appended to a JSON lines file next to the log, and a small index file keeps
+    the offsets and the aggregates (patches, per-route hit counters, affected
+    muids, last incident), so a refresh writes in proportion to what it parsed.
+
+    Errors are grouped by id in memory as entries are read. Every process first
+    catches up on the entries other processes appended, under a file lock, and
+    the index is rebuilt from scratch if the log is truncated or replaced.
+    """
+
+    _instances = {}
+    _lock = threading.Lock()
+
+    def __init__(self, log_path: str) -> None:
+        self.log_path = log_path
+        self.index_path = f"{log_path}.index"
+        self.entries_path = f"{log_path}.entries"
+        self.lock_path = f"{log_path}.lock"
+        self.reset()
+
+    @classmethod
+    def for_log(cls, log_path: str) -> "ErrorLogIndex":
+        """returns the refreshed index of the log, shared within the process"""
+        with cls._lock:
+            if log_path not in cls._instances:
+                cls._instances[log_path] = cls(log_path)
+            index = cls._instances[log_path]
+            index.refresh()
+        return index
+
+    def reset(self) -> None:
+        self.inode = None
+        self.offset = 0
+        self.entries_size = 0
+        self.patches = {}
+        self.route_hits = Counter()
+        self.affected_muids = set()
+        self.last_incident = None
+        # id: {field: distinct values, oldest first}, most recently seen id last
+        self.groups = {}
+
+    def read_index(self) -> dict | None:
+        try:
+            with open(self.index_path, "r") as file:
+                return json.load(file)
+        except (IOError, ValueError):
+            return None
+
+    def apply_index(self, data: dict) -> None:
+        self.inode = data["inode"]
+        self.offset = data["offset"]
+        self.entries_size = data["entries_size"]
+        self.patches = {
+            log_id: datetime.fromisoformat(patched_at)
+            for log_id, patched_at in data["patches"].items()
+        }
+        self.route_hits = Counter(data["route_hits"])
+        self.affected_muids = set(data["affected_muids"])
+        self.last_incident = (
+            datetime.fromisoformat(data["last_incident"])
+            if data["last_incident"]
+            else None
+        )
+
+    def save(self) -> None:
+        data = {
+            "inode": self.inode,
+            "offset": self.offset,
+            "entries_size": self.entries_size,
+            "patches": {
+                log_id: patched_at.isoformat()
+                for log_id, patched_at in self.patches.items()
+            },
+            "route_hits": self.route_hits,
+            "affected_muids": sorted(self.affected_muids),
+            "last_incident": self.last_incident.isoformat() if self.last_incident else None,
+        }
+        directory = os.path.dirname(self.index_path) or "."
+        with tempfile.NamedTemporaryFile(
+            "w", dir=directory, delete=False, suffix=".tmp"
+        ) as file:
+            json.dump(data, file)
+        os.replace(file.name, self.index_path)
+
+    def sync(self) -> None:
+        """catches up on what other processes indexed since this one last looked"""
+        if (data := self.read_index()) is None:
+            self.reset()
+            return
+
+        if data["inode"] != self.inode or data["entries_size"] < self.entries_size:
+            self.reset()
+
+        if data["entries_size"] > self.entries_size:
+            with open(self.entries_path, "rb") as file:
+                file.seek(self.entries_size)
+                position = self.entries_size
+                while position < data["entries_size"] and (line := file.readline()):
+                    position += len(line)
+                    self.add_record(json.loads(line))
+
+        self.apply_index(data)
+
+    def refresh(self) -> None:
+        """parses the records appended to the log since the last refresh"""
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self.sync()
+
+            stat = os.stat(self.log_path)
+            replaced = stat.st_ino != self.inode or stat.st_size < self.offset
+            if replaced:
+                self.reset()
+                self.inode = stat.st_ino
+
+            records = []
+            if stat.st_size > self.offset:
+                with open(self.log_path, "rb") as file:
+                    file.seek(self.offset)
+                    chunk = file.read()
+
+                chunk = chunk[: chunk.rfind(b"\n") + 1]
+                # A traceback may still be being written after the last complete
+                # line, so the last error stays pending until another record
+                # starts after it
+                last_line = None
+                for last_line in LOG_LINE_PATTERN.finditer(chunk):
+                    pass
+                if last_line and RECORD_START_PATTERN.match(chunk, last_line.start()):
+                    chunk = chunk[: last_line.start()]
+                self.offset += len(chunk)
+                records = self.ingest(chunk.decode("utf-8", errors="replace"))
+
+            if not (replaced or records):
+                return
+
+            lines = "".join(json.dumps(record) + "\n" for record in records).encode()
+            with open(self.entries_path, "ab") as file:
+                # drops anything a refresh that died before saving the index appended
+                file.truncate(self.entries_size)
+                file.write(lines)
+            self.entries_size += len(lines)
+            self.save()
+
+    def ingest(self, log_data: str) -> list[dict]:
+        """
+        Indexes the patches and errors in the order they were logged and returns
+        them as records for the entries file.
+        """
+        records = []
+        for match in heapq.merge(
+            PATCH_PATTERN.finditer(log_data),
+            RECORD_PATTERN.finditer(log_data),
+            key=lambda match: match.start(),
+        ):
+            if match.re is PATCH_PATTERN:
+                record = {"patch": match[2], "at": get_formatted_time(match[1]).isoformat()}
+                self.patches[match[2]] = get_formatted_time(match[1])
+                self.add_record(record)
+                records.append(record)
+                continue
+
+            error = match[1]
+            log_entry = self.extract_log_entry(error)
+            if log_entry["timestamp"] is None:
+                continue
+
+            self.last_incident = log_entry["timestamp"]
+            if log_entry["path"]:
+                self.route_hits[resolve_route(log_entry["path"])] += 1
+            self.affected_muids.update(MUID_PATTERN.findall(error))
+
+            record = log_entry | {"timestamp": log_entry["timestamp"].isoformat()}
+            self.add_record(record)
+            records.append(record)
+        return records
+
+    def add_record(self, record: dict) -> None:
+        # a patch hides the occurrences of the error logged before it
+        if "patch" in record:
+            self.groups.pop(record["patch"], None)
+            return
+
+        log_entry = record | {"timestamp": datetime.fromisoformat(record["timestamp"])}
+        group = self.groups.pop(log_entry["id"], None) or {
+            key: [] for key in LOG_ENTRIES if key != "id"
         }
+        self.groups[log_entry["id"]] = group
+        for key, values in group.items():
+            if value := log_entry[key]:
+                if value in values:
+                    values.remove(value)
+                values.append(value)
 
     def extract_log_entry(self, error: str) -> dict:
         """fetch the value from the details of how to
@@ -162,125 +370,47 @@ class logHandler:
         Returns:
             dict: extracted log entry
         """
-        values = self.get_values(error, *self.get_patterns())
         result_dict = {}
 
-        for key, value in values.items():
-            entry_type = self.log_entries[key]["type"]
+        for key, entry in LOG_ENTRIES.items():
+            value = value[1] if (value := entry["regex"].search(error)) else None
 
-            if entry_type == datetime:
-                result_dict[key] = self.get_formatted_time(value)
-            elif entry_type == dict and value:
-                result_dict[key] = json.loads(value)
+            if entry["type"] == datetime:
+                result_dict[key] = get_formatted_time(value) if value else None
+            elif entry["type"] == dict and value:
+                try:
+                    result_dict[key] = json.loads(value)
+                except ValueError:
+                    result_dict[key] = value
             else:
                 result_dict[key] = value
 
         return result_dict
 
-    def get_formatted_time(self, extracted_timestamp: str) -> datetime:
-        """convert datetime from error log to readable datetime
-
-        Args:
-            extracted_timestamp (str): string datetime from error log
 
-        Returns:
-            datetime: converted datetime object
-        """
-        return datetime.strptime(
-            extracted_timestamp.replace(",", "."), "%Y-%m-%d %H:%M:%S.%f"
-        )
-
-    def get_values(self, error: str, *patterns: str) -> dict:
-        """fetches all values with the regex patterns
-
-        Args:
-            error (str): error string from log
-
-        Returns:
-            dict: fetched values
-        """
-        return {
-            attr: self.extract_value(error, pattern)
-            for attr, pattern in zip(self.log_entries.keys(), patterns)
-        }
-
-    def extract_value(self, error: str, pattern: str) -> str:
-        """fetches a given value from the error with
-        the provided regex
-
-        Args:
-            error (str): error string from log
-            pattern (str): regex pattern
-
-        Returns:
-            str: fetched value
-        """
-        return value[1] if (value := re.search(pattern, error, re.DOTALL)) else None
+class logHandler:
+    def __init__(self, log_index: ErrorLogIndex) -> None:
+        self.log_index = log_index
 
-    def get_patterns(self) -> list:
-        """fetches all regex patterns
+    def parse_logs(self) -> list[dict]:
+        """the indexed errors grouped by id, leaving out the
+        occurrences logged before the error was patched
 
         Returns:
-            list: regex patterns
-        """
-        values = self.log_entries.values()
-        return [value["regex"] for value in values]
-
-    def already_patched(self, log_entry: dict) -> bool:
-        """checks if log entry id is in patched
-        errors and its timestamp is before the error was patched
-        """
-        return (
-            log_entry["id"] in self.patched_errors
-            and log_entry["timestamp"] < self.patched_errors[log_entry["id"]]
-        )
-
-    def aggregate_log_entry(
-        self, formatted_errors: list[dict], log_entry: dict
-    ) -> None:
-        """combines all fetched error into one
-
-        Args:
-            formatted_errors (list[dict]): the list to add everything into
-            log_entry (dict):   current log entry
+            list[dict]: formatted errors, most recent first
         """
-        if not self.already_patched(log_entry):
-            log_id = log_entry["id"]
-            log_keys = self.log_entries.keys()
-            if log_id not in formatted_errors:
-                formatted_errors[log_id] = {
-                    key: [] if key != "id" else log_id for key in log_keys
-                }
-            for key in log_keys:
-                if (
-                    key != "id"
-                    and log_entry[key]
-                    and log_entry[key] not in formatted_errors[log_id][key]
-                ):
-                    formatted_errors[log_id][key].append(log_entry[key])
+        return [
+            {"id": log_id} | {key: values[::-1] for key, values in group.items()}
+            for log_id, group in reversed(self.log_index.groups.items())
+        ]
 
     def get_urls_heatmap(self):
         """get the number of times each url is hit
 
-        Args:
-            urlpatterns (list): the list of url patterns
-
         Returns:
             dict: the number of times each url is hit
         """
-        url_hits = {}
-
-        for url_hit in re.finditer(self.log_entries["path"]["regex"], self.log_data):
-            hit = url_hit.group(1)
-            resolved = resolve(hit)
-            matched_pattern = resolved.route
-
-            if matched_pattern in url_hits:
-                url_hits[matched_pattern] += 1
-            else:
-                url_hits[matched_pattern] = 1
-
-        return url_hits
+        return dict(self.log_index.route_hits)
 
     def get_incident_info(self):
         """Get the time since the last incident in UTC.
@@ -288,11 +418,10 @@ class logHandler:
         Returns:
             str: The time since the last incident in UTC.
         """
-        last_incident = re.findall(
-            self.log_entries["timestamp"]["regex"], self.log_data
-        )[-1]
+        if self.log_index.last_incident is None:
+            return {"last_incident": None, "time_since_then": None}
 
-        last_incident_datetime = self.get_formatted_time(last_incident).replace(
+        last_incident_datetime = self.log_index.last_incident.replace(
             tzinfo=timezone.utc
         )
         current_datetime = DateTimeUtils.get_current_utc_time()
@@ -310,8 +439,6 @@ class logHandler:
         Returns:
             int: The number of affected users.
         """
-        affected_users = set(
-            re.findall(r"\n *\"muid\" *: * \"(.+?@mulearn)\",", self.log_data)
-        )
+        affected_users = self.log_index.affected_muids
 
         return (len(affected_users) / User.objects.count()) * 100
@@ -0,0 +1,270 @@
+import uuid
+from datetime import timedelta
+from email.mime.image import MIMEImage
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+
+from db.task import TaskList, VoucherLog
+from db.user import User
+from utils.bulk_import import BulkImporter, Check, Lookup
+from utils.karma_rank import get_redis_client
+from utils.karma_voucher import generate_ordered_id, render_karma_vouchers
+from utils.utils import DateTimeUtils
+
+VOUCHER_MAIL_SUBJECT = "Congratulations on earning Karma points!"
+VOUCHER_MAIL_TEXT = """Greetings from GTech µLearn!
+
+            Great news! You are just one step away from claiming your internship/contribution Karma points.
+
+            Name: {full_name}
+            Email: {email}
+
+            To claim your karma points copy this `voucher {code}` and paste it #task-dropbox channel along with your voucher image.
+            """
+
+
+def build_voucher_mail(voucher: dict, image: bytes) -> EmailMessage:
+    email_obj = EmailMessage(
+        subject=VOUCHER_MAIL_SUBJECT,
+        body=VOUCHER_MAIL_TEXT.format(
+            full_name=voucher["full_name"], email=voucher["email"], code=voucher["code"]
+        ),
+        from_email=settings.FROM_MAIL,
+        to=[voucher["email"]],
+    )
+    attachment = MIMEImage(image)
+    attachment.add_header(
+        'Content-Disposition',
+        'attachment',
+        filename=f'{str(voucher["full_name"])}.jpg',
+    )
+    email_obj.attach(attachment)
+    return email_obj
+
+
+class VoucherMailJob:
+    """
+    Renders and mails a set of karma vouchers after the request that created them
+    has returned.
+
+    start() stores the vouchers in the cache and queues the job; the
+    send_voucher_mails worker runs it. Images are rendered on the voucher process
+    pool and mails go out in batches of VOUCHER_MAIL_BATCH_SIZE, each over a
+    single SMTP connection. Progress is kept in the cache under the job id so
+    clients can poll it, and a running job that has not reported progress for
+    VOUCHER_JOB_STALE_AFTER seconds, because its worker died, is reported failed.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    QUEUE_KEY = "voucher_mail_jobs"
+
+    def __init__(self, vouchers: list[dict], job_id: str = None) -> None:
+        """
+        vouchers: dicts with full_name, email, code, hashtag, karma and
+        time_or_event (the month/week or event/description line on the card)
+        """
+        self.vouchers = vouchers
+        self.job_id = job_id or str(uuid.uuid4())
+
+    @staticmethod
+    def key(job_id: str) -> str:
+        return f"voucher_mail_job:{job_id}"
+
+    @classmethod
+    def vouchers_key(cls, job_id: str) -> str:
+        return f"{cls.key(job_id)}:vouchers"
+
+    @classmethod
+    def get_progress(cls, job_id: str) -> dict | None:
+        progress = cache.get(cls.key(job_id))
+        if progress is None or progress["status"] != cls.RUNNING:
+            return progress
+
+        stale_before = DateTimeUtils.get_current_utc_time() - timedelta(
+            seconds=settings.VOUCHER_JOB_STALE_AFTER
+        )
+        if progress.get("updated_at") is None or progress["updated_at"] < stale_before:
+            progress.update(status=cls.FAILED, error="The job stopped before finishing")
+            cache.set(cls.key(job_id), progress, settings.VOUCHER_JOB_TIMEOUT)
+        return progress
+
+    def save_progress(self, **progress) -> None:
+        cache.set(
+            self.key(self.job_id),
+            {**progress, "updated_at": DateTimeUtils.get_current_utc_time()},
+            settings.VOUCHER_JOB_TIMEOUT,
+        )
+
+    def start(self) -> str:
+        cache.set(self.vouchers_key(self.job_id), self.vouchers, settings.VOUCHER_JOB_TIMEOUT)
+        self.save_progress(status=self.PENDING, total=len(self.vouchers), sent=0, failed=[])
+        get_redis_client().rpush(self.QUEUE_KEY, self.job_id)
+        return self.job_id
+
+    @classmethod
+    def next_job(cls, timeout: int) -> "VoucherMailJob | None":
+        """
+        Waits up to timeout seconds for a queued job, None if there is none. Jobs
+        whose vouchers have expired from the cache are skipped.
+        """
+        while item := get_redis_client().blpop([cls.QUEUE_KEY], timeout):
+            job_id = item[1].decode()
+            if (vouchers := cache.get(cls.vouchers_key(job_id))) is not None:
+                return cls(vouchers, job_id)
+        return None
+
+    def run(self) -> None:
+        sent = 0
+        failed = []
+        progress = {"total": len(self.vouchers)}
+        self.save_progress(status=self.RUNNING, sent=sent, failed=failed, **progress)
+
+        try:
+            images = render_karma_vouchers(
+                (
+                    {
+                        "name": str(voucher["full_name"]),
+                        "karma": str(int(voucher["karma"])),
+                        "code": voucher["code"],
+                        "hashtag": voucher["hashtag"],
+                        "month": voucher["time_or_event"],
+                    }
+                    for voucher in self.vouchers
+                ),
+                settings.VOUCHER_RENDER_WORKERS,
+            )
+            batch_size = settings.VOUCHER_MAIL_BATCH_SIZE
+            batch = []
+            for voucher, image in zip(self.vouchers, images):
+                batch.append((voucher, image))
+                if len(batch) == batch_size:
+                    sent += self.send_batch(batch, failed)
+                    batch = []
+                    self.save_progress(status=self.RUNNING, sent=sent, failed=failed, **progress)
+            if batch:
+                sent += self.send_batch(batch, failed)
+
+        except Exception as e:
+            self.save_progress(
+                status=self.FAILED, sent=sent, failed=failed, error=str(e), **progress
+            )
+            return
+
+        finally:
+            cache.delete(self.vouchers_key(self.job_id))
+
+        self.save_progress(status=self.DONE, sent=sent, failed=failed, **progress)
+
+    @staticmethod
+    def send_batch(batch: list[tuple[dict, bytes]], failed: list) -> int:
+        """
+        Sends one batch over a single connection and returns how many were sent.
+        Vouchers that could not be mailed are added to failed.
+        """
+        sent = 0
+        with get_connection() as connection:
+            for voucher, image in batch:
+                try:
+                    connection.send_messages([build_voucher_mail(voucher, image)])
+                except Exception as e:
+                    failed.append({"code": voucher["code"], "error": str(e)})
+                else:
+                    sent += 1
+        return sent
+
+
+class VoucherImporter(BulkImporter):
+    model = VoucherLog
+    headers = ["muid", "karma", "hashtag", "month", "week", "description", "event"]
+
+    def __init__(self, actor_id):
+        super().__init__(actor_id)
+        # codes are P{ddmmyy}{serial}, only today's can collide with new ones
+        self.existing_codes = set(
+            VoucherLog.objects.filter(code__startswith=generate_ordered_id(0)[:-4])
+            .values_list("code", flat=True)
+        )
+        self.count = 1
+        # the vouchers to mail once the import commits
+        self.mail_vouchers = []
+
+    def get_stages(self):
+        return [
+            Lookup(
+                "muid",
+                User.objects.all(),
+                "muid",
+                "user_id",
+                "Invalid muid: {muid}",
+                extra=("email", "full_name"),
+            ),
+            Lookup(
+                "hashtag",
+                TaskList.objects.all(),
+                "hashtag",
+                "task_id",
+                "Invalid task hashtag: {hashtag}",
+            ),
+            Check(lambda row: row["karma"] != 0, "Karma cannot be 0"),
+            Check(lambda row: row["month"] is not None, "Month cannot be empty"),
+            Check(
+                lambda row: not row["week"] or len(str(row["week"])) <= 2,
+                "Week must not exceed 2 characters in length and should be of the format 'W1'",
+            ),
+        ]
+
+    def next_code(self):
+        while (code := generate_ordered_id(self.count)) in self.existing_codes:
+            self.count += 1
+        self.count += 1
+        return code
+
+    def build(self, row):
+        return VoucherLog(
+            id=str(uuid.uuid4()),
+            code=self.next_code(),
+            user_id=row["user_id"],
+            task_id=row["task_id"],
+            karma=row["karma"],
+            month=row["month"],
+            week=row["week"],
+            claimed=False,
+            event=row["event"],
+            description=row["description"],
+            created_by_id=self.actor_id,
+            updated_by_id=self.actor_id,
+        )
+
+    def saved(self, vouchers, rows):
+        for voucher, row in zip(vouchers, rows):
+            time_or_event = f"{voucher.month}/{voucher.week}"
+            if voucher.event:
+                time_or_event = f"{voucher.event}/{voucher.description}"
+
+            self.mail_vouchers.append({
+                "full_name": row["full_name"],
+                "email": row["email"],
+                "code": voucher.code,
+                "hashtag": row["hashtag"],
+                "karma": voucher.karma,
+                "time_or_event": time_or_event,
+            })
+
+    def describe(self, voucher, row):
+        return {
+            "muid": row["muid"],
+            "code": voucher.code,
+            "user": row["full_name"],
+            "task": row["hashtag"],
+            "karma": voucher.karma,
+            "month": voucher.month,
+            "week": voucher.week or None,
+            "description": voucher.description or None,
+            "event": voucher.event or None,
+        }
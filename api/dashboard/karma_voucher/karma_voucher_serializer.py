@@ -8,58 +8,6 @@ from utils.utils import DateTimeUtils
 from utils.karma_voucher import generate_ordered_id
 
 
-class VoucherLogCSVSerializer(serializers.ModelSerializer):
-    user_id = serializers.CharField(required=True, allow_null=False)
-    task_id = serializers.CharField(required=True, allow_null=False)
-    created_by_id = serializers.CharField(required=True, allow_null=False)
-    updated_by_id = serializers.CharField(required=True, allow_null=False)
-    week = serializers.CharField(required=False, allow_null=True)
-
-    class Meta:
-        model = VoucherLog
-        fields = [
-            'id',
-            'code',
-            'user_id',
-            'task_id',
-            'karma',
-            'month',
-            'week',
-            'claimed',
-            'created_by_id',
-            'updated_by_id',
-            'created_at',
-            'updated_at',
-            'event',
-            'description'
-        ]
-
-    def validate(self, data):
-        response_data = {}
-        response_data["code"] = data.get('code')
-        week = data.get('week')
-        if week and len(str(week)) > 2:
-            response_data["error"] = "Week must not exceed 2 characters in length and should be of the format 'W1'"
-            raise serializers.ValidationError(response_data)
-        return data
-
-    def to_representation(self, instance):
-        representation = super().to_representation(instance)
-
-        representation['code'] = instance.code
-        representation['full_name'] = instance.user.full_name
-        representation['email'] = instance.user.email
-        representation['muid'] = instance.user.muid
-        representation['hashtag'] = instance.task.hashtag
-        representation['month'] = instance.month
-        representation['karma'] = instance.karma
-        representation['week'] = instance.week if instance.week else None
-        representation['description'] = instance.description if instance.description else None
-        representation['event'] = instance.event if instance.event else None
-
-        return representation
-
-
 class VoucherLogSerializer(serializers.ModelSerializer):
     user = serializers.CharField(source='user.full_name')
     task = serializers.CharField(source='task.title')
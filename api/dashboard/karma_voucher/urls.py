@@ -5,6 +5,7 @@ from . import karma_voucher_view
 urlpatterns = [
     path('', karma_voucher_view.VoucherLogAPI.as_view()),
     path('import/', karma_voucher_view.ImportVoucherLogAPI.as_view()),
+    path('job/<str:job_id>/', karma_voucher_view.VoucherMailJobAPI.as_view()),
     path('export/', karma_voucher_view.ExportVoucherLogAPI.as_view()),
 
     path('create/', karma_voucher_view.VoucherLogAPI.as_view()),
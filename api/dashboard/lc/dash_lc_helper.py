@@ -0,0 +1,300 @@
+import json
+from typing import Iterable
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q, QuerySet, Sum
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from db.learning_circle import LearningCircle, UserCircleLink
+from db.task import KarmaActivityLog, TaskList
+from utils.karma_award import karma_awarded
+from utils.karma_rank import UPDATE_IF_BUILT, get_redis_client
+
+
+class CircleKarmaIndex:
+    """
+    Karma of every learning circle, kept in one Redis sorted set per interest
+    group. A circle's karma is the approved karma its accepted members earned in
+    the circle's interest group.
+
+    A circle's rank inside its interest group is a ZCOUNT instead of one SUM per
+    circle. An interest group's set is built with one grouped query the first
+    time it is read, karma log and membership writes made through Django
+    recompute the circles they touch, and the build_lc_karma_index command
+    rebuilds every set to pick up karma written outside of Django.
+    """
+
+    @staticmethod
+    def key(ig_id: str) -> str:
+        return f"lc_karma:{ig_id}"
+
+    @staticmethod
+    def get_circle_totals(ig_id: str, circle_id: str = None) -> dict[str, int]:
+        """
+        {circle_id: karma} of the circles of an interest group, or of one circle
+        in it, in one grouped query
+        """
+        circle_filter = (
+            {"user__user_circle_link_user__circle_id": circle_id}
+            if circle_id
+            else {"user__user_circle_link_user__circle__ig_id": ig_id}
+        )
+        # one filter() call, so both conditions apply to the same circle link
+        return dict(
+            KarmaActivityLog.objects.filter(
+                task__ig_id=ig_id,
+                appraiser_approved=True,
+            )
+            .filter(user__user_circle_link_user__accepted=True, **circle_filter)
+            .values_list("user__user_circle_link_user__circle_id")
+            .annotate(karma=Sum("karma"))
+            .order_by()
+        )
+
+    @classmethod
+    def build(cls, ig_id: str) -> int:
+        """
+        Rebuilds an interest group into a staging key and swaps it in atomically.
+        """
+        totals = cls.get_circle_totals(ig_id)
+        mapping = {
+            circle_id: totals.get(circle_id, 0)
+            for circle_id in LearningCircle.objects.filter(ig_id=ig_id).values_list("id", flat=True)
+        }
+
+        client = get_redis_client()
+        key = cls.key(ig_id)
+        if not mapping:
+            client.delete(key)
+            return 0
+
+        staging_key = f"{key}:building"
+        with client.pipeline() as pipe:
+            pipe.delete(staging_key)
+            pipe.zadd(staging_key, mapping)
+            pipe.rename(staging_key, key)
+            pipe.execute()
+        return len(mapping)
+
+    @classmethod
+    def build_all(cls) -> dict[str, int]:
+        ig_ids = LearningCircle.objects.values_list("ig_id", flat=True).distinct()
+        return {ig_id: cls.build(ig_id) for ig_id in ig_ids}
+
+    @classmethod
+    def get_karma_and_rank(cls, circle: LearningCircle) -> tuple[int, int]:
+        """
+        Returns the circle's karma and its rank among the circles of its interest
+        group. Circles with the same karma share a rank.
+        """
+        client = get_redis_client()
+        key = cls.key(circle.ig_id)
+
+        if not client.exists(key):
+            cls.build(circle.ig_id)
+
+        karma = int(client.zscore(key, circle.id) or 0)
+        return karma, client.zcount(key, f"({karma}", "+inf") + 1
+
+    @classmethod
+    def get_karma_many(cls, circles: Iterable[tuple[str, str]]) -> dict[str, int]:
+        """
+        {circle_id: karma} for (circle_id, ig_id) pairs, building the sets that
+        are missing
+        """
+        circles = list(circles)
+        ig_ids = list({ig_id for _, ig_id in circles})
+        client = get_redis_client()
+
+        with client.pipeline() as pipe:
+            for ig_id in ig_ids:
+                pipe.exists(cls.key(ig_id))
+            for ig_id, built in zip(ig_ids, pipe.execute()):
+                if not built:
+                    cls.build(ig_id)
+
+        with client.pipeline() as pipe:
+            for circle_id, ig_id in circles:
+                pipe.zscore(cls.key(ig_id), circle_id)
+            scores = pipe.execute()
+
+        return {circle_id: int(score or 0) for (circle_id, _), score in zip(circles, scores)}
+
+    @classmethod
+    def update_circle(cls, circle_id: str, ig_id: str) -> None:
+        """
+        Recomputes one circle in its interest group's set, if that set is built.
+        """
+        karma = cls.get_circle_totals(ig_id, circle_id).get(circle_id, 0)
+        client = get_redis_client()
+        client.register_script(UPDATE_IF_BUILT)(keys=[cls.key(ig_id)], args=[circle_id, karma])
+
+    @classmethod
+    def remove_circle(cls, circle_id: str, ig_id: str) -> None:
+        client = get_redis_client()
+        client.register_script(UPDATE_IF_BUILT)(keys=[cls.key(ig_id)], args=[circle_id, ""])
+
+    @staticmethod
+    def get_member_karma(ig_id: str, user_ids: Iterable[str]) -> dict[str, int]:
+        """
+        {user_id: approved karma in the interest group}, one grouped query
+        """
+        return dict(
+            KarmaActivityLog.objects.filter(
+                task__ig_id=ig_id, user_id__in=list(user_ids), appraiser_approved=True
+            )
+            .values_list("user_id")
+            .annotate(karma=Sum("karma"))
+            .order_by()
+        )
+
+
+class FeaturedCircles:
+    """
+    Circles shown on the learning circle discovery page: the ones with a meet
+    time and place set.
+
+    Their ids are kept in a Redis set and their card data (lead, member count,
+    karma) in a Redis hash, both rebuilt every LC_FEATURED_REFRESH_INTERVAL
+    seconds by the build_lc_featured_pool command or by the first read that finds
+    them expired. A draw is an SRANDMEMBER and an HMGET, with no query.
+    """
+
+    POOL_KEY = "lc_featured:pool"
+    CARDS_KEY = "lc_featured:cards"
+
+    @staticmethod
+    def get_eligible() -> QuerySet:
+        return LearningCircle.objects.exclude(
+            Q(meet_time__isnull=True)
+            | Q(meet_time="")
+            | Q(meet_place__isnull=True)
+            | Q(meet_place="")
+        )
+
+    @classmethod
+    def get_cards(cls) -> dict[str, dict]:
+        eligible = cls.get_eligible()
+        circles = list(
+            eligible.values(
+                "id", "name", "ig_id", "ig__name", "org__title", "meet_place", "meet_time"
+            )
+        )
+
+        members = UserCircleLink.objects.filter(circle__in=eligible.values("id"), accepted=True)
+        member_counts = dict(
+            members.values_list("circle_id").annotate(count=Count("id")).order_by()
+        )
+        lead_names = dict(members.filter(lead=True).values_list("circle_id", "user__full_name"))
+        karma = CircleKarmaIndex.get_karma_many(
+            (circle["id"], circle["ig_id"]) for circle in circles
+        )
+
+        return {
+            circle["id"]: {
+                "id": circle["id"],
+                "name": circle["name"],
+                "ig_name": circle["ig__name"],
+                "org_name": circle["org__title"],
+                "member_count": member_counts.get(circle["id"], 0),
+                "members": None,
+                "meet_place": circle["meet_place"],
+                "meet_time": circle["meet_time"],
+                "lead_name": lead_names.get(circle["id"]),
+                "ismember": False,
+                "karma": karma.get(circle["id"], 0),
+            }
+            for circle in circles
+        }
+
+    @classmethod
+    def build(cls) -> int:
+        cards = cls.get_cards()
+
+        with get_redis_client().pipeline() as pipe:
+            pipe.delete(cls.POOL_KEY, cls.CARDS_KEY)
+            if cards:
+                pipe.sadd(cls.POOL_KEY, *cards)
+                pipe.hset(
+                    cls.CARDS_KEY,
+                    mapping={circle_id: json.dumps(card) for circle_id, card in cards.items()},
+                )
+                pipe.expire(cls.POOL_KEY, settings.LC_FEATURED_REFRESH_INTERVAL)
+                pipe.expire(cls.CARDS_KEY, settings.LC_FEATURED_REFRESH_INTERVAL)
+            pipe.execute()
+        return len(cards)
+
+    @classmethod
+    def sample(cls, count: int) -> list[dict]:
+        """
+        Returns the cards of up to `count` distinct circles drawn at random.
+        """
+        client = get_redis_client()
+        if not (circle_ids := client.srandmember(cls.POOL_KEY, count)):
+            if not cls.build():
+                return []
+            circle_ids = client.srandmember(cls.POOL_KEY, count)
+
+        return [json.loads(card) for card in client.hmget(cls.CARDS_KEY, circle_ids) if card]
+
+
+def get_user_circles(user_id: str, **filters) -> QuerySet:
+    return LearningCircle.objects.filter(
+        user_circle_link_circle__user_id=user_id, **filters
+    ).values_list("id", "ig_id")
+
+
+@receiver(post_save, sender=KarmaActivityLog)
+@receiver(post_delete, sender=KarmaActivityLog)
+def update_circle_karma_for_log(sender, instance, *args, **kwargs):
+    user_id, task_id = instance.user_id, instance.task_id
+
+    def update():
+        ig_id = TaskList.objects.filter(id=task_id).values_list("ig_id", flat=True).first()
+        if ig_id is None:
+            return
+        for circle_id, circle_ig_id in get_user_circles(
+            user_id, ig_id=ig_id, user_circle_link_circle__accepted=True
+        ):
+            CircleKarmaIndex.update_circle(circle_id, circle_ig_id)
+
+    transaction.on_commit(update)
+
+
+@receiver(karma_awarded)
+def update_circle_karma_for_award(sender, task, user_ids, **kwargs):
+    if task.ig_id is None:
+        return
+    circles = LearningCircle.objects.filter(
+        ig_id=task.ig_id,
+        user_circle_link_circle__user_id__in=user_ids,
+        user_circle_link_circle__accepted=True,
+    ).values_list("id", "ig_id").distinct()
+    for circle_id, ig_id in circles:
+        CircleKarmaIndex.update_circle(circle_id, ig_id)
+
+
+@receiver(post_save, sender=UserCircleLink)
+@receiver(post_delete, sender=UserCircleLink)
+def update_circle_karma_for_member(sender, instance, *args, **kwargs):
+    circle_id = instance.circle_id
+
+    def update():
+        if ig_id := LearningCircle.objects.filter(id=circle_id).values_list("ig_id", flat=True).first():
+            CircleKarmaIndex.update_circle(circle_id, ig_id)
+
+    transaction.on_commit(update)
+
+
+@receiver(post_save, sender=LearningCircle)
+def add_circle_karma(sender, instance, *args, **kwargs):
+    circle_id, ig_id = instance.id, instance.ig_id
+    transaction.on_commit(lambda: CircleKarmaIndex.update_circle(circle_id, ig_id))
+
+
+@receiver(post_delete, sender=LearningCircle)
+def remove_circle_karma(sender, instance, *args, **kwargs):
+    circle_id, ig_id = instance.id, instance.ig_id
+    transaction.on_commit(lambda: CircleKarmaIndex.remove_circle(circle_id, ig_id))
@@ -2,6 +2,7 @@ import uuid
 from datetime import datetime
 from django.conf import settings
 from decouple import config
+from django.db import transaction
 from django.db.models import Sum
 from rest_framework import serializers
 
@@ -10,10 +11,12 @@ from db.organization import UserOrganizationLink
 from db.task import KarmaActivityLog
 from db.task import TaskList, UserIgLink, Wallet
 from db.user import User
+from utils.karma_award import award_karma
 from utils.types import Lc
 from utils.types import OrganizationType
 from utils.utils import DateTimeUtils
 from .dash_ig_helper import get_today_start_end, get_week_start_end
+from .dash_lc_helper import CircleKarmaIndex
 
 
 class LearningCircleSerializer(serializers.ModelSerializer):
@@ -274,17 +277,13 @@ class LearningCircleMemberListSerializer(serializers.ModelSerializer):
         ]
 
     def get_lc_karma(self, obj):
-        circle_id = self.context.get('circle_id')
-        karma_activity_log = KarmaActivityLog.objects.filter(
-            user=obj.user,
-            task__ig__learning_circle_ig__id=circle_id
-        ).aggregate(
-            karma=Sum(
-                'karma'
-            )
-        )['karma']
+        if (member_karma := self.context.get('member_karma')) is None:
+            ig_id = LearningCircle.objects.filter(
+                id=self.context.get('circle_id')
+            ).values_list('ig_id', flat=True).first()
+            member_karma = CircleKarmaIndex.get_member_karma(ig_id, [obj.user_id])
 
-        return karma_activity_log if karma_activity_log else 0
+        return member_karma.get(obj.user_id, 0)
 
 
 class LearningCircleJoinSerializer(serializers.ModelSerializer):
@@ -385,18 +384,14 @@ class LearningCircleDetailsSerializer(serializers.ModelSerializer):
             lead=True
         ).exists()
 
+    def _get_karma_and_rank(self, obj):
+        circle_karma = self.context.setdefault('circle_karma', {})
+        if obj.id not in circle_karma:
+            circle_karma[obj.id] = CircleKarmaIndex.get_karma_and_rank(obj)
+        return circle_karma[obj.id]
+
     def get_total_karma(self, obj):
-        return (
-            KarmaActivityLog.objects.filter(
-                user__user_circle_link_user__circle=obj,
-                user__user_circle_link_user__accepted=True,
-                task__ig=obj.ig,
-                appraiser_approved=True,
-            ).aggregate(
-                total_karma=Sum(
-                    'karma'
-                ))['total_karma'] or 0
-        )
+        return self._get_karma_and_rank(obj)[0]
 
     def get_members(self, obj):
         return self._get_member_info(obj, accepted=1)
@@ -406,28 +401,25 @@ class LearningCircleDetailsSerializer(serializers.ModelSerializer):
 
     def _get_member_info(self, obj, accepted):
 
-        members = obj.user_circle_link_circle.filter(
-            circle=obj,
-            accepted=accepted
+        members = list(
+            obj.user_circle_link_circle.filter(
+                accepted=accepted
+            ).select_related(
+                'user__user_lvl_link_user__level'
+            )
+        )
+        member_karma = CircleKarmaIndex.get_member_karma(
+            obj.ig_id, [member.user_id for member in members]
         )
 
         member_info = []
 
         for member in members:
-            total_ig_karma = KarmaActivityLog.objects.filter(
-                task__ig=member.circle.ig,
-                user=member.user,
-                appraiser_approved=True
-            ).aggregate(
-                total_karma=Sum(
-                    'karma'
-                ))['total_karma'] or 0
-
             member_info.append({
                 'id': member.user.id,
                 'username': f'{member.user.full_name}',
-                'profile_pic': f'{member.user.profile_pic}' or None,
-                'karma': total_ig_karma,
+                'profile_pic': member.user.profile_pic_small,
+                'karma': member_karma.get(member.user_id, 0),
                 'is_lead': member.lead,
                 'level': member.user.user_lvl_link_user.level.level_order
             })
@@ -435,53 +427,7 @@ class LearningCircleDetailsSerializer(serializers.ModelSerializer):
         return member_info
 
     def get_rank(self, obj):
-        total_karma = KarmaActivityLog.objects.filter(
-            user__user_circle_link_user__circle=obj,
-            user__user_circle_link_user__accepted=True,
-            task__ig=obj.ig,
-            appraiser_approved=True
-        ).aggregate(
-            total_karma=Sum(
-                'karma'
-            )
-        )['total_karma'] or 0
-
-        circle_ranks = {obj.name: {'total_karma': total_karma}}
-
-        all_learning_circles = LearningCircle.objects.filter(
-            ig=obj.ig
-        ).exclude(
-            id=obj.id
-        )
-
-        for lc in all_learning_circles:
-            total_karma_lc = KarmaActivityLog.objects.filter(
-                user__user_circle_link_user__circle=lc,
-                user__user_circle_link_user__accepted=True,
-                task__ig=lc.ig,
-                appraiser_approved=True
-            ).aggregate(
-                total_karma=Sum(
-                    'karma'
-                )
-            )['total_karma'] or 0
-
-            circle_ranks[lc.name] = {'total_karma': total_karma_lc}
-
-        sorted_ranks = sorted(
-            circle_ranks.items(),
-            key=lambda x: x[1]['total_karma'],
-            reverse=True
-        )
-
-        return next(
-            (
-                i + 1
-                for i, (circle_name, data) in enumerate(sorted_ranks)
-                if circle_name == obj.name
-            ),
-            None,
-        )
+        return self._get_karma_and_rank(obj)[1]
 
     def get_previous_meetings(self, obj):
         return obj.circle_meeting_log_learning_circle.all().values(
@@ -620,16 +566,16 @@ class MeetRecordsCreateEditDeleteSerializer(serializers.ModelSerializer):
 
     def get_attendees_details(self, obj):
         attendees_list = obj.attendees.split(',')
+        users = User.objects.in_bulk(attendees_list)
 
-        attendees_details_list = []
-        for user_id in attendees_list:
-            user = User.objects.get(id=user_id)
-            attendees_details_list.append({
+        return [
+            {
                 'full_name': user.full_name,
-                'profile_pic': user.profile_pic,
-            })
-
-        return attendees_details_list
+                'profile_pic': user.profile_pic_small,
+            }
+            for user_id in attendees_list
+            if (user := users.get(user_id))
+        ]
 
     def create(self, validated_data):
         today_date = DateTimeUtils.get_current_utc_time().date()
@@ -650,26 +596,9 @@ class MeetRecordsCreateEditDeleteSerializer(serializers.ModelSerializer):
         user_id = self.context.get('user_id')
         task = TaskList.objects.filter(hashtag=Lc.TASK_HASHTAG.value).first()
 
-        for attendee_id in attendees_list:
-            # Send karma points
-            KarmaActivityLog.objects.create(
-                id=uuid.uuid4(),
-                user_id=attendee_id,
-                karma=Lc.KARMA.value,
-                task=task,
-                updated_by_id=user_id,
-                created_by_id=user_id,
-            )
-
-            # Update the wallet with karma points
-            wallet = Wallet.objects.filter(user_id=attendee_id).first()
-            wallet.karma += Lc.KARMA.value
-            wallet.karma_last_updated_at = DateTimeUtils.get_current_utc_time()
-            wallet.updated_at = DateTimeUtils.get_current_utc_time()
-            wallet.save()
-
-
-        return CircleMeetingLog.objects.create(**validated_data)
+        with transaction.atomic():
+            award_karma(attendees_list, task, Lc.KARMA.value, user_id)
+            return CircleMeetingLog.objects.create(**validated_data)
 
     def update(self, instance, validated_data):
         instance.updated_by_id = self.context.get('user_id')
@@ -677,36 +606,10 @@ class MeetRecordsCreateEditDeleteSerializer(serializers.ModelSerializer):
         return instance
 
     def validate_attendees(self, attendees):
-        task = TaskList.objects.filter(hashtag=Lc.TASK_HASHTAG.value).first()
-
         attendees_list = attendees.split(',')
 
-        user_id = self.context.get('user_id')
-        for user in attendees_list:
-            KarmaActivityLog.objects.bulk_create([
-                KarmaActivityLog(
-                    id=uuid.uuid4(),
-                    user_id=user,
-                    karma=Lc.KARMA.value,
-                    task=task,
-                    updated_by_id=user_id,
-                    created_by_id=user_id,
-                )
-            ])
-            wallet = Wallet.objects.filter(user_id=user).first()
-            wallet.karma += Lc.KARMA.value
-            wallet.karma_last_updated_at = DateTimeUtils.get_current_utc_time()
-            wallet.updated_at = DateTimeUtils.get_current_utc_time()
-            wallet.save()
-            # DiscordWebhooks.general_updates(
-            #     WebHookCategory.KARMA_INFO.value,
-            #     WebHookCategory.UPDATE.value,
-            #     user,
-            #     Lc.KARMA.value,
-            #     task.title,
-            #     task.hashtag
-            # )
-
+        if Wallet.objects.filter(user_id__in=attendees_list).count() != len(set(attendees_list)):
+            raise serializers.ValidationError('Invalid attendees')
 
         return attendees
 
@@ -21,6 +21,7 @@ from .dash_ig_helper import (
     is_learning_circle_member,
     is_valid_learning_circle,
 )
+from .dash_lc_helper import CircleKarmaIndex, FeaturedCircles
 from .dash_lc_serializer import (
     AddMemberSerializer,
     IgTaskDetailsSerializer,
@@ -63,6 +64,8 @@ class UserLearningCircleListApi(APIView):
 
 
 class LearningCircleMainApi(APIView):
+    FEATURED_COUNT = 9
+
     def post(self, request):
         all_circles = LearningCircle.objects.all()
         if JWTUtils.is_logged_in(request):
@@ -81,33 +84,26 @@ class LearningCircleMainApi(APIView):
 
             if ig_id or org_id or district_id:
                 serializer = LearningCircleMainSerializer(all_circles, many=True)
-            else:
-                random_circles = all_circles.exclude(
-                    Q(meet_time__isnull=True) | Q(meet_time="")
-                    and Q(meet_place__isnull=True) | Q(meet_place="")
-                ).order_by("?")[:9]
+                sorted_data = sorted(
+                    serializer.data, key=lambda x: x.get("karma", 0), reverse=True
+                )
+                return CustomResponse(response=sorted_data).get_success_response()
 
-                # random_circles = all_circles.order_by('?')[:9]
+        featured = FeaturedCircles.sample(self.FEATURED_COUNT)
 
-                serializer = LearningCircleMainSerializer(random_circles, many=True)
-            sorted_data = sorted(
-                serializer.data, key=lambda x: x.get("karma", 0), reverse=True
-            )
-            return CustomResponse(response=sorted_data).get_success_response()
-        else:
-            random_circles = all_circles.exclude(
-                Q(meet_time__isnull=True)
-                | Q(meet_time="") & Q(meet_place__isnull=True)
-                | Q(meet_place="")
-            ).order_by("?")[:9]
-
-            serializer = LearningCircleMainSerializer(random_circles, many=True)
-            # for ordered_dict in serializer.data:
-            #     ordered_dict.pop('ismember', None)
-            sorted_data = sorted(
-                serializer.data, key=lambda x: x.get("karma", 0), reverse=True
+        if JWTUtils.is_logged_in(request):
+            member_of = set(
+                UserCircleLink.objects.filter(
+                    user_id=JWTUtils.fetch_user_id(request),
+                    circle_id__in=[circle["id"] for circle in featured],
+                    accepted=True,
+                ).values_list("circle_id", flat=True)
             )
-            return CustomResponse(response=sorted_data).get_success_response()
+            for circle in featured:
+                circle["ismember"] = circle["id"] in member_of
+
+        sorted_data = sorted(featured, key=lambda x: x.get("karma", 0), reverse=True)
+        return CustomResponse(response=sorted_data).get_success_response()
 
 
 class LearningCircleStatsAPI(APIView):
@@ -151,15 +147,28 @@ class LearningCircleListMembersApi(APIView):
         # learning_circle = LearningCircle.objects.filter(
         #     id=circle_id
         # )
-        user_learning_circle = UserCircleLink.objects.filter(circle_id=circle_id)
+        user_learning_circle = UserCircleLink.objects.filter(
+            circle_id=circle_id
+        ).select_related("user__user_lvl_link_user__level")
 
         if user_learning_circle is None:
             return CustomResponse(
                 general_message="Learning Circle Not Exists"
             ).get_failure_response()
 
+        ig_id = (
+            LearningCircle.objects.filter(id=circle_id)
+            .values_list("ig_id", flat=True)
+            .first()
+        )
+        member_karma = CircleKarmaIndex.get_member_karma(
+            ig_id, user_learning_circle.values_list("user_id", flat=True)
+        )
+
         serializer = LearningCircleMemberListSerializer(
-            user_learning_circle, many=True, context={"circle_id": circle_id}
+            user_learning_circle,
+            many=True,
+            context={"circle_id": circle_id, "member_karma": member_karma},
         )
 
         return CustomResponse(response=serializer.data).get_success_response()
@@ -0,0 +1,308 @@
+import json
+import time
+import uuid
+from typing import Callable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import Count
+
+from db.organization import District, OrgAffiliation, Organization, UserOrganizationLink
+from utils.bulk_import import (
+    BulkImporter,
+    Choices,
+    Lookup,
+    Required,
+    UniqueInDatabase,
+    UniqueInFile,
+    send_post_save,
+)
+from utils.karma_rank import get_redis_client
+from utils.types import OrganizationType
+from utils.utils import DateTimeUtils
+
+# Field that, together with the organization, identifies a row. Source rows whose
+# value already exists on the destination are deleted instead of moved.
+DEDUPE_FIELDS = {
+    UserOrganizationLink: "user_id",
+}
+
+
+class OrganizationMerge:
+    """
+    Moves everything that points at the source organization to the destination
+    and deletes the source.
+
+    plan() is the dry run: one grouped count per relation. run() moves rows in
+    batches of ORG_MERGE_BATCH_SIZE, each in its own short transaction, so no
+    table stays locked for the whole merge. A run that stops half way can be
+    started again and carries on with the rows still on the source. Progress and
+    throughput are kept in the cache while it runs.
+
+    enqueue() hands the merge to the run_organization_merges worker instead of
+    running it on the request.
+    """
+
+    QUEUE_KEY = "organization_merges"
+
+    def __init__(self, source: Organization, destination: Organization, batch_size: int = None) -> None:
+        self.source = source
+        # delete() clears source.pk, the progress stays under the original id
+        self.source_id = source.pk
+        self.destination = destination
+        self.batch_size = batch_size or settings.ORG_MERGE_BATCH_SIZE
+
+    @staticmethod
+    def get_relations() -> list[tuple[type[models.Model], models.Field]]:
+        """(model, foreign key) of every relation pointing at Organization"""
+        return [
+            (relation.related_model, relation.field)
+            for relation in Organization._meta.related_objects
+            if isinstance(relation, models.ManyToOneRel)
+        ]
+
+    @staticmethod
+    def key(source_id: str) -> str:
+        return f"organization_merge:{source_id}"
+
+    @classmethod
+    def get_progress(cls, source_id: str) -> dict | None:
+        return cache.get(cls.key(source_id))
+
+    @classmethod
+    def save_progress(cls, source_id: str, progress: dict) -> None:
+        cache.set(cls.key(source_id), progress, settings.ORG_MERGE_PROGRESS_TIMEOUT)
+
+    def enqueue(self) -> str:
+        """
+        Queues the merge and returns the id its progress is kept under.
+        """
+        self.save_progress(
+            self.source_id,
+            {
+                "source": self.source.code,
+                "destination": self.destination.code,
+                "queued_at": DateTimeUtils.get_current_utc_time().isoformat(),
+                "done": False,
+            },
+        )
+        get_redis_client().rpush(
+            self.QUEUE_KEY,
+            json.dumps({"source": self.source_id, "destination": self.destination.pk}),
+        )
+        return self.source_id
+
+    @classmethod
+    def next_merge(cls, timeout: int) -> "OrganizationMerge | None":
+        """
+        Waits up to timeout seconds for a queued merge, None if there is none.
+        Merges whose organizations no longer exist are skipped.
+        """
+        while item := get_redis_client().blpop([cls.QUEUE_KEY], timeout):
+            ids = json.loads(item[1])
+            organizations = Organization.objects.in_bulk([ids["source"], ids["destination"]])
+            if len(organizations) == 2:
+                return cls(organizations[ids["source"]], organizations[ids["destination"]])
+        return None
+
+    def get_conflicts(self, model, field, source_rows: models.QuerySet) -> models.QuerySet:
+        """
+        Source rows whose dedupe key already exists on the destination.
+        """
+        if not (dedupe_field := DEDUPE_FIELDS.get(model)):
+            return model.objects.none()
+
+        destination_values = model.objects.filter(
+            **{field.attname: self.destination.pk}
+        ).values_list(dedupe_field)
+        return source_rows.filter(**{f"{dedupe_field}__in": destination_values})
+
+    def plan(self) -> list[dict]:
+        """
+        Describes what run() would do, without changing anything.
+        """
+        plan = []
+        for model, field in self.get_relations():
+            counts = dict(
+                model.objects.filter(
+                    **{f"{field.attname}__in": [self.source.pk, self.destination.pk]}
+                )
+                .values_list(field.attname)
+                .annotate(count=Count("pk"))
+                .order_by()
+            )
+            if not (count := counts.get(self.source.pk)):
+                continue
+
+            source_rows = model.objects.filter(**{field.attname: self.source.pk})
+            plan.append(
+                {
+                    "model": model._meta.model_name,
+                    "field_name": field.name,
+                    "count": count,
+                    "action": "delete" if field.one_to_one else "update",
+                    "destination_count": counts.get(self.destination.pk, 0),
+                    "duplicates": (
+                        self.get_conflicts(model, field, source_rows).count()
+                        if model in DEDUPE_FIELDS
+                        else 0
+                    ),
+                }
+            )
+        return plan
+
+    def run(self, on_progress: Callable[[dict], None] = None) -> dict:
+        """
+        Merges the source into the destination and returns the final progress.
+        """
+        started = time.perf_counter()
+        progress = {
+            "source": self.source.code,
+            "destination": self.destination.code,
+            "started_at": DateTimeUtils.get_current_utc_time().isoformat(),
+            "moved": 0,
+            "deduplicated": 0,
+            "relations": {},
+            "done": False,
+        }
+
+        def report():
+            elapsed = time.perf_counter() - started
+            rows = progress["moved"] + progress["deduplicated"]
+            progress["rows_per_second"] = round(rows / elapsed, 1) if elapsed else None
+            self.save_progress(self.source_id, progress)
+            if on_progress:
+                on_progress(progress)
+
+        for model, field in self.get_relations():
+            name = model._meta.model_name
+            progress["relations"][name] = {"moved": 0, "deduplicated": 0}
+
+            if field.one_to_one:
+                moved = self.move_one_to_one(model, field)
+                progress["relations"][name]["moved"] += moved
+                progress["moved"] += moved
+            else:
+                while moved := self.move_batch(model, field):
+                    moved_count, deduplicated = moved
+                    progress["relations"][name]["moved"] += moved_count
+                    progress["relations"][name]["deduplicated"] += deduplicated
+                    progress["moved"] += moved_count
+                    progress["deduplicated"] += deduplicated
+                    report()
+
+        with transaction.atomic():
+            self.source.delete()
+
+        progress["done"] = True
+        report()
+        return progress
+
+    def move_batch(self, model, field) -> tuple[int, int] | None:
+        """
+        Moves one batch of rows, dropping the ones the destination already has.
+        Returns (moved, deduplicated) or None once nothing is left on the source.
+        """
+        with transaction.atomic():
+            batch = list(
+                model.objects.select_for_update()
+                .filter(**{field.attname: self.source.pk})
+                .values_list("pk", flat=True)[: self.batch_size]
+            )
+            if not batch:
+                return None
+
+            rows = model.objects.filter(pk__in=batch)
+            duplicates = set(
+                self.get_conflicts(model, field, rows).values_list("pk", flat=True)
+            )
+            if duplicates:
+                model.objects.filter(pk__in=duplicates).delete()
+
+            moved = model.objects.filter(pk__in=set(batch) - duplicates).update(
+                **{field.attname: self.destination.pk}
+            )
+        return moved, len(duplicates)
+
+    def move_one_to_one(self, model, field) -> int:
+        """
+        The source's row replaces the destination's, as before.
+        """
+        with transaction.atomic():
+            if not model.objects.filter(**{field.attname: self.source.pk}).exists():
+                return 0
+            model.objects.filter(**{field.attname: self.destination.pk}).delete()
+            return model.objects.filter(**{field.attname: self.source.pk}).update(
+                **{field.attname: self.destination.pk}
+            )
+
+
+class OrganizationImporter(BulkImporter):
+    model = Organization
+    headers = ["title", "code", "org_type", "affiliation", "district"]
+
+    def get_stages(self):
+        return [
+            Required("title", "Missing title."),
+            UniqueInFile("title", "Duplicate title in excel: {title}"),
+            UniqueInDatabase(
+                "title",
+                Organization.objects.all(),
+                "title",
+                "Duplicate title in database: {title}",
+            ),
+            Required("code", "Missing code."),
+            UniqueInFile("code", "Duplicate code in excel: {code}"),
+            UniqueInDatabase(
+                "code",
+                Organization.objects.all(),
+                "code",
+                "Duplicate code in database: {code}",
+            ),
+            Lookup(
+                "affiliation",
+                OrgAffiliation.objects.all(),
+                "title",
+                "affiliation_id",
+                "Invalid affiliation: {affiliation}",
+                required=False,
+            ),
+            Lookup(
+                "district",
+                District.objects.all(),
+                "name",
+                "district_id",
+                "Invalid district: {district}",
+            ),
+            Choices(
+                "org_type",
+                OrganizationType.get_all_values(),
+                "Invalid org_type: {org_type}",
+            ),
+        ]
+
+    def build(self, row):
+        return Organization(
+            id=str(uuid.uuid4()),
+            title=row["title"],
+            code=row["code"],
+            org_type=row["org_type"],
+            affiliation_id=row["affiliation_id"],
+            district_id=row["district_id"],
+            created_by_id=self.actor_id,
+            updated_by_id=self.actor_id,
+        )
+
+    def saved(self, organizations, rows):
+        # keeps the landing page organization counts current
+        send_post_save(Organization, organizations)
+
+    def describe(self, organization, row):
+        return {
+            "title": organization.title,
+            "code": organization.code,
+            "org_type": organization.org_type,
+            "affiliation": row["affiliation"] if organization.affiliation_id else None,
+            "district": row["district"],
+        }
@@ -1,4 +1,3 @@
-import uuid
 from io import BytesIO
 from tempfile import NamedTemporaryFile
 
@@ -18,7 +17,8 @@ from db.user import User
 from utils.permission import CustomizePermission, JWTUtils, role_required
 from utils.response import CustomResponse
 from utils.types import OrganizationType, RoleType, WebHookActions, WebHookCategory
-from utils.utils import CommonUtils, DiscordWebhooks, ImportCSV
+from utils.utils import CommonUtils, DiscordWebhooks
+from .organisation_helper import OrganizationImporter, OrganizationMerge
 from .serializers import (
     AffiliationCreateUpdateSerializer,
     AffiliationSerializer,
@@ -29,7 +29,6 @@ from .serializers import (
     OrganizationMergerSerializer,
     OrganizationKarmaTypeGetPostPatchDeleteSerializer,
     OrganizationKarmaLogGetPostPatchDeleteSerializer,
-    OrganizationImportSerializer,
 )
 
 
@@ -473,7 +472,8 @@ class OrganizationMergerView(APIView):
             serializer.save()
 
             return CustomResponse(
-                general_message=f"Organizations merged successfully into {destination.title}."
+                general_message=f"Merging organizations into {destination.title} started.",
+                response={"mergeId": serializer.merge_id},
             ).get_success_response()
 
         except Organization.DoesNotExist:
@@ -562,146 +562,18 @@ class OrganisationImportAPI(APIView):
                 general_message="File not found."
             ).get_failure_response()
 
-        excel_data = ImportCSV()
-        excel_data = excel_data.read_excel_file(file_obj)
-
-        if not excel_data:
-            return CustomResponse(
-                general_message="Empty csv file."
-            ).get_failure_response()
-
-        temp_headers = ["title", "code", "org_type", "affiliation", "district"]
-        first_entry = excel_data[0]
-        for key in temp_headers:
-            if key not in first_entry:
-                return CustomResponse(
-                    general_message=f"{key} does not exist in the file."
-                ).get_failure_response()
-
-        excel_data = [row for row in excel_data if any(row.values())]
-        valid_rows = []
-        error_rows = []
-
-        title_excel = set()
-        code_excel = set()
-        title_db = Organization.objects.values_list("title", flat=True)
-        code_db = Organization.objects.values_list("code", flat=True)
-
-        affiliations_to_fetch = set()
-        districts_to_fetch = set()
-
-        for row in excel_data[1:]:
-            title = row.get("title")
-            if not title:
-                row["error"] = "Missing title."
-                error_rows.append(row)
-                excel_data.remove(row)
-                continue
-            elif title in title_excel:
-                row["error"] = f"Duplicate title in excel: {title}"
-                error_rows.append(row)
-                excel_data.remove(row)
-                continue
-            elif title in title_db:
-                row["error"] = f"Duplicate title in database: {title}"
-                error_rows.append(row)
-                excel_data.remove(row)
-                continue
-            else:
-                title_excel.add(title)
-
-            code = row.get("code")
-            if not code:
-                row["error"] = "Missing code."
-                error_rows.append(row)
-                excel_data.remove(row)
-                continue
-            elif code in code_excel:
-                row["error"] = f"Duplicate code in excel: {code}"
-                error_rows.append(row)
-                excel_data.remove(row)
-                continue
-            elif code in code_db:
-                row["error"] = f"Duplicate code in database: {code}"
-                error_rows.append(row)
-                excel_data.remove(row)
-                continue
-            else:
-                code_excel.add(code)
-
-            affiliation = row.get("affiliation")
-            district = row.get("district")
-
-            affiliations_to_fetch.add(affiliation)
-            districts_to_fetch.add(district)
-
-        affiliations = OrgAffiliation.objects.filter(
-            title__in=affiliations_to_fetch
-        ).values("id", "title")
-
-        districts = District.objects.filter(name__in=districts_to_fetch).values(
-            "id", "name"
-        )
-
-        affiliations_dict = {
-            affiliation["title"]: affiliation["id"] for affiliation in affiliations
-        }
-        districts_dict = {district["name"]: district["id"] for district in districts}
-        org_types = OrganizationType.get_all_values()
-
-        for row in excel_data[1:]:
-            affiliation = row.pop("affiliation")
-            district = row.pop("district")
-
-            affiliation_id = (
-                affiliations_dict.get(affiliation) if affiliation is not None else None
-            )
-            district_id = districts_dict.get(district)
-            org_type = row.get("org_type")
-
-            if affiliation and not affiliation_id:
-                row["error"] = f"Invalid affiliation: {affiliation}"
-                error_rows.append(row)
-            elif not district_id:
-                row["error"] = f"Invalid district: {district}"
-                error_rows.append(row)
-            elif org_type not in org_types:
-                row["error"] = f"Invalid org_type: {org_type}"
-                error_rows.append(row)
-            else:
-                user_id = JWTUtils.fetch_user_id(request)
-                row["id"] = str(uuid.uuid4())
-                row["updated_by_id"] = user_id
-                row["created_by_id"] = user_id
-                row["affiliation_id"] = affiliation_id
-                row["district_id"] = district_id
-                valid_rows.append(row)
-
-        organization_list_serializer = OrganizationImportSerializer(
-            data=valid_rows, many=True
-        )
-        success_data = []
-        if organization_list_serializer.is_valid():
-            organization_list_serializer.save()
-            for organization_data in organization_list_serializer.data:
-                success_data.append(
-                    {
-                        "title": organization_data.get("title", ""),
-                        "code": organization_data.get("code", ""),
-                        "org_type": organization_data.get("org_type", ""),
-                        "affiliation": organization_data.get("affiliation_id", ""),
-                        "district": organization_data.get("district_id", ""),
-                    }
-                )
-        else:
-            error_rows.append(organization_list_serializer.errors)
+        try:
+            report = OrganizationImporter(JWTUtils.fetch_user_id(request)).run(file_obj)
+        except ValueError as e:
+            return CustomResponse(general_message=str(e)).get_failure_response()
 
-        return CustomResponse(
-            response={"Success": success_data, "Failed": error_rows}
-        ).get_success_response()
+        return CustomResponse(response=report.get_response()).get_success_response()
 
 
 class TransferAPI(APIView):
+    authentication_classes = [CustomizePermission]
+
+    @role_required([RoleType.ADMIN.value])
     def post(self, request):
         from_code = request.data.get("from_id")
         to_code = request.data.get("to_id")
@@ -713,9 +585,19 @@ class TransferAPI(APIView):
             return CustomResponse(
                 response={"To Organisations not present"}
             ).get_failure_response()
-        
-        UserOrganizationLink.objects.filter(org=from_org).update(org=to_org)
-        from_org.delete()
+        if from_org == to_org:
+            return CustomResponse(
+                general_message="You can't merge an organization into itself."
+            ).get_failure_response()
+
+        merge_id = OrganizationMerge(from_org, to_org).enqueue()
         return CustomResponse(
-                response={"Organisations transferred successfully"}
-            ).get_success_response()
+            general_message="Organisation transfer started",
+            response={"mergeId": merge_id},
+        ).get_success_response()
+
+    @role_required([RoleType.ADMIN.value])
+    def get(self, request, merge_id):
+        if (progress := OrganizationMerge.get_progress(merge_id)) is None:
+            return CustomResponse(general_message="Invalid merge id").get_failure_response()
+        return CustomResponse(response=progress).get_success_response()
@@ -1,7 +1,5 @@
 import uuid
 
-from django.db import models
-from django.db import transaction
 from django.db.models import Count
 from rest_framework import serializers
 
@@ -17,6 +15,7 @@ from db.organization import (
     College
 )
 from utils.permission import JWTUtils
+from .organisation_helper import OrganizationMerge
 from utils.types import OrganizationType
 
 
@@ -269,102 +268,11 @@ class OrganizationMergerSerializer(serializers.Serializer):
         return super().validate(attrs)
 
     def get_update_summary(self, instance):
-        update_summary = []
-
-        # Simulate the transaction
-        for relation in Organization._meta.related_objects:
-            if isinstance(
-                    relation,
-                    (models.ForeignKey, models.OneToOneField, models.ManyToManyField),
-            ):
-                related_model = relation.related_model
-                related_field_name = relation.field.name
-            elif isinstance(relation, (models.ManyToOneRel, models.ManyToManyRel)):
-                related_model = relation.related_model
-                related_field_name = next(
-                    (
-                        field.name
-                        for field in related_model._meta.fields
-                        if isinstance(field, models.ForeignKey)
-                           and field.related_model == Organization
-                    ),
-                    None,
-                )
-            else:
-                continue
-
-            if not related_field_name:
-                continue
-
-            if existing_relations := related_model.objects.filter(
-                    **{related_field_name: instance}
-            ):
-                update_summary.append(
-                    {
-                        "model": related_model._meta.model_name,
-                        "field_name": related_field_name,
-                        "count": existing_relations.count(),
-                        "action": (
-                            "delete"
-                            if isinstance(
-                                relation, (models.OneToOneField, models.OneToOneRel)
-                            )
-                            else "update"
-                        ),
-                        "instance_ids": list(
-                            existing_relations.values_list("pk", flat=True)
-                        ),
-                    }
-                )
-
-        return update_summary
+        return OrganizationMerge(self.validated_data["source_org"], instance).plan()
 
     def update(self, instance, validated_data):
-        with transaction.atomic():
-            source_org = validated_data["source_org"]
-
-            for relation in Organization._meta.related_objects:
-                # Determine related model and related field name
-                if isinstance(
-                        relation,
-                        (models.ForeignKey, models.OneToOneField, models.ManyToManyField),
-                ):
-                    related_model = relation.related_model
-                    related_field_name = relation.field.name
-                elif isinstance(relation, (models.ManyToOneRel, models.ManyToManyRel)):
-                    related_model = relation.related_model
-                    # Find the related field in the related model that links back to Organization
-                    related_field_name = next(
-                        (
-                            field.name
-                            for field in related_model._meta.fields
-                            if isinstance(field, models.ForeignKey)
-                               and field.related_model == Organization
-                        ),
-                        None,
-                    )
-
-                # Skip if we couldn't determine the related field
-                if not related_field_name:
-                    continue
-
-                # Prepare filter and update arguments
-                filter_kwargs = {related_field_name: source_org}
-                update_kwargs = {related_field_name: instance}
-
-                # Handle OneToOne relationships: delete existing relation if it points to the instance
-                if isinstance(relation, (models.OneToOneField, models.OneToOneRel)):
-                    if existing_relation := related_model.objects.filter(
-                            **{related_field_name: instance}
-                    ).first():
-                        existing_relation.delete()
-
-                # Update the relations in the related model
-                related_model.objects.filter(**filter_kwargs).update(**update_kwargs)
-
-            # Delete the organization that needs to be removed
-            source_org.delete()
-
+        # queued for the run_organization_merges worker, polled by merge id
+        self.merge_id = OrganizationMerge(validated_data["source_org"], instance).enqueue()
         return instance
 
 
@@ -400,31 +308,3 @@ class OrganizationKarmaLogGetPostPatchDeleteSerializer(serializers.ModelSerializ
         validated_data["created_by_id"] = user_id
 
         return OrgKarmaLog.objects.create(**validated_data)
-
-
-class OrganizationImportSerializer(serializers.ModelSerializer):
-    created_by_id = serializers.CharField(required=True, allow_null=False)
-    updated_by_id = serializers.CharField(required=True, allow_null=False)
-    affiliation_id = serializers.CharField(required=False, allow_null=True)
-    district_id = serializers.CharField(required=False, allow_null=True)
-
-    class Meta:
-        model = Organization
-        fields = [
-            "id",
-            "title",
-            "code",
-            "org_type",
-            "affiliation_id",
-            "district_id",
-            "created_by_id",
-            "updated_by_id",
-        ]
-
-    def to_representation(self, instance):
-        representation = super().to_representation(instance)
-
-        representation['affiliation_id'] = instance.affiliation.title if instance.affiliation else None
-        representation['district_id'] = instance.district.name if instance.district else None
-
-        return representation
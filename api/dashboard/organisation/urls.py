@@ -27,4 +27,5 @@ urlpatterns = [
     path('base-template/', organisation_views.OrganisationBaseTemplateAPI.as_view()),
     path('import/', organisation_views.OrganisationImportAPI.as_view()),
     path('transfer/', organisation_views.TransferAPI.as_view()),
+    path('transfer/<str:merge_id>/', organisation_views.TransferAPI.as_view()),
 ]
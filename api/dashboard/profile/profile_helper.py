@@ -0,0 +1,266 @@
+import os
+from functools import cached_property, lru_cache
+from io import BytesIO
+
+import qrcode
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F, Prefetch, Sum, prefetch_related_objects
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from PIL import Image
+
+from db.organization import UserOrganizationLink
+from db.task import KarmaActivityLog, UserIgLink
+from db.user import UserRoleLink
+from utils.karma_award import karma_awarded
+
+
+class TaskCompletionSet:
+    """
+    Ids of the tasks a user has approved karma for, read in one query and shared
+    by every level of the profile levels tab.
+
+    The set is cached for TASK_COMPLETION_CACHE_TIMEOUT seconds and dropped
+    once a save or delete of one of the user's karma logs commits.
+    """
+
+    @staticmethod
+    def key(user_id: str) -> str:
+        return f"task_completion:{user_id}"
+
+    @staticmethod
+    def load(user_id: str) -> set[str]:
+        return set(
+            KarmaActivityLog.objects.filter(
+                user_id=user_id, appraiser_approved=True
+            ).values_list("task_id", flat=True)
+        )
+
+    @classmethod
+    def get(cls, user_id: str) -> set[str]:
+        if not settings.TASK_COMPLETION_CACHE_TIMEOUT:
+            return cls.load(user_id)
+
+        if (task_ids := cache.get(cls.key(user_id))) is None:
+            task_ids = cls.load(user_id)
+            cache.set(cls.key(user_id), task_ids, settings.TASK_COMPLETION_CACHE_TIMEOUT)
+        return task_ids
+
+    @classmethod
+    def invalidate(cls, user_id: str) -> None:
+        cache.delete(cls.key(user_id))
+
+
+class ProfileDataLoader:
+    """
+    Loads the related data of a profile in a fixed number of batched queries and
+    memoizes it, so serializer methods sharing data (roles, org links, interest
+    groups) no longer re-query it for every field.
+
+    Loaders are kept in the serializer context, one per user, so they live exactly
+    as long as the serializer instance that asked for them.
+    """
+
+    CONTEXT_KEY = "profile_loaders"
+
+    def __init__(self, user_id: str, user=None) -> None:
+        self.user_id = user_id
+        self.user = user
+
+    @classmethod
+    def for_serializer(cls, serializer, user=None, user_id: str = None) -> "ProfileDataLoader":
+        user_id = user_id or user.id
+        loaders = serializer.context.setdefault(cls.CONTEXT_KEY, {})
+        if user_id not in loaders:
+            loaders[user_id] = cls(user_id, user)
+        return loaders[user_id]
+
+    @cached_property
+    def roles(self) -> list[str]:
+        """verified role titles"""
+        return list(
+            set(
+                UserRoleLink.objects.filter(
+                    user_id=self.user_id, verified=True
+                ).values_list("role__title", flat=True)
+            )
+        )
+
+    @cached_property
+    def org_links(self) -> list[UserOrganizationLink]:
+        prefetch_related_objects(
+            [self.user],
+            Prefetch(
+                "user_organization_link_user",
+                queryset=UserOrganizationLink.objects.select_related(
+                    "org", "department"
+                ),
+            ),
+        )
+        return list(self.user.user_organization_link_user.all())
+
+    def get_org_link(self, org_type: str) -> UserOrganizationLink | None:
+        return next(
+            (link for link in self.org_links if link.org.org_type == org_type), None
+        )
+
+    @cached_property
+    def karma_distribution(self) -> list[dict]:
+        return list(
+            KarmaActivityLog.objects.filter(
+                user_id=self.user_id, appraiser_approved=True
+            )
+            .values(task_type=F("task__type__title"))
+            .annotate(karma=Sum("karma"))
+            .order_by()
+        )
+
+    @cached_property
+    def ig_links(self) -> list[dict]:
+        return list(
+            UserIgLink.objects.filter(user_id=self.user_id).values(
+                "ig_id", name=F("ig__name")
+            )
+        )
+
+    @property
+    def ig_ids(self) -> set[str]:
+        return {link["ig_id"] for link in self.ig_links}
+
+    @property
+    def ig_names(self) -> list[str]:
+        return [link["name"] for link in self.ig_links]
+
+    @cached_property
+    def interest_groups(self) -> list[dict]:
+        """
+        The user's interest groups with the approved karma earned in each.
+        """
+        ig_karma = dict(
+            KarmaActivityLog.objects.filter(
+                user_id=self.user_id,
+                appraiser_approved=True,
+                task__ig_id__in=self.ig_ids,
+            )
+            .values_list("task__ig_id")
+            .annotate(karma=Sum("karma"))
+            .order_by()
+        )
+        return [
+            {
+                "id": link["ig_id"],
+                "name": link["name"],
+                "karma": ig_karma.get(link["ig_id"], 0),
+            }
+            for link in self.ig_links
+        ]
+
+    @cached_property
+    def completed_task_ids(self) -> set[str]:
+        """ids of the tasks the user has approved karma for"""
+        return TaskCompletionSet.get(self.user_id)
+
+
+@lru_cache(maxsize=1)
+def load_qr_logo() -> Image.Image | None:
+    """reads and resizes the QR logo once per process, None when there is no logo"""
+    if not settings.PROFILE_QR_LOGO:
+        return None
+    if not os.path.exists(settings.PROFILE_QR_LOGO):
+        raise ImproperlyConfigured(
+            f"PROFILE_QR_LOGO is set to {settings.PROFILE_QR_LOGO}, which does not exist"
+        )
+
+    with Image.open(settings.PROFILE_QR_LOGO) as logo:
+        width = ProfileQrCode.LOGO_WIDTH
+        height = int(logo.size[1] * width / logo.size[0])
+        return logo.convert("RGBA").resize((width, height))
+
+
+class ProfileQrCode:
+    """
+    QR code linking to a user's public profile.
+
+    The PNG is cached for PROFILE_QR_CACHE_TIMEOUT seconds together with the URL
+    and the VERSION it was drawn for, and is only drawn again, and written to
+    user/qr/{user_id}.png, when one of them changes.
+    """
+
+    # bump when the drawing changes so cached codes are redrawn
+    VERSION = 1
+    LOGO_WIDTH = 100
+
+    def __init__(self, user_id: str) -> None:
+        self.user_id = user_id
+
+    @staticmethod
+    def key(user_id: str) -> str:
+        return f"profile_qr:{user_id}"
+
+    @property
+    def path(self) -> str:
+        return f"user/qr/{self.user_id}.png"
+
+    @property
+    def url(self) -> str:
+        return f"{settings.FR_DOMAIN_NAME}/profile/{self.user_id}"
+
+    def draw(self) -> bytes:
+        qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_H)
+        qr.add_data(self.url)
+        image = qr.make_image(fill_color="black", back_color="white").convert("RGB")
+
+        if logo := load_qr_logo():
+            position = (
+                (image.size[0] - logo.size[0]) // 2,
+                (image.size[1] - logo.size[1]) // 2,
+            )
+            image.paste(logo, position, logo)
+
+        image_io = BytesIO()
+        image.save(image_io, format="PNG")
+        return image_io.getvalue()
+
+    def get(self) -> bytes:
+        """
+        Returns the PNG, drawing and saving it only when the cached one is stale.
+        A cached PNG whose file has gone missing is saved again.
+        """
+        fs = FileSystemStorage()
+        cached = cache.get(self.key(self.user_id))
+        if cached and cached["url"] == self.url and cached["version"] == self.VERSION:
+            if not fs.exists(self.path):
+                fs.save(self.path, ContentFile(cached["png"]))
+            return cached["png"]
+
+        png = self.draw()
+        fs.exists(self.path) and fs.delete(self.path)
+        fs.save(self.path, ContentFile(png))
+
+        cache.set(
+            self.key(self.user_id),
+            {"url": self.url, "version": self.VERSION, "png": png},
+            settings.PROFILE_QR_CACHE_TIMEOUT,
+        )
+        return png
+
+
+@receiver(post_save, sender=KarmaActivityLog)
+@receiver(post_delete, sender=KarmaActivityLog)
+def invalidate_task_completion(sender, instance, *args, **kwargs):
+    if not (user_id := instance.user_id):
+        return
+
+    # after commit, so a concurrent read cannot cache the set from before the write
+    transaction.on_commit(lambda: TaskCompletionSet.invalidate(user_id))
+
+
+@receiver(karma_awarded)
+def invalidate_task_completion_for_award(sender, user_ids, **kwargs):
+    for user_id in user_ids:
+        TaskCompletionSet.invalidate(user_id)
@@ -2,7 +2,7 @@ import uuid
 
 from decouple import config as decouple_config
 from django.db import transaction
-from django.db.models import F, Sum, Q
+from django.db.models import F
 from rest_framework import serializers
 from rest_framework.serializers import ModelSerializer
 
@@ -10,9 +10,12 @@ from db.organization import UserOrganizationLink, District
 from db.task import InterestGroup, KarmaActivityLog, Level, TaskList, Wallet, UserIgLink, UserLvlLink
 from db.user import User, UserSettings, Socials
 from utils.exception import CustomException
+from utils.karma_award import award_karma
+from utils.karma_rank import KarmaRankIndex
 from utils.permission import JWTUtils
-from utils.types import OrganizationType, RoleType, MainRoles, WebHookActions, WebHookCategory
+from utils.types import OrganizationType, MainRoles, WebHookActions, WebHookCategory
 from utils.utils import DateTimeUtils, DiscordWebhooks
+from .profile_helper import ProfileDataLoader
 
 BE_DOMAIN_NAME = decouple_config('BE_DOMAIN_NAME')
 
@@ -71,99 +74,46 @@ class UserProfileSerializer(serializers.ModelSerializer):
         )
 
 
+    def get_loader(self, obj) -> ProfileDataLoader:
+        return ProfileDataLoader.for_serializer(self, user=obj)
+
     def get_percentile(self, obj):
-        users_count_lt_user_karma = Wallet.objects.filter(
-            karma__lt=obj.wallet_user.karma
-        ).count()
-        user_count = User.objects.all().count()
-        return 0 if user_count == 0 else 100 - ((users_count_lt_user_karma * 100) / user_count)
+        return KarmaRankIndex.get_percentile(obj.wallet_user.karma)
 
     def get_roles(self, obj):
-        return list({link.role.title for link in obj.user_role_link_user.filter(verified=True)})
+        return self.get_loader(obj).roles
 
-    def get_college_id(self, obj):
+    def get_profile_org_link(self, obj):
         org_type = (
             OrganizationType.COMPANY.value
             if MainRoles.MENTOR.value in self.get_roles(obj)
             else OrganizationType.COLLEGE.value
         )
-        user_org_link = obj.user_organization_link_user.filter(
-            org__org_type=org_type
-        ).first()
+        return self.get_loader(obj).get_org_link(org_type)
+
+    def get_college_id(self, obj):
+        user_org_link = self.get_profile_org_link(obj)
         return user_org_link.org.id if user_org_link else None
 
     def get_org_district_id(self, obj):
-        org_type = OrganizationType.COMPANY.value if MainRoles.MENTOR.value in self.get_roles(
-            obj) else OrganizationType.COLLEGE.value
-        user_org_link = obj.user_organization_link_user.filter(
-            org__org_type=org_type).first()
-        return user_org_link.org.district.id if user_org_link and hasattr(user_org_link.org, 'district') else None
+        user_org_link = self.get_profile_org_link(obj)
+        return user_org_link.org.district_id if user_org_link else None
 
     def get_college_code(self, obj):
-        if user_org_link := obj.user_organization_link_user.filter(
-                org__org_type=OrganizationType.COLLEGE.value
-        ).first():
+        if user_org_link := self.get_loader(obj).get_org_link(
+                OrganizationType.COLLEGE.value
+        ):
             return user_org_link.org.code
         return None
 
     def get_rank(self, obj):
-
-        roles = self.get_roles(obj)
-        user_karma = obj.wallet_user.karma
-        if RoleType.MENTOR.value in roles:
-            ranks = Wallet.objects.filter(
-                user__user_role_link_user__verified=True,
-                user__user_role_link_user__role__title=RoleType.MENTOR.value,
-                karma__gte=user_karma,
-            ).order_by('-karma', '-updated_at', 'created_at')
-        elif RoleType.ENABLER.value in roles:
-            ranks = Wallet.objects.filter(
-                user__user_role_link_user__verified=True,
-                user__user_role_link_user__role__title=RoleType.ENABLER.value,
-                karma__gte=user_karma,
-            ).order_by('-karma', '-updated_at', 'created_at')
-        else:
-            ranks = (
-                Wallet.objects.filter(karma__gte=user_karma)
-                .exclude(
-                    Q(user__user_role_link_user__role__title__in=[
-                        RoleType.ENABLER.value, RoleType.MENTOR.value])
-                ).order_by('-karma')
-            )
-
-        for count, _rank in enumerate(ranks, start=1):
-            if obj == _rank.user:
-                return count
+        return KarmaRankIndex.get_rank(obj.wallet_user.karma, self.get_roles(obj))
 
     def get_karma_distribution(self, obj):
-        return (
-            KarmaActivityLog.objects.filter(user=obj, appraiser_approved=True)
-            .values(task_type=F("task__type__title"))
-            .annotate(karma=Sum("karma"))
-            .order_by()
-        )
+        return self.get_loader(obj).karma_distribution
 
     def get_interest_groups(self, obj):
-        interest_groups = []
-        for ig_link in UserIgLink.objects.filter(user=obj):
-            total_ig_karma = (
-                0
-                if KarmaActivityLog.objects.filter(
-                    task__ig=ig_link.ig, user=obj, appraiser_approved=True
-                )
-                   .aggregate(Sum("karma"))
-                   .get("karma__sum")
-                   is None
-                else KarmaActivityLog.objects.filter(
-                    task__ig=ig_link.ig, user=obj, appraiser_approved=True
-                )
-                   .aggregate(Sum("karma"))
-                   .get("karma__sum")
-            )
-            interest_groups.append(
-                {"id": ig_link.ig.id, "name": ig_link.ig.name, "karma": total_ig_karma}
-            )
-        return interest_groups
+        return self.get_loader(obj).interest_groups
 
 
 class UserLevelSerializer(serializers.ModelSerializer):
@@ -174,18 +124,17 @@ class UserLevelSerializer(serializers.ModelSerializer):
         fields = ("name", "tasks", "karma")
 
     def get_tasks(self, obj):
-        user_id = self.context.get("user_id")
-        user_igs = UserIgLink.objects.filter(
-            user__id=user_id).values_list("ig__name", flat=True)
-        tasks = TaskList.objects.filter(level=obj)
+        loader = ProfileDataLoader.for_serializer(
+            self, user_id=self.context.get("user_id")
+        )
+        tasks = obj.tasklist_set.all()
 
         if obj.level_order > 4:
-            tasks = tasks.filter(ig__name__in=user_igs)
+            tasks = [task for task in tasks if task.ig_id in loader.ig_ids]
 
         data = []
         for task in tasks:
-            completed = KarmaActivityLog.objects.filter(
-                user=user_id, task=task, appraiser_approved=True).exists()
+            completed = task.id in loader.completed_task_ids
             if task.active or completed:
                 data.append(
                     {
@@ -216,38 +165,15 @@ class UserRankSerializer(ModelSerializer):
         return ["Learner"] if len(roles) == 0 else roles
 
     def get_rank(self, obj):
-        roles = self.get_roles(obj)
-        user_karma = obj.wallet_user.karma
-        if RoleType.MENTOR.value in roles:
-            ranks = Wallet.objects.filter(
-                user__user_role_link_user__verified=True,
-                user__user_role_link_user__role__title=RoleType.MENTOR.value,
-                karma__gte=user_karma,
-            ).order_by('-karma', '-updated_at', 'created_at')
-        elif RoleType.ENABLER.value in roles:
-            ranks = Wallet.objects.filter(
-                user__user_role_link_user__verified=True,
-                user__user_role_link_user__role__title=RoleType.ENABLER.value,
-                karma__gte=user_karma,
-            ).order_by('-karma', '-updated_at', 'created_at')
-        else:
-            ranks = (
-                Wallet.objects.filter(karma__gte=user_karma)
-                .exclude(
-                    Q(user__user_role_link_user__role__title__in=[
-                        RoleType.ENABLER.value, RoleType.MENTOR.value])
-                ).order_by('-karma')
-            )
-
-        for count, _rank in enumerate(ranks, start=1):
-            if obj == _rank.user:
-                return count
+        return KarmaRankIndex.get_rank(
+            obj.wallet_user.karma, self.context.get("roles")
+        )
 
     def get_karma(self, obj):
         return total_karma.karma if (total_karma := obj.wallet_user) else None
 
     def get_interest_groups(self, obj):
-        return [ig_link.ig.name for ig_link in UserIgLink.objects.filter(user=obj)]
+        return ProfileDataLoader.for_serializer(self, user=obj).ig_names
 
 
 # is public true then pass the qrcode vice versa delete the image
@@ -392,12 +318,11 @@ class LinkSocials(ModelSerializer):
             task = TaskList.objects.filter(hashtag=task_hashtag).first()
             if task:
                 if karma_value > 0:
-                    karma_log = KarmaActivityLog.objects.create(
-                        task_id=task.id,
-                        karma=karma_value,
-                        user_id=user_id,
-                        updated_by_id=user_id,
-                        created_by_id=user_id,
+                    [karma_log] = award_karma(
+                        [user_id],
+                        task,
+                        karma_value,
+                        user_id,
                         peer_approved=True,
                         peer_approved_by_id=user_id,
                         appraiser_approved_by_id=user_id,
@@ -415,10 +340,13 @@ class LinkSocials(ModelSerializer):
                     KarmaActivityLog.objects.filter(
                         task_id=task.id, user_id=user_id
                     ).first().delete()
-                Wallet.objects.filter(user_id=user_id).update(
-                    karma=F("karma") + karma_value,
-                    updated_by_id=user_id
-                )
+                    Wallet.objects.filter(user_id=user_id).update(
+                        karma=F("karma") + karma_value,
+                        updated_by_id=user_id
+                    )
+                    transaction.on_commit(
+                        lambda: KarmaRankIndex.update_user(user_id)
+                    )
 
         for account, account_url in validated_data.items():
             old_account_url = getattr(instance, account)
@@ -1,24 +1,18 @@
-from io import BytesIO
-
-import qrcode
-import requests
-from django.conf import settings
 from django.contrib.auth.hashers import make_password
-from django.core.files.base import ContentFile
-from django.core.files.storage import FileSystemStorage
 from django.db.models import Prefetch
-from PIL import Image
+from django.http import HttpResponse
 from rest_framework.views import APIView
 
 from db.organization import UserOrganizationLink
 from db.task import InterestGroup, KarmaActivityLog, Level
-from db.user import Role, Socials, User, UserRoleLink, UserSettings
+from db.user import Socials, User, UserRoleLink, UserSettings
 from utils.permission import CustomizePermission, JWTUtils
 from utils.response import CustomResponse
 from utils.types import WebHookActions, WebHookCategory, TFPTasksHashtags
 from utils.utils import DiscordWebhooks
 
 from . import profile_serializer
+from .profile_helper import ProfileQrCode
 from .profile_serializer import LinkSocials
 from .profile_serializer import UserTermSerializer
 
@@ -104,18 +98,19 @@ class UserIgEditView(APIView):
 
 
 class UserProfileAPI(APIView):
+    # SQL queries a request may run once the karma rank index is built
+    query_budget = 6
+
     def get(self, request, muid=None):
-        user = User.objects.prefetch_related(
+        user = User.objects.select_related(
+            "wallet_user", "user_settings_user", "user_lvl_link_user__level"
+        ).prefetch_related(
             Prefetch(
                 "user_organization_link_user",
                 queryset=UserOrganizationLink.objects.all().select_related(
                     "org", "department"
                 ),
             ),
-            Prefetch(
-                "user_role_link_user__role",
-                queryset=Role.objects.all(),
-            ),
         ).get(muid=muid or JWTUtils.fetch_muid(request))
 
         if muid:
@@ -204,7 +199,6 @@ class ShareUserProfileAPI(APIView):
     # function for generating profile qr code
 
     def get(self, request, uuid=None):
-        fs = FileSystemStorage()
         if uuid is not None:
             user = User.objects.filter(id=uuid).first()
 
@@ -219,66 +213,14 @@ class ShareUserProfileAPI(APIView):
                 return CustomResponse(
                     general_message="Private Profile"
                 ).get_failure_response()
-            user_uuid = JWTUtils.fetch_user_id(request)
-            data = f"{settings.FR_DOMAIN_NAME}/profile/{user_uuid}"
-
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_H,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(data)
-            qr.make(fit=True)
-
-            img = qr.make_image(fill_color="black", back_color="white")
-
-            logo_url = (
-                f"{settings.FR_DOMAIN_NAME}/favicon.ico/"  # Replace with your logo URL
-            )
-            logo_response = requests.get(logo_url)
-
-            if logo_response.status_code == 200:
-                logo_image = Image.open(BytesIO(logo_response.content))
-            else:
-                return CustomResponse(
-                    general_message="Failed to download the logo from the URL"
-                ).get_failure_response()
 
-            logo_width, logo_height = logo_image.size
-            basewidth = 100
-            wpercent = basewidth / float(logo_width)
-            hsize = int((float(logo_height) * float(wpercent)))
-            resized_logo = logo_image.resize((basewidth, hsize))
-
-            QRcode = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_H)
-
-            QRcode.add_data(data)
-            QRcolor = "black"
-            QRimg = QRcode.make_image(fill_color=QRcolor, back_color="white").convert(
-                "RGB"
-            )
-
-            pos = (
-                (QRimg.size[0] - resized_logo.size[0]) // 2,
-                (QRimg.size[1] - resized_logo.size[1]) // 2,
-            )
-            # image = Image.open(BytesIO("image_response.content"))
-            QRimg.paste(resized_logo, pos)
-            image_io = BytesIO()
-            QRimg.save(image_io, format="PNG")
-            image_io.seek(0)
-            image_data: bytes = image_io.getvalue()
-            file_path = f"user/qr/{user_uuid}.png"
-            fs.exists(file_path) and fs.delete(file_path)
-            file = fs.save(file_path, ContentFile(image_io.read()))
-
-            return CustomResponse(
-                general_message="QR code image with logo saved locally"
-            ).get_success_response()
+            return HttpResponse(ProfileQrCode(user.id).get(), content_type="image/png")
 
 
 class UserLevelsAPI(APIView):
+    # SQL queries a request may run, whatever the number of levels and tasks
+    query_budget = 6
+
     def get(self, request, muid=None):
         if muid is not None:
             user = User.objects.filter(muid=muid).first()
@@ -300,7 +242,9 @@ class UserLevelsAPI(APIView):
             JWTUtils.is_jwt_authenticated(request)
             user_id = JWTUtils.fetch_user_id(request)
 
-        user_levels_link_query = Level.objects.all().order_by("level_order")
+        user_levels_link_query = Level.objects.prefetch_related(
+            "tasklist_set"
+        ).order_by("level_order")
         serializer = profile_serializer.UserLevelSerializer(
             user_levels_link_query, many=True, context={"user_id": user_id}
         )
@@ -309,13 +253,18 @@ class UserLevelsAPI(APIView):
 
 
 class UserRankAPI(APIView):
+    # SQL queries a request may run once the karma rank index is built
+    query_budget = 3
+
     def get(self, request, muid):
-        user = User.objects.filter(muid=muid).first()
+        user = User.objects.select_related("wallet_user").filter(muid=muid).first()
 
         if user is None:
             return CustomResponse(general_message="Invalid muid").get_failure_response()
 
-        roles = [role.role.title for role in UserRoleLink.objects.filter(user=user)]
+        roles = list(
+            UserRoleLink.objects.filter(user=user).values_list("role__title", flat=True)
+        )
 
         serializer = profile_serializer.UserRankSerializer(
             user, many=False, context={"roles": roles}
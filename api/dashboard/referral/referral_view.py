@@ -1,6 +1,8 @@
 import uuid
 
 from decouple import config
+from django.db import transaction
+from django.db.models import F
 from rest_framework.views import APIView
 
 from db.task import Wallet, MucoinInviteLog, MucoinActivityLog, TaskList
@@ -36,32 +38,31 @@ class Referral(APIView):
             send_template_mail(context=user_context, subject="AN INVITE TO INSPIRE✨", address=[
                                "user_referral.html"])
         elif RefferalType.MUCOIN.value == invite_type:
-            wallet = Wallet.objects.filter(user=user).first()
+            with transaction.atomic():
+                # the balance check and the debit are one UPDATE, so concurrent invites cannot overspend
+                if not Wallet.objects.filter(user=user, coin__gte=1).update(
+                    coin=F("coin") - 1, updated_at=DateTimeUtils.get_current_utc_time()
+                ):
+                    return CustomResponse(general_message="You Don't have enough mucoins").get_failure_response()
 
-            if wallet.coin >= 1:
                 invite_log = MucoinInviteLog.objects.create(id=uuid.uuid4(), user=user, email=receiver_email,
                                                             invite_code=uuid.uuid4(),
                                                             created_by=user,
                                                             created_at=DateTimeUtils.get_current_utc_time())
-                user_context = {
-                    "full_name": user.full_name,
-                    "email": receiver_email,
-                    "muid": user.muid,
-                    'invite_code': invite_log.invite_code,
-                }
-                send_template_mail(
-                    context=user_context, subject="AN INVITE TO Mucoin✨", address=["mucoin.html"])
                 task = TaskList.objects.filter(
                     title=TasksTypesHashtag.MUCOIN.value).first()
                 MucoinActivityLog.objects.create(id=uuid.uuid4(), user=user, coin=1, task=task, status='Debit',
                                                  updated_by=user, updated_at=DateTimeUtils.get_current_utc_time(),
                                                  created_by=user, created_at=DateTimeUtils.get_current_utc_time())
-                wallet = Wallet.objects.filter(user=user).first()
-                wallet.coin -= 1
-                wallet.save()
 
-            else:
-                return CustomResponse(general_message="You Don't have enough mucoins").get_failure_response()
+            user_context = {
+                "full_name": user.full_name,
+                "email": receiver_email,
+                "muid": user.muid,
+                'invite_code': invite_log.invite_code,
+            }
+            send_template_mail(
+                context=user_context, subject="AN INVITE TO Mucoin✨", address=["mucoin.html"])
         return CustomResponse(general_message="Invited successfully").get_success_response()
 
 
@@ -0,0 +1,73 @@
+import uuid
+
+from django.db import transaction
+
+from api.common.common_consumer import landing_stats
+from db.user import Role, User, UserRoleLink
+from utils.bulk_import import (
+    BulkImporter,
+    Lookup,
+    UniqueInDatabase,
+    UniqueInFile,
+)
+from utils.karma_rank import KarmaRankIndex
+
+
+class UserRoleImporter(BulkImporter):
+    model = UserRoleLink
+    headers = ["muid", "role"]
+
+    def __init__(self, actor_id):
+        super().__init__(actor_id)
+        # role title: ids of the users given the role, for the Discord webhook
+        self.users_by_role = {}
+
+    def get_stages(self):
+        return [
+            UniqueInFile(("muid", "role"), "Duplicate entry"),
+            Lookup(
+                "muid",
+                User.objects.all(),
+                "muid",
+                "user_id",
+                "Invalid user muid: {muid}",
+                extra=("full_name",),
+            ),
+            Lookup("role", Role.objects.all(), "title", "role_id", "Invalid role: {role}"),
+            UniqueInDatabase(
+                ("user_id", "role_id"),
+                UserRoleLink.objects.all(),
+                ("user_id", "role_id"),
+                "User {muid} already has role {role}",
+            ),
+        ]
+
+    def build(self, row):
+        return UserRoleLink(
+            id=str(uuid.uuid4()),
+            user_id=row["user_id"],
+            role_id=row["role_id"],
+            verified=True,
+            created_by_id=self.actor_id,
+        )
+
+    def saved(self, links, rows):
+        for row in rows:
+            self.users_by_role.setdefault(row["role"], []).append(row["user_id"])
+
+        # one rank index update and one landing stats delta per chunk, instead of
+        # replaying post_save for every link
+        ranked_user_ids = [
+            link.user_id for link in links if link.role_id in KarmaRankIndex.get_role_ids()
+        ]
+        role_ids = [link.role_id for link in links]
+
+        def apply():
+            if ranked_user_ids:
+                KarmaRankIndex.update_users(ranked_user_ids)
+            landing_stats.count_role_links(role_ids)
+
+        transaction.on_commit(apply)
+
+    def describe(self, link, row):
+        return {"user": row["full_name"], "role": row["role"]}
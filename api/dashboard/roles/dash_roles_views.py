@@ -1,4 +1,3 @@
-import uuid
 from django.db import IntegrityError
 from rest_framework.views import APIView
 
@@ -6,8 +5,9 @@ from db.user import Role, User, UserRoleLink
 from utils.permission import CustomizePermission, role_required, JWTUtils
 from utils.response import CustomResponse
 from utils.types import RoleType, WebHookActions, WebHookCategory
-from utils.utils import CommonUtils, DiscordWebhooks, ImportCSV
+from utils.utils import CommonUtils, DiscordWebhooks
 from . import dash_roles_serializer
+from .dash_roles_helper import UserRoleImporter
 
 from openpyxl import load_workbook
 from tempfile import NamedTemporaryFile
@@ -354,123 +354,18 @@ class UserRoleBulkAssignAPI(APIView):
                 general_message="File not found."
             ).get_failure_response()
 
-        excel_data = ImportCSV()
-        excel_data = excel_data.read_excel_file(file_obj)
-
-        if not excel_data:
-            return CustomResponse(
-                general_message="Empty csv file."
-            ).get_failure_response()
+        importer = UserRoleImporter(JWTUtils.fetch_user_id(request))
+        try:
+            report = importer.run(file_obj)
+        except ValueError as e:
+            return CustomResponse(general_message=str(e)).get_failure_response()
 
-        temp_headers = ["muid", "role"]
-        first_entry = excel_data[0]
-        for key in temp_headers:
-            if key not in first_entry:
-                return CustomResponse(
-                    general_message=f"{key} does not exist in the file."
-                ).get_failure_response()
-
-        excel_data = [row for row in excel_data if any(row.values())]
-        valid_rows = []
-        error_rows = []
-        users_to_fetch = set()
-        roles_to_fetch = set()
-        user_role_link_to_check = set()
-
-        for row in excel_data[1:]:
-            keys_to_keep = ["muid", "role"]
-            row_keys = list(row.keys())
-            # Remove columns other than "muid" and "role"
-            for key in row_keys:
-                if key not in keys_to_keep:
-                    del row[key]
-
-        for row in excel_data[1:]:
-            user = row.get("muid")
-            role = row.get("role")
-            users_to_fetch.add(user)
-            roles_to_fetch.add(role)
-            if (user, role) in user_role_link_to_check:
-                row["error"] = "Duplicate entry"
-                error_rows.append(row)
-                excel_data.remove(row)
-            else:
-                user_role_link_to_check.add((user, role))
-
-        users = User.objects.filter(muid__in=users_to_fetch).values(
-            "id",
-            "muid",
-        )
-        roles = Role.objects.filter(title__in=roles_to_fetch).values(
-            "id",
-            "title",
-        )
-        existing_user_role_links = list(
-            UserRoleLink.objects.filter(
-                user__muid__in=users_to_fetch, role__title__in=roles_to_fetch
-            ).values_list("user__muid", "role__title")
-        )
-        users_dict = {user["muid"]: user["id"] for user in users}
-        roles_dict = {role["title"]: role["id"] for role in roles}
-        users_by_role = {role_title: [] for role_title in roles_dict.keys()}
-
-        for row in excel_data[1:]:
-            user = row.pop("muid")
-            role = row.pop("role")
-
-            user_id = users_dict.get(user)
-            role_id = roles_dict.get(role)
-            if not user_id:
-                row["muid"] = user
-                row["role"] = role
-                row["error"] = f"Invalid user muid: {user}"
-                error_rows.append(row)
-            elif not role_id:
-                row["muid"] = user
-                row["role"] = role
-                row["error"] = f"Invalid role: {role}"
-                error_rows.append(row)
-            elif (user, role) in existing_user_role_links:
-                row["muid"] = user
-                row["role"] = role
-                row["error"] = f"User {user} already has role {role}"
-                error_rows.append(row)
-            else:
-                users_by_role[role].append(user_id)
-                request_user_id = JWTUtils.fetch_user_id(request)
-                row["id"] = str(uuid.uuid4())
-                row["user_id"] = user_id
-                row["role_id"] = role_id
-                row["verified"] = True
-                row["created_by_id"] = request_user_id
-                valid_rows.append(row)
-
-        users_by_role = {
-            role_title: users for role_title, users in users_by_role.items() if users
-        }
-        user_roles_serializer = dash_roles_serializer.UserRoleBulkAssignSerializer(
-            data=valid_rows, many=True
-        )
-        success_data = []
-        if user_roles_serializer.is_valid():
-            user_roles_serializer.save()
-            for user_role_data in user_roles_serializer.data:
-                success_data.append(
-                    {
-                        "user": user_role_data.get("user_id", ""),
-                        "role": user_role_data.get("role_id", ""),
-                    }
-                )
-            for role, user_set in users_by_role.items():
-                DiscordWebhooks.general_updates(
-                    WebHookCategory.BULK_ROLE.value,
-                    WebHookActions.UPDATE.value,
-                    role,
-                    ",".join(user_set),
-                )
-        else:
-            error_rows.append(user_roles_serializer.errors)
+        for role, user_ids in importer.users_by_role.items():
+            DiscordWebhooks.general_updates(
+                WebHookCategory.BULK_ROLE.value,
+                WebHookActions.UPDATE.value,
+                role,
+                ",".join(user_ids),
+            )
 
-        return CustomResponse(
-            response={"Success": success_data, "Failed": error_rows}
-        ).get_success_response()
+        return CustomResponse(response=report.get_response()).get_success_response()
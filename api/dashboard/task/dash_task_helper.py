@@ -0,0 +1,124 @@
+import uuid
+
+from rest_framework.fields import BooleanField
+
+from db.organization import Organization
+from db.task import Channel, InterestGroup, Level, TaskList, TaskType
+from utils.bulk_import import (
+    BulkImporter,
+    Choices,
+    Lookup,
+    Required,
+    UniqueInDatabase,
+    UniqueInFile,
+)
+from utils.types import Events
+
+
+class TaskImporter(BulkImporter):
+    model = TaskList
+    headers = [
+        "hashtag",
+        "title",
+        "description",
+        "karma",
+        "usage_count",
+        "variable_karma",
+        "level",
+        "channel",
+        "type",
+        "ig",
+        "org",
+        "event",
+    ]
+
+    def get_stages(self):
+        return [
+            Required("hashtag", "Missing hashtag."),
+            UniqueInFile("hashtag", "Duplicate hashtag in excel: {hashtag}"),
+            UniqueInDatabase(
+                "hashtag",
+                TaskList.objects.all(),
+                "hashtag",
+                "Duplicate hashtag in database: {hashtag}",
+            ),
+            Required("title", "Missing title."),
+            Lookup(
+                "channel",
+                Channel.objects.all(),
+                "name",
+                "channel_id",
+                "Invalid channel: {channel}",
+                required=False,
+            ),
+            Lookup(
+                "type",
+                TaskType.objects.all(),
+                "title",
+                "type_id",
+                "Invalid task type: {type}",
+            ),
+            Lookup(
+                "level",
+                Level.objects.all(),
+                "name",
+                "level_id",
+                "Invalid level: {level}",
+                required=False,
+            ),
+            Lookup(
+                "ig",
+                InterestGroup.objects.all(),
+                "name",
+                "ig_id",
+                "Invalid interest group: {ig}",
+                required=False,
+            ),
+            Lookup(
+                "org",
+                Organization.objects.all(),
+                "code",
+                "org_id",
+                "Invalid organization: {org}",
+                required=False,
+            ),
+            Choices(
+                "event", Events.get_all_values(), "Invalid event: {event}", required=False
+            ),
+        ]
+
+    def build(self, row):
+        return TaskList(
+            id=str(uuid.uuid4()),
+            hashtag=row["hashtag"],
+            title=row["title"],
+            description=row["description"],
+            karma=row["karma"],
+            usage_count=1 if row["usage_count"] is None else row["usage_count"],
+            variable_karma=row["variable_karma"] in BooleanField.TRUE_VALUES,
+            channel_id=row["channel_id"],
+            type_id=row["type_id"],
+            level_id=row["level_id"],
+            ig_id=row["ig_id"],
+            org_id=row["org_id"],
+            event=row["event"],
+            active=True,
+            created_by_id=self.actor_id,
+            updated_by_id=self.actor_id,
+        )
+
+    def describe(self, task, row):
+        return {
+            "hashtag": task.hashtag,
+            "title": task.title,
+            "description": task.description,
+            "karma": task.karma,
+            "usage_count": task.usage_count,
+            "variable_karma": task.variable_karma,
+            "level": row["level"] if task.level_id else None,
+            "channel": row["channel"] if task.channel_id else None,
+            "type": row["type"],
+            "ig": row["ig"] if task.ig_id else None,
+            "org": row["org"] if task.org_id else None,
+            "event": task.event,
+        }
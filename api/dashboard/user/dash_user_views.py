@@ -1,21 +1,18 @@
 import uuid
 from datetime import timedelta
 
-from decouple import config as decouple_config
 from django.contrib.auth.hashers import make_password
-from django.core.files.storage import FileSystemStorage
 from django.db.models import Q
 from rest_framework.views import APIView
 
 from db.user import ForgotPassword, User, UserRoleLink
 from utils.permission import CustomizePermission, JWTUtils, role_required
+from utils.profile_pic import get_profile_pic_url, save_profile_pic
 from utils.response import CustomResponse
 from utils.types import RoleType, WebHookActions, WebHookCategory
 from utils.utils import CommonUtils, DateTimeUtils, DiscordWebhooks, send_template_mail
 from . import dash_user_serializer
 
-BE_DOMAIN_NAME = decouple_config("BE_DOMAIN_NAME")
-
 
 class UserInfoAPI(APIView):
     authentication_classes = [CustomizePermission]
@@ -357,15 +354,16 @@ class UserProfilePictureView(APIView):
                 general_message="Expected an image"
             ).get_failure_response()
 
-        extention = ".png"  # os.path.splitext(pic.name)[1]
-        fs = FileSystemStorage()
-        filename = f"user/profile/{user_id}{extention}"
-        if fs.exists(filename):
-            fs.delete(filename)
-        filename = fs.save(filename, pic)
-        file_url = fs.url(filename)
-        uploaded_file_url = f"{BE_DOMAIN_NAME}{file_url}"
+        try:
+            content_hash = save_profile_pic(pic)
+        except ValueError as e:
+            return CustomResponse(general_message=str(e)).get_failure_response()
+
+        User.objects.filter(id=user.id).update(profile_pic_hash=content_hash)
 
         return CustomResponse(
-            response={"user_id": user.id, "profile_pic": uploaded_file_url}
+            response={
+                "user_id": user.id,
+                "profile_pic": get_profile_pic_url(content_hash, "large"),
+            }
         ).get_success_response()
@@ -6,6 +6,7 @@ from rest_framework import serializers
 from db.organization import UserOrganizationLink, District
 from db.task import KarmaActivityLog, Level
 from db.user import User
+from utils.karma_rank import OrgRanking
 from utils.types import OrganizationType
 from utils.utils import DateTimeUtils
 
@@ -30,28 +31,7 @@ class ZonalDetailsSerializer(serializers.ModelSerializer):
         ]
 
     def get_rank(self, obj):
-        org_karma_dict = (
-            UserOrganizationLink.objects.filter(
-                org__org_type=OrganizationType.COLLEGE.value)
-            .values("org__district__zone")
-            .annotate(total_karma=Sum("user__wallet_user__karma"))
-        ).order_by("-total_karma", "org__created_at")
-
-        rank_dict = {
-            data["org__district__zone"]: data["total_karma"]
-            if data["total_karma"] is not None
-            else 0
-            for data in org_karma_dict
-        }
-
-        sorted_rank_dict = dict(
-            sorted(rank_dict.items(), key=lambda x: x[1], reverse=True)
-        )
-
-        if obj.org.district.zone.id in sorted_rank_dict:
-            keys_list = list(sorted_rank_dict.keys())
-            position = keys_list.index(obj.org.district.zone.id)
-            return position + 1
+        return OrgRanking(OrgRanking.ZONE).get_rank(obj.org.district.zone.id)
 
     def get_karma(self, obj):
         return UserOrganizationLink.objects.filter(
@@ -85,12 +65,10 @@ class ZonalTopThreeDistrictSerializer(serializers.ModelSerializer):
     karma = serializers.SerializerMethodField()
 
     def get_rank(self, district):
-        keys_list = list(self.context.get("ranks").keys())
-        position = keys_list.index(district.id)
-        return position + 1
+        return self.context.get("ranking").get_rank(district.id)
 
     def get_karma(self, district):
-        return self.context.get("ranks")[district.id]
+        return self.context.get("ranking").get_karma(district.id)
 
     class Meta:
         model = District
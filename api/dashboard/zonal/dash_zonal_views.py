@@ -1,11 +1,10 @@
-from itertools import islice
-
-from django.db.models import Case, CharField, F, Sum, When
+from django.db.models import Case, CharField, F, When
 from rest_framework.views import APIView
 
-from db.organization import District, Organization, UserOrganizationLink
-from db.task import Level, Wallet
+from db.organization import District, Organization
+from db.task import Level
 from db.user import User
+from utils.karma_rank import KarmaRankEngine, OrgRanking
 from utils.permission import CustomizePermission, JWTUtils, role_required
 from utils.response import CustomResponse
 from utils.types import OrganizationType, RoleType
@@ -37,33 +36,18 @@ class ZonalTopThreeDistrictAPI(APIView):
 
         user_org_link = dash_zonal_helper.get_user_college_link(user_id)
 
-        district_karma_dict = (
-            UserOrganizationLink.objects.filter(
-                org__org_type=OrganizationType.COLLEGE.value,
-                org__district__zone=user_org_link.org.district.zone,
-                verified=True,
-            )
-            .values("org__district")
-            .annotate(total_karma=Sum("user__wallet_user__karma"))
+        ranking = OrgRanking(
+            OrgRanking.DISTRICT, zone=user_org_link.org.district.zone
         )
+        top_districts = [district_id for district_id, _ in ranking.get_top(3)]
 
-        district_ranks = {
-            data["org__district"]: data["total_karma"]
-            if data["total_karma"] is not None
-            else 0
-            for data in district_karma_dict
-        }
-
-        district_ranks = dict(
-            sorted(district_ranks.items(), key=lambda x: x[1], reverse=True)
+        org_user_district = sorted(
+            District.objects.filter(id__in=top_districts),
+            key=lambda district: ranking.get_rank(district.id),
         )
 
-        top_districts = dict(islice(district_ranks.items(), 3))
-
-        org_user_district = District.objects.filter(id__in=top_districts).distinct()
-
         serializer = dash_zonal_serializer.ZonalTopThreeDistrictSerializer(
-            org_user_district, many=True, context={"ranks": district_ranks}
+            org_user_district, many=True, context={"ranking": ranking}
         )
 
         return CustomResponse(response=serializer.data).get_success_response()
@@ -96,20 +80,7 @@ class ZonalStudentDetailsAPI(APIView):
 
         user_org_link = dash_zonal_helper.get_user_college_link(user_id)
 
-        rank = (
-            Wallet.objects.filter(
-                user__user_organization_link_user__org__district__zone=user_org_link.org.district.zone,
-                user__user_organization_link_user__org__org_type=OrganizationType.COLLEGE.value,
-            )
-            .distinct()
-            .order_by("-karma", "-updated_at", "created_at")
-            .values(
-                "user_id",
-                "karma",
-            )
-        )
-
-        ranks = {user["user_id"]: i + 1 for i, user in enumerate(rank)}
+        rank_engine = KarmaRankEngine(zone=user_org_link.org.district.zone)
 
         user_org_links = (
             User.objects.filter(
@@ -137,7 +108,9 @@ class ZonalStudentDetailsAPI(APIView):
         )
 
         serializer = dash_zonal_serializer.ZonalStudentDetailsSerializer(
-            paginated_queryset.get("queryset"), many=True, context={"ranks": ranks}
+            paginated_queryset.get("queryset"),
+            many=True,
+            context={"ranks": rank_engine.get_page_ranks(paginated_queryset.get("queryset"))},
         )
 
         return CustomResponse(
@@ -157,20 +130,7 @@ class ZonalStudentDetailsCSVAPI(APIView):
 
         user_org_link = dash_zonal_helper.get_user_college_link(user_id)
 
-        rank = (
-            Wallet.objects.filter(
-                user__user_organization_link_user__org__district__zone=user_org_link.org.district.zone,
-                user__user_organization_link_user__org__org_type=OrganizationType.COLLEGE.value,
-            )
-            .distinct()
-            .order_by("-karma", "-updated_at", "created_at")
-            .values(
-                "user_id",
-                "karma",
-            )
-        )
-
-        ranks = {user["user_id"]: i + 1 for i, user in enumerate(rank)}
+        rank_engine = KarmaRankEngine(zone=user_org_link.org.district.zone)
 
         user_org_links = (
             User.objects.filter(
@@ -186,7 +146,7 @@ class ZonalStudentDetailsCSVAPI(APIView):
         )
 
         serializer = dash_zonal_serializer.ZonalStudentDetailsSerializer(
-            user_org_links, many=True, context={"ranks": ranks}
+            user_org_links, many=True, context={"ranks": rank_engine.get_ranks()}
         )
         return CommonUtils.generate_csv(serializer.data, "Zonal Student Details")
 
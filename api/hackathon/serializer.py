@@ -515,7 +515,7 @@ class HackathonOrganiserSerializerRetrieval(serializers.ModelSerializer):
     full_name = serializers.CharField(source="organiser.full_name")
     email = serializers.CharField(source="organiser.email")
     muid = serializers.CharField(source="organiser.muid")
-    profile_pic = serializers.CharField(source="organiser.profile_pic")
+    profile_pic = serializers.CharField(source="organiser.profile_pic_small", default=None)
 
     class Meta:
         model = HackathonOrganiserLink
@@ -1,5 +1,7 @@
 import json
 from base64 import urlsafe_b64decode
+from collections import defaultdict
+from datetime import datetime
 from urllib.parse import parse_qs
 
 import requests
@@ -7,11 +9,17 @@ from Crypto.Cipher import AES
 from Crypto.Hash import SHA256
 from Crypto.Protocol.KDF import PBKDF2
 from Crypto.Util.Padding import unpad
-
-from db.integrations import Integration
+from django.core import signing
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q, Sum
+from django.db.models.functions import Coalesce
+
+from db.integrations import Integration, IntegrationAuthorization
+from db.task import KarmaActivityLog, UserIgLink
+from db.user import User
 from utils.exception import CustomException
 from utils.types import IntegrationType
-from utils.utils import send_template_mail
+from utils.utils import DateTimeUtils, send_template_mail
 
 
 def send_data_to_kkem(kkem_link):
@@ -81,3 +89,155 @@ def send_connection_successful_email(user):
         subject="Integration Successfully Completed!",
         address=["KKEM", "integration_successful.html"],
     )
+
+
+class KKEMKarmaExport:
+    """
+    Karma export for verified KKEM users, aggregated in the database.
+
+    Users are read in batches ordered by id, and the karma per interest group of
+    each batch comes from a single GROUP BY user, ig query, so the whole partner
+    population is never loaded at once. A signed watermark issued with every
+    export lets the partner ask only for users whose karma or link changed since.
+    """
+
+    BATCH_SIZE = 500
+    WATERMARK_SALT = "kkem-karma-sync"
+
+    def __init__(self, since: datetime = None) -> None:
+        self.since = since
+        self.watermark = self.create_watermark(DateTimeUtils.get_current_utc_time())
+
+    @classmethod
+    def create_watermark(cls, synced_at: datetime) -> str:
+        return signing.dumps({"synced_at": synced_at.isoformat()}, salt=cls.WATERMARK_SALT)
+
+    @classmethod
+    def read_watermark(cls, watermark: str) -> datetime:
+        try:
+            payload = signing.loads(watermark, salt=cls.WATERMARK_SALT)
+            return datetime.fromisoformat(payload["synced_at"])
+        except (signing.BadSignature, KeyError, ValueError) as e:
+            raise CustomException("Invalid watermark") from e
+
+    def get_users(self):
+        users = User.objects.filter(
+            integration_authorization_user__integration__name=IntegrationType.KKEM.value,
+            integration_authorization_user__verified=True,
+        )
+
+        if self.since:
+            users = users.filter(
+                Q(
+                    id__in=KarmaActivityLog.objects.filter(
+                        updated_at__gte=self.since
+                    ).values("user_id")
+                )
+                | Q(
+                    id__in=IntegrationAuthorization.objects.filter(
+                        integration__name=IntegrationType.KKEM.value,
+                        updated_at__gte=self.since,
+                    ).values("user_id")
+                )
+                | Q(wallet_user__updated_at__gte=self.since)
+            )
+
+        return (
+            users.values("id", "muid", "email")
+            .annotate(
+                jsid=F("integration_authorization_user__integration_value"),
+                total_karma=Coalesce(F("wallet_user__karma"), 0),
+            )
+            .distinct()
+            .order_by("id")
+        )
+
+    def get_interest_groups(self, user_ids: list[str]) -> dict[str, dict[str, int]]:
+        """
+        Returns {user_id: {ig_name: karma}} for the joined interest groups of the users.
+        """
+        interest_groups = defaultdict(dict)
+        for user_id, ig_name in UserIgLink.objects.filter(
+            user_id__in=user_ids
+        ).values_list("user_id", "ig__name"):
+            interest_groups[user_id][ig_name] = 0
+
+        ig_karma = (
+            KarmaActivityLog.objects.filter(
+                user_id__in=user_ids,
+                appraiser_approved=True,
+                task__ig__isnull=False,
+            )
+            .values("user_id", "task__ig__name")
+            .annotate(karma=Sum("karma"))
+        )
+        for row in ig_karma:
+            if row["task__ig__name"] in interest_groups[row["user_id"]]:
+                interest_groups[row["user_id"]][row["task__ig__name"]] = row["karma"]
+
+        return interest_groups
+
+    def iter_batches(self, after: str = None, limit: int = None):
+        """
+        Yields lists of serialized users ordered by id, starting after the given id.
+        """
+        users = self.get_users()
+        if after:
+            users = users.filter(id__gt=after)
+
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = self.BATCH_SIZE if remaining is None else min(self.BATCH_SIZE, remaining)
+            batch = list(users[:size])
+            if not batch:
+                return
+
+            interest_groups = self.get_interest_groups([user["id"] for user in batch])
+            yield [
+                {
+                    "mu_id": user["muid"],
+                    "email": user["email"],
+                    "jsid": int(user["jsid"]) if user["jsid"] else None,
+                    "total_karma": user["total_karma"],
+                    "interest_groups": [
+                        {"name": name, "karma": karma}
+                        for name, karma in interest_groups[user["id"]].items()
+                    ],
+                    "_id": user["id"],
+                }
+                for user in batch
+            ]
+
+            users = users.filter(id__gt=batch[-1]["id"])
+            if remaining is not None:
+                remaining -= len(batch)
+            if len(batch) < size:
+                return
+
+    def iter_users(self, after: str = None, limit: int = None):
+        for batch in self.iter_batches(after, limit):
+            for user in batch:
+                user.pop("_id")
+                yield user
+
+    def get_page(self, cursor: str = None, per_page: int = BATCH_SIZE) -> dict:
+        """
+        Returns one page of users and the cursor of the next page.
+        """
+        users = [user for batch in self.iter_batches(cursor, per_page + 1) for user in batch]
+        has_next = len(users) > per_page
+        users = users[:per_page]
+        next_cursor = users[-1]["_id"] if has_next else None
+
+        for user in users:
+            user.pop("_id")
+
+        return {
+            "data": users,
+            "nextCursor": next_cursor,
+            "watermark": self.watermark,
+        }
+
+    def iter_ndjson(self):
+        for user in self.iter_users():
+            yield json.dumps(user, cls=DjangoJSONEncoder) + "\n"
@@ -2,12 +2,12 @@ import logging
 from datetime import datetime
 
 import requests
-from django.db.models import F, Prefetch
+from django.db.models import F
+from django.http import StreamingHttpResponse
 from rest_framework.views import APIView
 from db.hackathon import Hackathon
 
 from db.integrations import Integration, IntegrationAuthorization
-from db.task import InterestGroup, KarmaActivityLog, TaskList, UserIgLink
 from db.user import User
 from utils.exception import CustomException
 from utils.response import CustomResponse
@@ -22,52 +22,53 @@ from .kkem_serializer import KKEMAuthorization, KKEMUserSerializer
 class KKEMBulkKarmaAPI(APIView):
     @integrations_helper.token_required(IntegrationType.KKEM.value)
     def get(self, request):
-        base_queryset = (
-            User.objects.filter(
-                integration_authorization_user__integration__name=IntegrationType.KKEM.value,
-                integration_authorization_user__verified=True,
-            )
-            .distinct()
-            .annotate(jsid=F("integration_authorization_user__integration_value"))
-            .select_related("wallet_user")
-            .prefetch_related(
-                Prefetch(
-                    "user_ig_link_user",
-                    queryset=UserIgLink.objects.select_related("ig"),
-                ),
-                Prefetch(
-                    "karma_activity_log_user",
-                    queryset=KarmaActivityLog.objects.filter(
-                        appraiser_approved=True
-                    ).prefetch_related(
-                        Prefetch(
-                            "task",
-                            queryset=TaskList.objects.all().prefetch_related(
-                                Prefetch("ig", queryset=InterestGroup.objects.all())
-                            ),
-                        )
-                    ),
-                ),
-            )
-            .distinct()
-        )
-
-        if from_datetime_str := request.GET.get("from_datetime"):
+        """
+        Exports karma of verified KKEM users.
+
+        Query params:
+            since: watermark from a previous export, limits the export to users
+                whose karma changed after it was issued
+            from_datetime: same as since, as a %Y-%m-%dT%H:%M:%S datetime
+            cursor: enables paged output, empty for the first page
+            perPage: page size for paged output
+            output: "ndjson" streams one user per line
+        """
+        since = None
+        if watermark := request.GET.get("since"):
+            since = kkem_helper.KKEMKarmaExport.read_watermark(watermark)
+        elif from_datetime_str := request.GET.get("from_datetime"):
             try:
-                from_datetime = datetime.strptime(
-                    from_datetime_str, "%Y-%m-%dT%H:%M:%S"
-                )
-                base_queryset = base_queryset.filter(
-                    karma_activity_log_user__updated_at__gte=from_datetime
-                )
-            except CustomException:
+                since = datetime.strptime(from_datetime_str, "%Y-%m-%dT%H:%M:%S")
+            except ValueError:
                 return CustomResponse(
                     general_message="Invalid datetime format",
                 ).get_failure_response()
 
-        serialized_users = KKEMUserSerializer(base_queryset, many=True)
+        karma_export = kkem_helper.KKEMKarmaExport(since)
 
-        return CustomResponse(response=serialized_users.data).get_success_response()
+        if request.GET.get("output") == "ndjson":
+            response = StreamingHttpResponse(
+                karma_export.iter_ndjson(), content_type="application/x-ndjson"
+            )
+            response["X-Sync-Watermark"] = karma_export.watermark
+            return response
+
+        if "cursor" in request.GET:
+            try:
+                per_page = max(int(request.GET.get("perPage", karma_export.BATCH_SIZE)), 1)
+            except ValueError:
+                return CustomResponse(
+                    general_message="perPage must be a number",
+                ).get_failure_response()
+            return CustomResponse(
+                response=karma_export.get_page(request.GET.get("cursor"), per_page)
+            ).get_success_response()
+
+        response = CustomResponse(
+            response=list(karma_export.iter_users())
+        ).get_success_response()
+        response["X-Sync-Watermark"] = karma_export.watermark
+        return response
 
 
 class KKEMIndividualKarmaAPI(APIView):
@@ -80,6 +80,7 @@ class TaskCompletedLeaderBoardSerializer(serializers.ModelSerializer):
     org = serializers.CharField(allow_null=True, allow_blank=True)
     district_name = serializers.CharField(allow_null=True, allow_blank=True)
     state = serializers.CharField(allow_null=True, allow_blank=True)
+    profile_pic = serializers.CharField(source="profile_pic_small", default=None)
 
     class Meta:
         model = User
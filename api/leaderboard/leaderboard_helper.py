@@ -0,0 +1,168 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum, F, Value, Count, Q, Prefetch
+from django.db.models.functions import Coalesce
+
+from db.organization import Organization, UserOrganizationLink
+from db.user import User
+from utils.types import OrganizationType, RoleType
+from utils.utils import DateTimeUtils
+from . import serializers
+
+
+def build_students_leaderboard(limit):
+    students_leaderboard = (
+        User.objects.filter(
+            user_organization_link_user__org__org_type=OrganizationType.COLLEGE.value,
+            user_role_link_user__role__title=RoleType.STUDENT.value,
+            exist_in_guild=True,
+        )
+        .distinct()
+        .select_related("wallet_user")
+        .prefetch_related(
+            Prefetch(
+                "user_organization_link_user",
+                queryset=UserOrganizationLink.objects.filter(
+                    org__org_type=OrganizationType.COLLEGE.value
+                ).select_related("org"),
+                to_attr="colleges"
+            )
+        )
+        .order_by("-wallet_user__karma")[:limit]
+    )
+    return serializers.StudentLeaderboardSerializer(
+        students_leaderboard, many=True
+    ).data
+
+
+def build_students_monthly_leaderboard(limit):
+    start_date, end_date = DateTimeUtils.get_start_and_end_of_previous_month()
+    return (
+        User.objects.filter(
+            user_role_link_user__role__title=RoleType.STUDENT.value,
+            user_organization_link_user__org__org_type=OrganizationType.COLLEGE.value,
+            exist_in_guild=True,
+        )
+        .annotate(
+            institution=F("user_organization_link_user__org__title"),
+            total_karma=Coalesce(
+                Sum(
+                    "karma_activity_log_user__karma",
+                    filter=Q(
+                        karma_activity_log_user__created_at__range=(
+                            start_date,
+                            end_date,
+                        )
+                    ),
+                ),
+                Value(0),
+            ),
+        )
+        .values(
+            "full_name",
+            "total_karma",
+            "institution",
+        )
+        .order_by("-total_karma")[:limit]
+    )
+
+
+def build_college_leaderboard(limit):
+    return (
+        Organization.objects.filter(
+            org_type=OrganizationType.COLLEGE.value,
+            user_organization_link_org__user__user_role_link_user__role__title=RoleType.STUDENT.value,
+            user_organization_link_org__user__exist_in_guild=True,
+        )
+        .distinct()
+        .annotate(
+            total_students=Count("user_organization_link_org__user"),
+            total_karma=Sum("user_organization_link_org__user__wallet_user__karma"),
+        )
+        .values("code", "title", "total_students", "total_karma")
+        .order_by("-total_karma")[:limit]
+    )
+
+
+def build_college_monthly_leaderboard(limit):
+    start_date, end_date = DateTimeUtils.get_start_and_end_of_previous_month()
+    return (
+        Organization.objects.filter(
+            org_type=OrganizationType.COLLEGE.value,
+            user_organization_link_org__user__karma_activity_log_user__created_at__range=(
+                start_date,
+                end_date,
+            ),
+            user_organization_link_org__user__karma_activity_log_user__appraiser_approved=True,
+        )
+        .annotate(
+            total_karma=Coalesce(
+                Sum(
+                    "user_organization_link_org__user__karma_activity_log_user__karma",
+                    filter=Q(
+                        user_organization_link_org__user__karma_activity_log_user__created_at__range=(
+                            start_date,
+                            end_date,
+                        )
+                    ),
+                ),
+                Value(0),
+            ),
+            students=Count("user_organization_link_org__user", distinct=True),
+        )
+        .values("code", "total_karma", "students")
+        .order_by("-total_karma")[:limit]
+    )
+
+
+class LeaderboardSnapshot:
+    """
+    Ranked leaderboard snapshots kept in the shared cache.
+
+    Each leaderboard is computed once per LEADERBOARD_REFRESH_INTERVAL, either by the
+    build_leaderboards management command or by the first request that finds it
+    missing, and every other request is a single cache read.
+    """
+
+    STUDENTS = "students"
+    STUDENTS_MONTHLY = "students_monthly"
+    COLLEGE = "college"
+    COLLEGE_MONTHLY = "college_monthly"
+
+    BUILDERS = {
+        STUDENTS: build_students_leaderboard,
+        STUDENTS_MONTHLY: build_students_monthly_leaderboard,
+        COLLEGE: build_college_leaderboard,
+        COLLEGE_MONTHLY: build_college_monthly_leaderboard,
+    }
+
+    @staticmethod
+    def key(name: str) -> str:
+        return f"leaderboard:{name}"
+
+    @classmethod
+    def build(cls, name: str) -> dict:
+        """
+        Computes the leaderboard from the database and stores the ranked snapshot.
+        """
+        rows = cls.BUILDERS[name](settings.LEADERBOARD_SIZE)
+        snapshot = {
+            "as_of": DateTimeUtils.get_current_utc_time().isoformat(),
+            "data": [{"rank": rank, **row} for rank, row in enumerate(rows, start=1)],
+        }
+        cache.set(cls.key(name), snapshot, settings.LEADERBOARD_REFRESH_INTERVAL)
+        return snapshot
+
+    @classmethod
+    def build_all(cls):
+        for name in cls.BUILDERS:
+            cls.build(name)
+
+    @classmethod
+    def get(cls, name: str) -> dict:
+        """
+        Returns the cached snapshot, building it if it has expired.
+        """
+        if (snapshot := cache.get(cls.key(name))) is None:
+            snapshot = cls.build(name)
+        return snapshot
@@ -0,0 +1,67 @@
+import time
+from datetime import timedelta
+
+import jwt
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from utils.permission import JWTClaims, JWTUtils
+from utils.utils import DateTimeUtils
+
+
+def legacy_lookup(request):
+    """the decode every fetch_* helper and the authentication ran before"""
+    token = request.headers["Authorization"].split()
+    payload = jwt.decode(token[1], settings.SECRET_KEY, algorithms=["HS256"], verify=True)
+    return JWTClaims.from_payload(payload)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares decoding the access token on every claim lookup with decoding "
+        "it once per request"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000, help="Requests to simulate")
+        parser.add_argument(
+            "--lookups",
+            type=int,
+            default=5,
+            help="Claim lookups per request (authentication, role checks, fetch_user_id, ...)",
+        )
+
+    def handle(self, *args, **options):
+        expiry = DateTimeUtils.get_current_utc_time() + timedelta(hours=1)
+        token = jwt.encode(
+            {
+                "id": "benchmark-user",
+                "muid": "benchmark@mulearn",
+                "roles": ["Student"],
+                "expiry": expiry.strftime("%Y-%m-%d %H:%M:%S%z"),
+                "tokenType": "access",
+            },
+            settings.SECRET_KEY,
+            algorithm="HS256",
+        )
+        factory = RequestFactory()
+        requests = [
+            factory.get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+            for _ in range(options["requests"])
+        ]
+
+        for label, lookup in (
+            ("decode per lookup", legacy_lookup),
+            ("decode per request", JWTUtils.get_claims),
+        ):
+            start = time.perf_counter()
+            for request in requests:
+                for _ in range(options["lookups"]):
+                    lookup(request)
+            elapsed = time.perf_counter() - start
+
+            self.stdout.write(
+                f"{label}: {elapsed * 1000:.1f} ms, "
+                f"{elapsed * 1e6 / options['requests']:.1f} us/request"
+            )
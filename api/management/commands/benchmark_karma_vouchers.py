@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from utils.karma_voucher import (
+    generate_karma_voucher,
+    load_font,
+    load_template,
+    render_karma_vouchers,
+)
+
+
+class Command(BaseCommand):
+    help = "Times karma voucher rendering with and without the cached template and the process pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=1000, help="Vouchers to render")
+        parser.add_argument("--workers", type=int, default=4, help="Render processes for the pooled run")
+
+    def handle(self, *args, **options):
+        vouchers = [
+            {
+                "name": f"Benchmark User {i}",
+                "hashtag": "#benchmark",
+                "karma": str(100 + i),
+                "code": f"P0000000{i:04}",
+                "month": "January/1",
+            }
+            for i in range(options["count"])
+        ]
+
+        def reloading():
+            # the template and fonts were reopened for every voucher before
+            for voucher in vouchers:
+                load_template.cache_clear()
+                load_font.cache_clear()
+                generate_karma_voucher(**voucher)
+
+        def cached():
+            list(render_karma_vouchers(vouchers, workers=1))
+
+        def pooled():
+            list(render_karma_vouchers(vouchers, workers=options["workers"]))
+
+        # start the pool up front so its spawn time is not counted
+        list(render_karma_vouchers(vouchers[:options["workers"]], workers=options["workers"]))
+
+        for label, render in (
+            ("reloading template", reloading),
+            ("cached template", cached),
+            (f"{options['workers']} processes", pooled),
+        ):
+            start = time.perf_counter()
+            render()
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f"{label}: {elapsed:.2f} s, {options['count'] / elapsed:.0f} vouchers/s"
+            )
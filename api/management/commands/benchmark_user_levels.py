@@ -0,0 +1,129 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.test.utils import CaptureQueriesContext
+
+from api.dashboard.profile.profile_helper import TaskCompletionSet
+from api.dashboard.profile.profile_serializer import UserLevelSerializer
+from db.task import KarmaActivityLog, Level, TaskList, TaskType
+from db.user import User
+
+
+def legacy_level_tasks(user_id):
+    """the per task completion lookups UserLevelSerializer.get_tasks used to run"""
+    data = []
+    for level in Level.objects.all().order_by("level_order"):
+        tasks = []
+        for task in TaskList.objects.filter(level=level):
+            completed = KarmaActivityLog.objects.filter(
+                user=user_id, task=task, appraiser_approved=True
+            ).exists()
+            if task.active or completed:
+                tasks.append(task.id)
+        data.append(tasks)
+    return data
+
+
+def level_tasks(user_id):
+    levels = Level.objects.prefetch_related("tasklist_set").order_by("level_order")
+    return UserLevelSerializer(levels, many=True, context={"user_id": user_id}).data
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds levels and tasks in a rolled back transaction and compares the "
+        "queries and time of the profile levels tab before and after the "
+        "completion set"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--muid", help="User to render the levels for, defaults to any user")
+        parser.add_argument("--levels", type=int, default=10, help="Levels to seed")
+        parser.add_argument("--tasks", type=int, default=50, help="Tasks to seed per level")
+        parser.add_argument(
+            "--completed",
+            type=float,
+            default=0.5,
+            help="Fraction of the seeded tasks the user has completed",
+        )
+
+    def handle(self, *args, **options):
+        user = (
+            User.objects.filter(muid=options["muid"]).first()
+            if options["muid"]
+            else User.objects.first()
+        )
+        if user is None:
+            raise CommandError("No user to benchmark with")
+        if not (task_type := TaskType.objects.first()):
+            raise CommandError("No task type to seed tasks with")
+
+        with transaction.atomic():
+            self.seed(user, task_type, options)
+
+            for label, render in (
+                ("before", legacy_level_tasks),
+                ("after", level_tasks),
+                ("after, cached", level_tasks),
+            ):
+                if label == "after":
+                    TaskCompletionSet.invalidate(user.id)
+
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    render(user.id)
+                    elapsed = time.perf_counter() - start
+
+                self.stdout.write(
+                    f"{label}: {len(queries)} queries, {elapsed * 1000:.1f} ms"
+                )
+
+            transaction.set_rollback(True)
+        TaskCompletionSet.invalidate(user.id)
+
+    @staticmethod
+    def seed(user, task_type, options):
+        level_order = Level.objects.aggregate(Max("level_order"))["level_order__max"] or 0
+        levels = [
+            Level(
+                id=uuid.uuid4(),
+                level_order=level_order + i,
+                name=f"Benchmark {i}",
+                karma=0,
+                created_by=user,
+                updated_by=user,
+            )
+            for i in range(1, options["levels"] + 1)
+        ]
+        Level.objects.bulk_create(levels)
+
+        tasks = [
+            TaskList(
+                hashtag=f"#benchmark-{level.level_order}-{i}",
+                title=f"Benchmark {level.level_order}.{i}",
+                karma=10,
+                type=task_type,
+                level=level,
+                created_by=user,
+                updated_by=user,
+            )
+            for level in levels
+            for i in range(options["tasks"])
+        ]
+        TaskList.objects.bulk_create(tasks)
+
+        completed = tasks[: int(len(tasks) * options["completed"])]
+        KarmaActivityLog.objects.bulk_create(
+            KarmaActivityLog(
+                karma=task.karma,
+                task=task,
+                user=user,
+                appraiser_approved=True,
+                created_by=user,
+                updated_by=user,
+            )
+            for task in completed
+        )
@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from utils.karma_rank import KarmaRankIndex
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the karma rank index used for profile ranks and percentiles"
+
+    def handle(self, *args, **options):
+        for scope in KarmaRankIndex.scopes():
+            start = time.perf_counter()
+            count = KarmaRankIndex.build(scope)
+            elapsed = time.perf_counter() - start
+
+            self.stdout.write(f"{scope}: {count} wallets in {elapsed * 1000:.1f} ms")
@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.dashboard.lc.dash_lc_helper import FeaturedCircles
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the pool of circles drawn for the learning circle discovery page"
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        count = FeaturedCircles.build()
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(f"{count} circles in {elapsed * 1000:.1f} ms")
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.dashboard.lc.dash_lc_helper import CircleKarmaIndex
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the learning circle karma index used for circle karma and ranks"
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        counts = CircleKarmaIndex.build_all()
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            f"{sum(counts.values())} circles in {len(counts)} interest groups "
+            f"in {elapsed * 1000:.1f} ms"
+        )
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.leaderboard.leaderboard_helper import LeaderboardSnapshot
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the ranked leaderboard snapshots served by the leaderboard APIs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--benchmark",
+            action="store_true",
+            help="Compare live computation against snapshot reads for each leaderboard",
+        )
+        parser.add_argument(
+            "--runs",
+            type=int,
+            default=20,
+            help="Number of snapshot reads to average when benchmarking",
+        )
+
+    def handle(self, *args, **options):
+        for name in LeaderboardSnapshot.BUILDERS:
+            start = time.perf_counter()
+            snapshot = LeaderboardSnapshot.build(name)
+            live = time.perf_counter() - start
+
+            self.stdout.write(f"{name}: {len(snapshot['data'])} rows as of {snapshot['as_of']}")
+
+            if not options["benchmark"]:
+                continue
+
+            start = time.perf_counter()
+            for _ in range(options["runs"]):
+                LeaderboardSnapshot.get(name)
+            cached = (time.perf_counter() - start) / options["runs"]
+
+            self.stdout.write(
+                f"  live {live * 1000:.1f} ms, snapshot {cached * 1000:.2f} ms"
+            )
@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from utils.karma_rank import OrgRanking
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the organization, district and zone karma rankings used by the dashboards"
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        rankings = OrgRanking.build_all()
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(f"{len(rankings)} rankings rebuilt in {elapsed * 1000:.1f} ms")
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.dashboard.organisation.organisation_helper import OrganizationMerge
+from db.organization import Organization
+
+
+class Command(BaseCommand):
+    help = "Merges an organization into another, moving its rows in small transactions"
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="Code of the organization to merge and delete")
+        parser.add_argument("destination", help="Code of the organization to keep")
+        parser.add_argument("--dry-run", action="store_true", help="Only print the merge plan")
+        parser.add_argument("--batch-size", type=int, help="Rows moved per transaction")
+
+    def handle(self, *args, **options):
+        organizations = Organization.objects.in_bulk(
+            [options["source"], options["destination"]], field_name="code"
+        )
+        if not (source := organizations.get(options["source"])):
+            raise CommandError(f"No organization with code {options['source']}")
+        if not (destination := organizations.get(options["destination"])):
+            raise CommandError(f"No organization with code {options['destination']}")
+        if source == destination:
+            raise CommandError("You can't merge an organization into itself.")
+
+        merge = OrganizationMerge(source, destination, options["batch_size"])
+
+        for step in merge.plan():
+            self.stdout.write(
+                f"{step['model']}: {step['action']} {step['count']} rows, "
+                f"{step['duplicates']} already on the destination"
+            )
+        if options["dry_run"]:
+            return
+
+        progress = merge.run(
+            on_progress=lambda progress: self.stdout.write(
+                f"moved {progress['moved']}, deduplicated {progress['deduplicated']}, "
+                f"{progress['rows_per_second']} rows/s"
+            )
+        )
+        self.stdout.write(f"Merged {progress['source']} into {progress['destination']}")
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from api.dashboard.organisation.organisation_helper import OrganizationMerge
+
+
+class Command(BaseCommand):
+    help = "Runs the organization merges queued by the transfer API"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run the merges queued now and exit instead of waiting for more",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=int,
+            default=5,
+            help="Seconds to wait for a merge before checking again",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            merge = OrganizationMerge.next_merge(options["poll_interval"])
+
+            if merge is None:
+                if options["once"]:
+                    return
+                continue
+
+            try:
+                progress = merge.run()
+            except Exception as e:
+                progress = OrganizationMerge.get_progress(merge.source_id) or {}
+                OrganizationMerge.save_progress(merge.source_id, {**progress, "error": str(e)})
+                self.stderr.write(f"merge of {merge.source.code} failed: {e}")
+                continue
+
+            self.stdout.write(f"Merged {progress['source']} into {progress['destination']}")
@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from utils.mail_outbox import MailQueue
+
+
+class Command(BaseCommand):
+    help = "Delivers queued transactional mails from the mail outbox"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the mails that are due now and exit instead of polling",
+        )
+        parser.add_argument(
+            "--stats",
+            action="store_true",
+            help="Print queue depth and send metrics and exit",
+        )
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            for key, value in MailQueue.get_metrics().items():
+                self.stdout.write(f"{key}: {value}")
+            return
+
+        while True:
+            MailQueue.release_stale()
+            batch = MailQueue.claim_batch(settings.MAIL_OUTBOX_BATCH_SIZE)
+
+            if batch:
+                result = MailQueue.send_batch(batch)
+                self.stdout.write(f"sent {result['sent']}, failed {result['failed']}")
+                continue
+
+            if options["once"]:
+                return
+            time.sleep(settings.MAIL_OUTBOX_POLL_INTERVAL)
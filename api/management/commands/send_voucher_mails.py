@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from api.dashboard.karma_voucher.karma_voucher_helper import VoucherMailJob
+
+
+class Command(BaseCommand):
+    help = "Renders and mails the karma vouchers of queued voucher mail jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run the jobs queued now and exit instead of waiting for more",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=int,
+            default=5,
+            help="Seconds to wait for a job before checking again",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            job = VoucherMailJob.next_job(options["poll_interval"])
+
+            if job is None:
+                if options["once"]:
+                    return
+                continue
+
+            job.run()
+            progress = VoucherMailJob.get_progress(job.job_id)
+            self.stdout.write(
+                f"job {job.job_id}: {progress['status']}, "
+                f"sent {progress['sent']}, failed {len(progress['failed'])}"
+            )
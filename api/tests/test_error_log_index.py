@@ -0,0 +1,69 @@
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from api.dashboard.error_log.log_helper import ErrorLogIndex
+
+
+def error_record(log_id: str, second: int, traceback: str) -> str:
+    return (
+        f"2024-01-01 10:00:{second:02d},000 ERROR EXCEPTION INFO:\n"
+        f"ID: {log_id}\n"
+        "TYPE: ValueError\n"
+        "MESSAGE: invalid literal\n"
+        "METHOD: GET\n"
+        "PATH: /api/v1/unknown/\n"
+        "AUTH: \nnull\n"
+        "BODY: \n{}\n"
+        f"TRACEBACK: {traceback}\n"
+    )
+
+
+class ErrorLogIndexTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.log_path = os.path.join(directory.name, "error.log")
+        open(self.log_path, "w").close()
+
+    def write(self, text: str) -> None:
+        with open(self.log_path, "a") as file:
+            file.write(text)
+
+    def test_last_record_waits_for_the_next_one(self):
+        index = ErrorLogIndex(self.log_path)
+        first = error_record("first", 1, "Traceback (most recent call last):\n  line 1")
+
+        # a traceback caught half written
+        self.write(first[:-10])
+        index.refresh()
+        self.assertEqual(index.groups, {})
+        self.assertEqual(index.offset, 0)
+
+        self.write(first[-10:])
+        index.refresh()
+        self.assertEqual(index.groups, {})
+
+        self.write(error_record("second", 2, "Traceback"))
+        index.refresh()
+        self.assertEqual(list(index.groups), ["first"])
+        self.assertEqual(
+            index.groups["first"]["traceback"],
+            ["Traceback (most recent call last):\n  line 1\n"],
+        )
+        self.assertEqual(index.offset, len(first.encode()))
+
+    def test_patch_line_completes_the_record_before_it(self):
+        index = ErrorLogIndex(self.log_path)
+        self.write(error_record("first", 1, "Traceback"))
+        self.write("2024-01-01 10:00:05,000 ERROR PATCHED : other\n")
+        index.refresh()
+
+        self.assertEqual(list(index.groups), ["first"])
+        self.assertEqual(index.offset, os.path.getsize(self.log_path))
+
+        # another process catches up from the entries file
+        other = ErrorLogIndex(self.log_path)
+        other.refresh()
+        self.assertEqual(list(other.groups), ["first"])
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import uuid
+from datetime import timedelta
+
+import jwt
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from api.dashboard.profile.profile_helper import ProfileQrCode
+from db.user import User, UserSettings
+from utils.utils import DateTimeUtils
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class ProfileQrCodeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            id=str(uuid.uuid4()),
+            muid="learner@mulearn",
+            full_name="Learner",
+            email="learner@example.com",
+        )
+        UserSettings.objects.create(
+            id=str(uuid.uuid4()),
+            user=cls.user,
+            is_public=True,
+            created_by=cls.user,
+            updated_by=cls.user,
+        )
+
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.media_root = media_root.name
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def get_access_token(self) -> str:
+        expiry = DateTimeUtils.get_current_utc_time() + timedelta(hours=1)
+        return jwt.encode(
+            {
+                "id": self.user.id,
+                "muid": self.user.muid,
+                "roles": [],
+                "expiry": expiry.strftime("%Y-%m-%d %H:%M:%S%z"),
+                "tokenType": "access",
+            },
+            settings.SECRET_KEY,
+            algorithm="HS256",
+        )
+
+    def test_share_profile_returns_the_png(self):
+        response = self.client.get(
+            f"/api/v1/dashboard/profile/share-user-profile/{self.user.id}/",
+            HTTP_AUTHORIZATION=f"Bearer {self.get_access_token()}",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertTrue(response.content.startswith(b"\x89PNG"))
+
+    def test_cached_code_is_saved_again_when_the_file_is_gone(self):
+        qr_code = ProfileQrCode(self.user.id)
+        png = qr_code.get()
+        path = os.path.join(self.media_root, qr_code.path)
+        os.remove(path)
+
+        self.assertEqual(qr_code.get(), png)
+        with open(path, "rb") as file:
+            self.assertEqual(file.read(), png)
@@ -0,0 +1,98 @@
+import uuid
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from api.dashboard.profile.profile_view import UserLevelsAPI, UserProfileAPI, UserRankAPI
+from db.task import Level, TaskList, TaskType, UserLvlLink, Wallet
+from db.user import User, UserSettings
+
+
+class BuiltIndexPipeline:
+    """
+    Pipeline of a Redis whose karma rank index is built and empty: EXISTS
+    answers 1 and every count 0, so ranks cost no SQL.
+    """
+
+    def __init__(self):
+        self.commands = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def __getattr__(self, command):
+        return lambda *args, **kwargs: self.commands.append(command)
+
+    def execute(self):
+        return [1 if command == "exists" else 0 for command in self.commands]
+
+
+def built_rank_index():
+    client = mock.MagicMock()
+    client.pipeline.side_effect = BuiltIndexPipeline
+    return client
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+@mock.patch("utils.karma_rank.get_redis_client", built_rank_index)
+class ProfileQueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            id=str(uuid.uuid4()),
+            muid="learner@mulearn",
+            full_name="Learner",
+            email="learner@example.com",
+        )
+        audit = {"created_by": cls.user, "updated_by": cls.user}
+        UserSettings.objects.create(id=str(uuid.uuid4()), user=cls.user, is_public=True, **audit)
+        Wallet.objects.create(id=str(uuid.uuid4()), user=cls.user, karma=150, **audit)
+
+        task_type = TaskType.objects.create(id=str(uuid.uuid4()), title="General", **audit)
+        for level_order in range(1, 7):
+            level = Level.objects.create(
+                id=str(uuid.uuid4()),
+                level_order=level_order,
+                name=f"Level {level_order}",
+                karma=level_order * 100,
+                **audit,
+            )
+            for number in range(3):
+                TaskList.objects.create(
+                    id=str(uuid.uuid4()),
+                    hashtag=f"#lvl{level_order}task{number}",
+                    title=f"Task {number}",
+                    karma=10,
+                    type=task_type,
+                    level=level,
+                    **audit,
+                )
+            if level_order == 1:
+                UserLvlLink.objects.create(id=str(uuid.uuid4()), user=cls.user, level=level, **audit)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_user_profile_stays_within_budget(self):
+        with self.assertNumQueries(UserProfileAPI.query_budget):
+            response = self.client.get(f"/api/v1/dashboard/profile/user-profile/{self.user.muid}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["response"]["karma"], 150)
+
+    def test_user_levels_stays_within_budget(self):
+        with self.assertNumQueries(UserLevelsAPI.query_budget):
+            response = self.client.get(f"/api/v1/dashboard/profile/get-user-levels/{self.user.muid}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["response"]), 6)
+
+    def test_user_rank_stays_within_budget(self):
+        with self.assertNumQueries(UserRankAPI.query_budget):
+            response = self.client.get(f"/api/v1/dashboard/profile/rank/{self.user.muid}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["response"]["rank"], 1)
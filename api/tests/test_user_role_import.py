@@ -0,0 +1,64 @@
+import uuid
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from api.common.common_consumer import LandingStats, LandingStatsBroadcaster, landing_stats
+from api.dashboard.roles.dash_roles_helper import UserRoleImporter
+from db.user import Role, User, UserRoleLink
+from utils.karma_rank import KarmaRankIndex
+from utils.types import RoleType
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class UserRoleImporterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create(
+                id=str(uuid.uuid4()),
+                muid=f"user{number}@mulearn",
+                full_name=f"User {number}",
+                email=f"user{number}@example.com",
+            )
+            for number in range(4)
+        ]
+        audit = {"created_by": cls.users[0], "updated_by": cls.users[0]}
+        cls.mentor = Role.objects.create(id=str(uuid.uuid4()), title=RoleType.MENTOR.value, **audit)
+        cls.student = Role.objects.create(id=str(uuid.uuid4()), title=RoleType.STUDENT.value, **audit)
+
+    def setUp(self):
+        # role ids are cached per process, the test database has its own
+        KarmaRankIndex._role_ids = None
+        LandingStats._role_titles = None
+
+    def test_saved_updates_the_rank_index_once_per_chunk(self):
+        importer = UserRoleImporter(self.users[0].id)
+        rows = [
+            {"user_id": user.id, "role_id": role.id, "role": role.title}
+            for user, role in zip(
+                self.users, (self.mentor, self.mentor, self.mentor, self.student)
+            )
+        ]
+        links = [importer.build(row) for row in rows]
+        UserRoleLink.objects.bulk_create(links)
+
+        with mock.patch.object(KarmaRankIndex, "update_users") as update_users, \
+                mock.patch.object(landing_stats, "apply_delta") as apply_delta, \
+                mock.patch.object(LandingStatsBroadcaster, "schedule") as schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                importer.saved(links, rows)
+                update_users.assert_not_called()
+
+        update_users.assert_called_once_with([user.id for user in self.users[:3]])
+        apply_delta.assert_called_once_with(LandingStats.key("role", RoleType.MENTOR.value), 3)
+        schedule.assert_called_once()
+        self.assertEqual(
+            importer.users_by_role,
+            {
+                RoleType.MENTOR.value: [user.id for user in self.users[:3]],
+                RoleType.STUDENT.value: [self.users[3].id],
+            },
+        )
@@ -0,0 +1,166 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from db.task import KarmaActivityLog, TaskList
+from utils.karma_award import karma_awarded
+from utils.profile_pic import get_profile_pic_url
+
+LEADERBOARD_QUERY = """
+    SELECT
+    u.id,
+    u.full_name,
+    u.profile_pic_hash,
+    SUM(kal.karma) AS total_karma,
+    COALESCE(org.title, comm.title) AS org,
+    COALESCE(org.dis, d.name) AS dis,
+    COALESCE(org.state, s.name) AS state,
+    MAX(kal.created_at) AS time_
+    FROM karma_activity_log AS kal
+    INNER JOIN user AS u ON kal.user_id = u.id
+    INNER JOIN task_list AS tl ON tl.id = kal.task_id
+    LEFT JOIN (
+        SELECT
+            uol.user_id,
+            org.id,
+            org.title AS title,
+            d.name dis,
+            s.name state
+        FROM user_organization_link AS uol
+        INNER JOIN organization AS org ON org.id = uol.org_id AND org.org_type IN ('College', 'School', 'Company')
+        LEFT JOIN district AS d ON d.id = org.district_id
+        LEFT JOIN zone AS z ON z.id = d.zone_id
+        LEFT JOIN state AS s ON s.id = z.state_id
+        GROUP BY uol.user_id
+        ) AS org ON org.user_id = u.id
+        LEFT JOIN (SELECT
+            uol.user_id,
+            org.id,
+            org.title AS title
+        FROM user_organization_link AS uol
+        INNER JOIN organization AS org ON org.id = uol.org_id AND org.org_type IN ('Community')
+        GROUP BY uol.user_id) AS comm ON comm.user_id = u.id
+        LEFT JOIN district AS d ON d.id = u.district_id
+        LEFT JOIN zone AS z ON d.zone_id = z.id
+        LEFT JOIN state AS s ON z.state_id = s.id
+        WHERE
+            tl.event = %s AND
+            kal.appraiser_approved = TRUE
+            AND u.id IN (select user_id from karma_activity_log as kal
+        INNER JOIN task_list AS tl ON tl.id = kal.task_id
+        WHERE tl.hashtag = %s AND kal.appraiser_approved = TRUE)
+        GROUP BY u.id
+        ORDER BY total_karma DESC, time_
+        LIMIT %s;
+        """
+
+
+class EventLeaderboard:
+    """
+    Leaderboard of the users with approved karma in an event, restricted to those
+    who completed a qualifying hashtag.
+
+    Results are cached per (event, hashtag) and invalidated through per event and
+    per hashtag versions that are bumped whenever karma for a matching task is
+    approved, so page views no longer re-scan the karma log.
+    """
+
+    FETCH_SIZE = 500
+
+    def __init__(self, event: str, hashtag: str) -> None:
+        self.event = event
+        self.hashtag = hashtag
+
+    @staticmethod
+    def version_key(kind: str, value: str) -> str:
+        digest = hashlib.md5(value.encode()).hexdigest()
+        return f"event_leaderboard:{kind}:{digest}:version"
+
+    @classmethod
+    def invalidate(cls, event: str = None, hashtag: str = None) -> None:
+        keys = []
+        if event:
+            keys.append(cls.version_key("event", event))
+        if hashtag:
+            keys.append(cls.version_key("hashtag", hashtag))
+
+        for key in keys:
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, 1, None)
+
+    def cache_key(self) -> str:
+        versions = cache.get_many(
+            [
+                self.version_key("event", self.event),
+                self.version_key("hashtag", self.hashtag),
+            ]
+        )
+        digest = hashlib.md5(
+            f"{self.event}\0{self.hashtag}\0{sorted(versions.items())}".encode()
+        ).hexdigest()
+        return f"event_leaderboard:{digest}"
+
+    def build(self) -> list[dict]:
+        """
+        Runs the leaderboard query and reads its rows in batches.
+        """
+        rows = []
+        with connection.chunked_cursor() as cursor:
+            cursor.execute(
+                LEADERBOARD_QUERY,
+                [self.event, self.hashtag, settings.EVENT_LEADERBOARD_SIZE],
+            )
+            column_names = [desc[0] for desc in cursor.description]
+
+            while batch := cursor.fetchmany(self.FETCH_SIZE):
+                rows.extend(
+                    {"rank": rank, **dict(zip(column_names, row))}
+                    for rank, row in enumerate(batch, start=len(rows) + 1)
+                )
+
+        for row in rows:
+            row["profile_pic"] = get_profile_pic_url(row.pop("profile_pic_hash"), "small")
+        return rows
+
+    def get(self) -> list[dict]:
+        """
+        Returns the ranked rows, from the cache when they are still current.
+        """
+        key = self.cache_key()
+        if (rows := cache.get(key)) is None:
+            rows = self.build()
+            cache.set(key, rows, settings.EVENT_LEADERBOARD_CACHE_TIMEOUT)
+        return rows
+
+
+@receiver(post_save, sender=KarmaActivityLog)
+@receiver(post_delete, sender=KarmaActivityLog)
+def invalidate_event_leaderboard(sender, instance, *args, **kwargs):
+    # any change counts, a log that loses its approval takes its karma off the board
+    if KarmaActivityLog.task.is_cached(instance):
+        task = {"event": instance.task.event, "hashtag": instance.task.hashtag}
+    else:
+        task = None
+    task_id = instance.task_id
+
+    def invalidate():
+        nonlocal task
+        if task is None:
+            task = TaskList.objects.filter(id=task_id).values("event", "hashtag").first()
+        if task:
+            EventLeaderboard.invalidate(task["event"], task["hashtag"])
+
+    # after the commit, so a concurrent read cannot cache the old rows again
+    transaction.on_commit(invalidate)
+
+
+@receiver(karma_awarded)
+def invalidate_event_leaderboard_for_award(sender, task, **kwargs):
+    # sent once the award has committed
+    EventLeaderboard.invalidate(task.event, task.hashtag)
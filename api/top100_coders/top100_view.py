@@ -1,61 +1,45 @@
-from django.db import connection
 from rest_framework.views import APIView
 
 from utils.response import CustomResponse
+from .top100_helper import EventLeaderboard
+
+DEFAULT_EVENT = "TOP100"
+DEFAULT_HASHTAG = "#thc-realworld-problem-proposal"
 
 
 class Leaderboard(APIView):
     def get(self, request):
-        query = """
-        SELECT 
-        u.id,
-        u.full_name, 
-        u.profile_pic,
-        SUM(kal.karma) AS total_karma,
-        COALESCE(org.title, comm.title) AS org,
-        COALESCE(org.dis, d.name) AS dis,
-        COALESCE(org.state, s.name) AS state,
-        MAX(kal.created_at) AS time_
-        FROM karma_activity_log AS kal
-        INNER JOIN user AS u ON kal.user_id = u.id
-        INNER JOIN task_list AS tl ON tl.id = kal.task_id
-        LEFT JOIN (
-            SELECT 
-                uol.user_id, 
-                org.id, 
-                org.title AS title, 
-                d.name dis, 
-                s.name state
-            FROM user_organization_link AS uol
-            INNER JOIN organization AS org ON org.id = uol.org_id AND org.org_type IN ('College', 'School', 'Company')
-            LEFT JOIN district AS d ON d.id = org.district_id
-            LEFT JOIN zone AS z ON z.id = d.zone_id
-            LEFT JOIN state AS s ON s.id = z.state_id
-            GROUP BY uol.user_id 
-            ) AS org ON org.user_id = u.id
-            LEFT JOIN (SELECT 
-                uol.user_id, 
-                org.id, 
-                org.title AS title
-            FROM user_organization_link AS uol
-            INNER JOIN organization AS org ON org.id = uol.org_id AND org.org_type IN ('Community')
-            GROUP BY uol.user_id) AS comm ON comm.user_id = u.id
-            LEFT JOIN district AS d ON d.id = u.district_id
-            LEFT JOIN zone AS z ON d.zone_id = z.id
-            LEFT JOIN state AS s ON z.state_id = s.id
-            WHERE 
-                tl.event = 'TOP100' AND
-                kal.appraiser_approved = TRUE 
-                AND u.id IN (select user_id from karma_activity_log as kal
-            INNER JOIN task_list AS tl ON tl.id = kal.task_id
-            WHERE tl.hashtag = '#thc-realworld-problem-proposal' AND kal.appraiser_approved = TRUE)
-            GROUP BY u.id
-            ORDER BY total_karma DESC, time_;
-            """
-        with connection.cursor() as cursor:
-            cursor.execute(query)
-            results = cursor.fetchall()
-            column_names = [desc[0] for desc in cursor.description]
-
-            list_of_dicts = [dict(zip(column_names, row)) for row in results]
-            return CustomResponse(response=list_of_dicts).get_success_response()
+        event = request.query_params.get("event", DEFAULT_EVENT)
+        hashtag = request.query_params.get("hashtag", DEFAULT_HASHTAG)
+
+        try:
+            limit = request.query_params.get("limit")
+            limit = max(int(limit), 0) if limit else None
+            page = max(int(request.query_params.get("pageIndex", 1)), 1)
+            per_page = max(int(request.query_params.get("perPage", 10)), 1)
+        except ValueError:
+            return CustomResponse(
+                general_message="limit, pageIndex and perPage must be numbers"
+            ).get_failure_response()
+
+        rows = EventLeaderboard(event, hashtag).get()
+
+        if limit is not None:
+            rows = rows[:limit]
+
+        if "pageIndex" not in request.query_params:
+            return CustomResponse(response=rows).get_success_response()
+
+        total_pages = max((len(rows) + per_page - 1) // per_page, 1)
+        page = min(page, total_pages)
+
+        return CustomResponse().paginated_response(
+            data=rows[(page - 1) * per_page: page * per_page],
+            pagination={
+                "count": len(rows),
+                "totalPages": total_pages,
+                "isNext": page < total_pages,
+                "isPrev": page > 1,
+                "nextPage": page + 1 if page < total_pages else None,
+            },
+        )
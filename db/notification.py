@@ -23,3 +23,21 @@ class Notification(models.Model):
         managed = False
         db_table = "notification"
         ordering = ["created_at"]
+
+
+class MailOutbox(models.Model):
+    id              = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    subject         = models.CharField(max_length=255)
+    body            = models.TextField()
+    from_email      = models.CharField(max_length=255)
+    recipients      = models.TextField()
+    status          = models.CharField(max_length=10, default="pending")
+    attempts        = models.IntegerField(default=0)
+    last_error      = models.TextField(blank=True, null=True)
+    next_attempt_at = models.DateTimeField()
+    sent_at         = models.DateTimeField(blank=True, null=True)
+    created_at      = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        managed = False
+        db_table = "mail_outbox"
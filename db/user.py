@@ -1,13 +1,12 @@
 import uuid
 
-from django.core.files.storage import FileSystemStorage
 from django.db import models
 
 from django.conf import settings
 
+from utils.profile_pic import get_profile_pic_url
 from .managers import user_manager
 # from .task import UserIgLink
-from decouple import config as decouple_config
 
 
 # fmt: off
@@ -30,6 +29,7 @@ class User(models.Model):
     suspended_at = models.DateTimeField(blank=True, null=True)
     suspended_by = models.ForeignKey("self", on_delete=models.SET(settings.SYSTEM_ADMIN_ID), blank=True, null=True,
                                      related_name="user_suspended_by_user", db_column="suspended_by", default=None)
+    profile_pic_hash = models.CharField(max_length=64, blank=True, null=True)
     objects = user_manager.ActiveUserManager()
     every = models.Manager()
 
@@ -39,10 +39,11 @@ class User(models.Model):
 
     @property
     def profile_pic(self):
-        fs = FileSystemStorage()
-        path = f'user/profile/{self.id}.png'
-        if fs.exists(path):
-            return f"{decouple_config('BE_DOMAIN_NAME')}{fs.url(path)}"
+        return get_profile_pic_url(self.profile_pic_hash, "large")
+
+    @property
+    def profile_pic_small(self):
+        return get_profile_pic_url(self.profile_pic_hash, "small")
 
     def save(self, *args, **kwargs):
         if self.muid is None:
@@ -103,6 +103,35 @@ CHANNEL_LAYERS = {
     },
 }
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": f"redis://{decouple_config('REDIS_HOST')}:{decouple_config('REDIS_PORT')}",
+    }
+}
+
+# Landing page stats websocket: seconds between coalesced broadcasts, and
+# between full recounts that correct drift in the incremental counters
+LANDING_STATS_BROADCAST_INTERVAL = decouple_config("LANDING_STATS_BROADCAST_INTERVAL", default=5, cast=int)
+LANDING_STATS_RECONCILE_INTERVAL = decouple_config("LANDING_STATS_RECONCILE_INTERVAL", default=900, cast=int)
+
+# Public leaderboards: rows kept per snapshot and seconds before a snapshot is rebuilt
+LEADERBOARD_SIZE = decouple_config("LEADERBOARD_SIZE", default=20, cast=int)
+LEADERBOARD_REFRESH_INTERVAL = decouple_config("LEADERBOARD_REFRESH_INTERVAL", default=3600, cast=int)
+
+# Event leaderboards (top100): maximum ranked rows kept and seconds they stay cached
+EVENT_LEADERBOARD_SIZE = decouple_config("EVENT_LEADERBOARD_SIZE", default=1000, cast=int)
+EVENT_LEADERBOARD_CACHE_TIMEOUT = decouple_config("EVENT_LEADERBOARD_CACHE_TIMEOUT", default=3600, cast=int)
+
+# Seconds a user's completed task ids stay cached for the profile levels tab, 0 disables the cache
+TASK_COMPLETION_CACHE_TIMEOUT = decouple_config("TASK_COMPLETION_CACHE_TIMEOUT", default=300, cast=int)
+
+# Seconds the karma of a closed day, week or month stays cached for karma trend charts
+KARMA_SERIES_CACHE_TIMEOUT = decouple_config("KARMA_SERIES_CACHE_TIMEOUT", default=86400, cast=int)
+
+# Seconds before an organization, district or zone karma ranking is recomputed
+ORG_RANKING_REFRESH_INTERVAL = decouple_config("ORG_RANKING_REFRESH_INTERVAL", default=600, cast=int)
+
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
 
@@ -117,6 +146,9 @@ DATABASES = {
     }
 }
 
+# creates the tables of the unmanaged db models in the test database
+TEST_RUNNER = "utils.test_runner.UnmanagedModelTestRunner"
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 
@@ -232,6 +264,37 @@ EMAIL_USE_TLS = decouple_config("EMAIL_USE_TLS")
 FROM_MAIL = decouple_config("FROM_MAIL")
 FR_DOMAIN_NAME = decouple_config("FR_DOMAIN_NAME")
 
+# Mail outbox worker (manage.py send_mail_outbox)
+MAIL_OUTBOX_BATCH_SIZE = decouple_config("MAIL_OUTBOX_BATCH_SIZE", default=50, cast=int)
+MAIL_OUTBOX_POLL_INTERVAL = decouple_config("MAIL_OUTBOX_POLL_INTERVAL", default=5, cast=int)
+MAIL_OUTBOX_MAX_ATTEMPTS = decouple_config("MAIL_OUTBOX_MAX_ATTEMPTS", default=5, cast=int)
+MAIL_OUTBOX_RETRY_BACKOFF = decouple_config("MAIL_OUTBOX_RETRY_BACKOFF", default=30, cast=int)
+MAIL_OUTBOX_SENDING_TIMEOUT = decouple_config("MAIL_OUTBOX_SENDING_TIMEOUT", default=600, cast=int)
+
+# Karma vouchers (manage.py send_voucher_mails): render processes, mails sent per SMTP connection,
+# seconds a job's progress is kept and seconds without progress after which a running job is failed
+VOUCHER_RENDER_WORKERS = decouple_config("VOUCHER_RENDER_WORKERS", default=2, cast=int)
+VOUCHER_MAIL_BATCH_SIZE = decouple_config("VOUCHER_MAIL_BATCH_SIZE", default=50, cast=int)
+VOUCHER_JOB_TIMEOUT = decouple_config("VOUCHER_JOB_TIMEOUT", default=86400, cast=int)
+VOUCHER_JOB_STALE_AFTER = decouple_config("VOUCHER_JOB_STALE_AFTER", default=900, cast=int)
+
+# Organization merges: rows moved per transaction and seconds a merge's progress is kept
+ORG_MERGE_BATCH_SIZE = decouple_config("ORG_MERGE_BATCH_SIZE", default=1000, cast=int)
+ORG_MERGE_PROGRESS_TIMEOUT = decouple_config("ORG_MERGE_PROGRESS_TIMEOUT", default=86400, cast=int)
+
+# Path of the logo drawn in the middle of profile QR codes (empty for none) and seconds a drawn
+# QR code stays cached
+PROFILE_QR_LOGO = decouple_config(
+    "PROFILE_QR_LOGO", default=os.path.join(BASE_DIR, "api/dashboard/profile/assets/qr-logo.png")
+)
+PROFILE_QR_CACHE_TIMEOUT = decouple_config("PROFILE_QR_CACHE_TIMEOUT", default=2592000, cast=int)
+
+# Seconds between rebuilds of the pool of circles drawn for the learning circle discovery page
+LC_FEATURED_REFRESH_INTERVAL = decouple_config("LC_FEATURED_REFRESH_INTERVAL", default=600, cast=int)
+
+# Seconds the moderator dashboard's pending approval counts stay cached
+MODERATOR_PENDING_CACHE_TIMEOUT = decouple_config("MODERATOR_PENDING_CACHE_TIMEOUT", default=60, cast=int)
+
 WADHWANI_CLIENT_AUTH_URL = decouple_config("WADHWANI_CLIENT_AUTH_URL")
 WADHWANI_CLIENT_SECRET = decouple_config("WADHWANI_CLIENT_SECRET")
 WADHWANI_BASE_URL = decouple_config("WADHWANI_BASE_URL")
@@ -20,9 +20,12 @@ from django.conf import settings
 from django.urls import path, include, re_path
 from django.views.static import serve
 
+from utils.profile_pic import serve_profile_pic
+
 urlpatterns = [
     # path('admin/', admin.site.urls),
     path('api/v1/', include('api.urls')),
+    re_path(r'^muback-media/user/profile/(?P<path>[0-9a-f]{2}/[0-9a-f]{64}-\d+\.webp)$', serve_profile_pic),
     re_path(r'^muback-media/(?P<path>.*)$',serve,{'document_root':settings.MEDIA_ROOT})
 ]
 
@@ -0,0 +1,406 @@
+import time
+from abc import ABC, abstractmethod
+from itertools import islice
+from typing import Callable, Iterable, Iterator
+from zipfile import BadZipFile
+
+from django.db import DatabaseError, transaction
+from django.db.models import Model, QuerySet
+from django.db.models.signals import post_save
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+
+
+class SheetReader:
+    """
+    Reads the first sheet of an uploaded workbook one row at a time.
+
+    The workbook is opened in read-only mode, so rows are parsed from the file as
+    they are consumed instead of being loaded up front. The first row holds the
+    column headers.
+
+    Usage:
+        with SheetReader(file_obj) as reader:
+            for row_number, row in reader:
+                ...
+    """
+
+    def __init__(self, file_obj):
+        """
+        Raises ValueError if the file is not a workbook or has no header row.
+        """
+        try:
+            self.workbook = load_workbook(file_obj, read_only=True, data_only=True)
+        except (InvalidFileException, BadZipFile, KeyError) as e:
+            raise ValueError("Invalid excel file.") from e
+
+        self.rows = self.workbook.active.iter_rows(values_only=True)
+        if (header := next(self.rows, None)) is None:
+            self.close()
+            raise ValueError("Empty csv file.")
+        self.headers = list(header)
+
+    def __iter__(self) -> Iterator[tuple[int, dict]]:
+        """
+        Yields (row number, {header: value}) for every non-empty row.
+        """
+        for row_number, values in enumerate(self.rows, start=2):
+            if any(values):
+                yield row_number, {
+                    header: value
+                    for header, value in zip(self.headers, values)
+                    if header is not None
+                }
+
+    def close(self) -> None:
+        self.workbook.close()
+
+    def __enter__(self) -> "SheetReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class Stage(ABC):
+    """
+    One validation step of an import. A stage sees a chunk of rows at a time, so
+    it can look up the whole chunk with one query, and only the rows that passed
+    the stages before it.
+
+    Error messages are format strings filled from the row, e.g.
+    "Invalid role: {role}".
+    """
+
+    def __init__(self, message: str) -> None:
+        self.message = message
+
+    def error(self, row: dict) -> str:
+        return self.message.format_map(row)
+
+    @abstractmethod
+    def validate(self, rows: list[dict]) -> list[str | None]:
+        """Returns the error of every row, None for the rows that pass."""
+
+
+class RowStage(Stage):
+    """A stage that checks each row on its own."""
+
+    def validate(self, rows: list[dict]) -> list[str | None]:
+        return [self.check(row) for row in rows]
+
+    @abstractmethod
+    def check(self, row: dict) -> str | None:
+        """Returns the error of the row, None if it passes."""
+
+
+class Required(RowStage):
+    def __init__(self, column: str, message: str) -> None:
+        super().__init__(message)
+        self.column = column
+
+    def check(self, row: dict) -> str | None:
+        return None if row.get(self.column) else self.error(row)
+
+
+class Check(RowStage):
+    def __init__(self, predicate: Callable[[dict], bool], message: str) -> None:
+        super().__init__(message)
+        self.predicate = predicate
+
+    def check(self, row: dict) -> str | None:
+        return None if self.predicate(row) else self.error(row)
+
+
+class Choices(RowStage):
+    def __init__(
+        self, column: str, choices: Iterable, message: str, required: bool = True
+    ) -> None:
+        super().__init__(message)
+        self.column = column
+        self.choices = set(choices)
+        self.required = required
+
+    def check(self, row: dict) -> str | None:
+        value = row.get(self.column)
+        if value is None and not self.required:
+            return None
+        return None if value in self.choices else self.error(row)
+
+
+class UniqueInFile(RowStage):
+    """
+    Rejects a row whose value, or tuple of values, was already seen earlier in
+    the file. Only the seen keys are kept, not the rows.
+    """
+
+    def __init__(self, columns: str | tuple[str, ...], message: str) -> None:
+        super().__init__(message)
+        self.columns = (columns,) if isinstance(columns, str) else columns
+        self.seen = set()
+
+    def check(self, row: dict) -> str | None:
+        key = tuple(row.get(column) for column in self.columns)
+        if key in self.seen:
+            return self.error(row)
+        self.seen.add(key)
+        return None
+
+
+class UniqueInDatabase(Stage):
+    """
+    Rejects the rows whose value, or tuple of values, already exists in the
+    queryset, with one IN query per chunk.
+    """
+
+    def __init__(
+        self,
+        columns: str | tuple[str, ...],
+        queryset: QuerySet,
+        fields: str | tuple[str, ...],
+        message: str,
+    ) -> None:
+        super().__init__(message)
+        self.columns = (columns,) if isinstance(columns, str) else columns
+        self.fields = (fields,) if isinstance(fields, str) else fields
+        self.queryset = queryset
+
+    def validate(self, rows: list[dict]) -> list[str | None]:
+        keys = [tuple(row.get(column) for column in self.columns) for row in rows]
+        # a superset of the existing keys for multi column checks, narrowed below
+        existing = set(
+            self.queryset.filter(
+                **{
+                    f"{field}__in": {key[index] for key in keys}
+                    for index, field in enumerate(self.fields)
+                }
+            ).values_list(*self.fields)
+        )
+        return [
+            self.error(row) if key in existing else None
+            for row, key in zip(rows, keys)
+        ]
+
+
+class Lookup(Stage):
+    """
+    Resolves a column to the primary key of the object it names, with one IN
+    query per chunk, and stores it on the row under `to`. `extra` fields of the
+    object are copied onto the row under their own names.
+
+    Empty values are stored as None when the lookup is not required.
+    """
+
+    def __init__(
+        self,
+        column: str,
+        queryset: QuerySet,
+        field: str,
+        to: str,
+        message: str,
+        required: bool = True,
+        extra: tuple[str, ...] = (),
+    ) -> None:
+        super().__init__(message)
+        self.column = column
+        self.queryset = queryset
+        self.field = field
+        self.to = to
+        self.required = required
+        self.extra = extra
+
+    def validate(self, rows: list[dict]) -> list[str | None]:
+        values = {row.get(self.column) for row in rows}
+        found = {
+            item[self.field]: item
+            for item in self.queryset.filter(**{f"{self.field}__in": values}).values(
+                self.field, "pk", *self.extra
+            )
+        }
+
+        errors = []
+        for row in rows:
+            value = row.get(self.column)
+            if not value and not self.required:
+                row[self.to] = None
+                errors.append(None)
+            elif (item := found.get(value)) is None:
+                errors.append(self.error(row))
+            else:
+                row[self.to] = item["pk"]
+                row.update({field: item[field] for field in self.extra})
+                errors.append(None)
+        return errors
+
+
+class ImportReport:
+    """
+    Outcome of an import: the Success entry of every saved row, the Failed
+    entries with their row number and error, and the throughput.
+    """
+
+    def __init__(self, headers: list[str]) -> None:
+        self.headers = headers
+        self.success = []
+        self.failed = []
+        self.started_at = time.perf_counter()
+        self.seconds = None
+
+    def fail(self, row_number: int, row: dict, error: str) -> None:
+        self.failed.append(
+            {
+                **{header: row.get(header) for header in self.headers},
+                "row": row_number,
+                "error": error,
+            }
+        )
+
+    def finish(self) -> None:
+        self.seconds = time.perf_counter() - self.started_at
+
+    @property
+    def rows(self) -> int:
+        return len(self.success) + len(self.failed)
+
+    @property
+    def rows_per_second(self) -> float:
+        return round(self.rows / self.seconds, 1) if self.seconds else 0.0
+
+    def get_response(self) -> dict:
+        return {
+            "Success": self.success,
+            "Failed": self.failed,
+            "Stats": {
+                "rows": self.rows,
+                "seconds": round(self.seconds or 0, 3),
+                "rows_per_second": self.rows_per_second,
+            },
+        }
+
+
+class BulkImporter(ABC):
+    """
+    Imports the rows of an uploaded workbook into `model` in bounded memory.
+
+    Rows are streamed from the file and handled `chunk_size` at a time: the
+    stages returned by get_stages() validate the chunk in order, each row
+    stopping at its first error, build() turns the remaining rows into unsaved
+    instances and the chunk is inserted with one bulk_create in a savepoint. If
+    the insert fails, the chunk is retried row by row so only the offending rows
+    are reported. Each chunk commits in its own transaction, so no lock is held
+    for the whole file and an error part way keeps the chunks before it.
+
+    Usage:
+        report = TaskImporter(user_id).run(file_obj)
+        return CustomResponse(response=report.get_response()).get_success_response()
+    """
+
+    model: type[Model] = None
+    headers: list[str] = []
+    chunk_size = 1000
+
+    def __init__(self, actor_id: str) -> None:
+        self.actor_id = actor_id
+
+    def get_stages(self) -> list[Stage]:
+        """
+        The validation stages of one import. Stages keep state across chunks, so
+        a new list is built for every run.
+        """
+        return []
+
+    @abstractmethod
+    def build(self, row: dict) -> Model:
+        """The unsaved instance of a row that passed every stage."""
+
+    def describe(self, instance: Model, row: dict) -> dict:
+        """The Success entry of a saved row."""
+        return {header: row.get(header) for header in self.headers}
+
+    def saved(self, instances: list[Model], rows: list[dict]) -> None:
+        """
+        Called with the instances of every chunk once they are inserted, inside
+        the chunk's transaction. bulk_create sends no post_save, use
+        send_post_save() where the model has receivers.
+        """
+
+    def run(self, file_obj) -> ImportReport:
+        """
+        Raises ValueError if the file cannot be read or misses one of the headers.
+        """
+        with SheetReader(file_obj) as reader:
+            for header in self.headers:
+                if header not in reader.headers:
+                    raise ValueError(f"{header} does not exist in the file.")
+
+            stages = self.get_stages()
+            report = ImportReport(self.headers)
+            rows = iter(reader)
+
+            while chunk := list(islice(rows, self.chunk_size)):
+                with transaction.atomic():
+                    self.import_chunk(chunk, stages, report)
+
+        report.finish()
+        return report
+
+    def import_chunk(
+        self, chunk: list[tuple[int, dict]], stages: list[Stage], report: ImportReport
+    ) -> None:
+        for stage in stages:
+            if not chunk:
+                return
+            errors = stage.validate([row for _, row in chunk])
+            for (row_number, row), error in zip(chunk, errors):
+                if error:
+                    report.fail(row_number, row, error)
+            chunk = [item for item, error in zip(chunk, errors) if not error]
+
+        if not chunk:
+            return
+
+        instances = [self.build(row) for _, row in chunk]
+        try:
+            with transaction.atomic():
+                self.model.objects.bulk_create(instances)
+            inserted = list(zip(chunk, instances))
+        except DatabaseError:
+            inserted = self.insert_each(chunk, instances, report)
+
+        if not inserted:
+            return
+        self.saved(
+            [instance for _, instance in inserted], [row for (_, row), _ in inserted]
+        )
+        report.success.extend(
+            self.describe(instance, row) for (_, row), instance in inserted
+        )
+
+    def insert_each(
+        self, chunk: list[tuple[int, dict]], instances: list[Model], report: ImportReport
+    ) -> list[tuple[tuple[int, dict], Model]]:
+        inserted = []
+        for (row_number, row), instance in zip(chunk, instances):
+            try:
+                with transaction.atomic():
+                    self.model.objects.bulk_create([instance])
+            except DatabaseError as e:
+                report.fail(row_number, row, f"Could not be saved: {e}")
+            else:
+                inserted.append(((row_number, row), instance))
+        return inserted
+
+
+def send_post_save(model: type[Model], instances: Iterable[Model]) -> None:
+    """
+    Sends the post_save that bulk_create skips for each created instance.
+    """
+    for instance in instances:
+        post_save.send(
+            sender=model,
+            instance=instance,
+            created=True,
+            raw=False,
+            using=instance._state.db,
+            update_fields=None,
+        )
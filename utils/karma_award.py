@@ -0,0 +1,63 @@
+import uuid
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import F
+from django.dispatch import Signal
+
+from db.task import KarmaActivityLog, TaskList, Wallet
+from utils.utils import DateTimeUtils
+
+# Sent once per award, after it commits, with the created logs, the task, the
+# karma given to each user and their user_ids. bulk_create and update() do not
+# send post_save, so receivers keeping karma derived data current listen here.
+karma_awarded = Signal()
+
+BATCH_SIZE = 500
+
+
+def award_karma(
+    user_ids: Iterable[str], task: TaskList, karma: int, actor_id: str, **log_fields
+) -> list[KarmaActivityLog]:
+    """
+    Gives `karma` for `task` to every user in one transaction: the activity logs
+    are inserted with bulk_create and the wallets incremented in the database
+    with one UPDATE per batch of users, so concurrent awards never overwrite
+    each other. Extra keyword arguments are set on every log.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids:
+        return []
+
+    now = DateTimeUtils.get_current_utc_time()
+    logs = [
+        KarmaActivityLog(
+            id=uuid.uuid4(),
+            user_id=user_id,
+            karma=karma,
+            task=task,
+            updated_by_id=actor_id,
+            created_by_id=actor_id,
+            **log_fields,
+        )
+        for user_id in user_ids
+    ]
+
+    with transaction.atomic():
+        KarmaActivityLog.objects.bulk_create(logs, batch_size=BATCH_SIZE)
+
+        for start in range(0, len(user_ids), BATCH_SIZE):
+            Wallet.objects.filter(user_id__in=user_ids[start: start + BATCH_SIZE]).update(
+                karma=F("karma") + karma,
+                karma_last_updated_at=now,
+                updated_by_id=actor_id,
+                updated_at=now,
+            )
+
+        transaction.on_commit(
+            lambda: karma_awarded.send(
+                sender=KarmaActivityLog, logs=logs, task=task, karma=karma, user_ids=user_ids
+            )
+        )
+
+    return logs
@@ -0,0 +1,494 @@
+from functools import lru_cache
+from typing import Iterable
+
+import redis
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, QuerySet, Sum, Value, Window
+from django.db.models.functions import Coalesce, DenseRank, Rank
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from db.organization import District, UserOrganizationLink, Zone
+from db.task import Wallet
+from db.user import Role, UserRoleLink
+from utils.karma_award import karma_awarded
+from utils.types import OrganizationType, RoleType
+from utils.utils import DateTimeUtils
+
+# Only touches an index that has been built, so a missing key keeps meaning
+# "not built yet" and lookups fall back to the database.
+UPDATE_IF_BUILT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    if ARGV[2] == '' then
+        return redis.call('ZREM', KEYS[1], ARGV[1])
+    end
+    return redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1])
+end
+return 0
+"""
+
+
+@lru_cache(maxsize=None)
+def get_redis_client() -> redis.Redis:
+    return redis.Redis.from_url(settings.CACHES["default"]["LOCATION"])
+
+
+class KarmaRankEngine:
+    """
+    Ranks users by wallet karma inside a scope (an organization, a zone, a district
+    or everyone), optionally restricted to alumni or non alumni members.
+
+    The rank is computed by the database with a RANK()/DENSE_RANK() window over the
+    scope and only the rows asked for are read back, so ranking a page of users
+    costs the same whatever the size of the college, zone or district.
+    """
+
+    RANK = "rank"
+    DENSE_RANK = "dense_rank"
+
+    FUNCTIONS = {
+        RANK: Rank,
+        DENSE_RANK: DenseRank,
+    }
+
+    def __init__(
+        self,
+        org=None,
+        zone=None,
+        district=None,
+        org_type: str = OrganizationType.COLLEGE.value,
+        is_alumni=None,
+        method: str = RANK,
+    ) -> None:
+        if method not in self.FUNCTIONS:
+            raise ValueError(f"Unknown rank method '{method}'")
+
+        self.org = org
+        self.zone = zone
+        self.district = district
+        self.org_type = org_type
+        self.is_alumni = is_alumni
+        self.method = method
+
+    @property
+    def is_global(self) -> bool:
+        return self.org is None and self.zone is None and self.district is None
+
+    def get_members(self) -> QuerySet:
+        """
+        Returns the ids of the users in scope, each user listed once.
+        """
+        links = UserOrganizationLink.objects.filter(org__org_type=self.org_type)
+
+        if self.org is not None:
+            links = links.filter(org=self.org)
+        if self.district is not None:
+            links = links.filter(org__district=self.district)
+        if self.zone is not None:
+            links = links.filter(org__district__zone=self.zone)
+        if self.is_alumni is not None:
+            links = links.filter(is_alumni=self.is_alumni)
+
+        return links.values("user_id")
+
+    def get_scope(self) -> QuerySet:
+        wallets = Wallet.objects.all()
+        if not self.is_global or self.is_alumni is not None:
+            wallets = wallets.filter(user_id__in=self.get_members())
+        return wallets
+
+    def get_ranked_sql(self) -> tuple[str, tuple]:
+        ranked = self.get_scope().annotate(
+            karma_rank=Window(
+                expression=self.FUNCTIONS[self.method](),
+                order_by=F("karma").desc(),
+            )
+        )
+        return ranked.values("user_id", "karma_rank").query.sql_with_params()
+
+    def get_ranks(self, user_ids: Iterable[str] = None) -> dict[str, int]:
+        """
+        Returns {user_id: rank} for the given users, or for everyone in scope when
+        no users are given. Users without a wallet in the scope are left out.
+        """
+        ranked_sql, params = self.get_ranked_sql()
+        query = f"SELECT user_id, karma_rank FROM ({ranked_sql}) AS ranked"
+
+        if user_ids is not None:
+            user_ids = list(user_ids)
+            if not user_ids:
+                return {}
+            placeholders = ", ".join(["%s"] * len(user_ids))
+            query += f" WHERE user_id IN ({placeholders})"
+            params = (*params, *user_ids)
+
+        with connection.cursor() as cursor:
+            cursor.execute(query, params)
+            return dict(cursor.fetchall())
+
+    def get_page_ranks(self, page) -> dict[str, int]:
+        """
+        Returns the ranks of the users on a page of User objects.
+        """
+        return self.get_ranks(user.id for user in page)
+
+
+class KarmaRankIndex:
+    """
+    Wallet karma kept in Redis sorted sets: one holding every wallet, used for
+    percentiles, one per ranked role (mentors and enablers) and a default one for
+    everybody else.
+
+    A rank or percentile is a ZCOUNT, O(log n), instead of a scan of the wallet
+    table. Wallet and role link writes made through Django keep the sets current,
+    and the build_karma_rank_index command rebuilds them to pick up karma written
+    outside of Django. Until a set is built, lookups are answered from the database.
+    """
+
+    ALL = "all"
+    DEFAULT = "default"
+    ROLES = (RoleType.MENTOR.value, RoleType.ENABLER.value)
+
+    BATCH_SIZE = 5000
+    _role_ids = None
+
+    @classmethod
+    def scopes(cls) -> tuple[str, ...]:
+        return cls.ALL, cls.DEFAULT, *cls.ROLES
+
+    @staticmethod
+    def key(scope: str) -> str:
+        return f"karma_rank:{scope}"
+
+    @classmethod
+    def get_scope_for_roles(cls, roles: Iterable[str]) -> str:
+        """
+        Mentors rank among mentors, then enablers among enablers, everybody
+        else in the default scope.
+        """
+        roles = set(roles or ())
+        for role in cls.ROLES:
+            if role in roles:
+                return role
+        return cls.DEFAULT
+
+    @classmethod
+    def get_wallets(cls, scope: str) -> QuerySet:
+        wallets = Wallet.objects.all()
+        if scope == cls.DEFAULT:
+            return wallets.exclude(user__user_role_link_user__role__title__in=cls.ROLES)
+        if scope in cls.ROLES:
+            return wallets.filter(
+                user__user_role_link_user__verified=True,
+                user__user_role_link_user__role__title=scope,
+            ).distinct()
+        return wallets
+
+    @classmethod
+    def build(cls, scope: str) -> int:
+        """
+        Rebuilds a scope into a staging key and swaps it in atomically.
+        """
+        client = get_redis_client()
+        key = cls.key(scope)
+        staging_key = f"{key}:building"
+        client.delete(staging_key)
+
+        count = 0
+        mapping = {}
+        wallets = cls.get_wallets(scope).values_list("user_id", "karma")
+        for user_id, karma in wallets.iterator(chunk_size=cls.BATCH_SIZE):
+            mapping[user_id] = karma
+            if len(mapping) >= cls.BATCH_SIZE:
+                client.zadd(staging_key, mapping)
+                count += len(mapping)
+                mapping = {}
+
+        if mapping:
+            client.zadd(staging_key, mapping)
+            count += len(mapping)
+
+        if count:
+            client.rename(staging_key, key)
+        else:
+            client.delete(key)
+        return count
+
+    @classmethod
+    def build_all(cls) -> dict[str, int]:
+        return {scope: cls.build(scope) for scope in cls.scopes()}
+
+    @classmethod
+    def get_rank(cls, karma: int, roles: Iterable[str] = ()) -> int:
+        """
+        Returns the rank for a karma value among the users sharing the role scope.
+        Users with the same karma share a rank.
+        """
+        scope = cls.get_scope_for_roles(roles)
+        key = cls.key(scope)
+
+        with get_redis_client().pipeline() as pipe:
+            pipe.exists(key)
+            pipe.zcount(key, f"({karma}", "+inf")
+            built, above = pipe.execute()
+
+        if not built:
+            above = cls.get_wallets(scope).filter(karma__gt=karma).count()
+        return above + 1
+
+    @classmethod
+    def get_percentile(cls, karma: int) -> float:
+        """
+        Returns the percentage of wallets that do not have less karma.
+        """
+        key = cls.key(cls.ALL)
+
+        with get_redis_client().pipeline() as pipe:
+            pipe.exists(key)
+            pipe.zcount(key, "-inf", f"({karma}")
+            pipe.zcard(key)
+            built, below, total = pipe.execute()
+
+        if not built:
+            below = Wallet.objects.filter(karma__lt=karma).count()
+            total = Wallet.objects.count()
+        return 0 if total == 0 else 100 - ((below * 100) / total)
+
+    @classmethod
+    def get_role_ids(cls) -> set[str]:
+        """ids of the ranked roles, loaded once per process"""
+        if cls._role_ids is None:
+            cls._role_ids = set(
+                Role.objects.filter(title__in=cls.ROLES).values_list("id", flat=True)
+            )
+        return cls._role_ids
+
+    @classmethod
+    def update_user(cls, user_id: str) -> None:
+        """
+        Moves a user to their current karma in every scope they belong to and out
+        of the others. Call it after writing karma with QuerySet.update().
+        """
+        cls.update_users([user_id])
+
+    @classmethod
+    def update_users(cls, user_ids: Iterable[str]) -> None:
+        """
+        update_user for many users, with two queries and one pipeline per batch.
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        client = get_redis_client()
+        update_if_built = client.register_script(UPDATE_IF_BUILT)
+
+        for start in range(0, len(user_ids), cls.BATCH_SIZE):
+            batch = user_ids[start: start + cls.BATCH_SIZE]
+            karma = dict(
+                Wallet.objects.filter(user_id__in=batch).values_list("user_id", "karma")
+            )
+            role_links = {}
+            for user_id, title, verified in UserRoleLink.objects.filter(
+                user_id__in=batch, role__title__in=cls.ROLES
+            ).values_list("user_id", "role__title", "verified"):
+                role_links.setdefault(user_id, []).append((title, verified))
+
+            with client.pipeline() as pipe:
+                for user_id in batch:
+                    links = role_links.get(user_id, [])
+                    member_of = {cls.ALL}
+                    if not links:
+                        member_of.add(cls.DEFAULT)
+                    member_of.update(title for title, verified in links if verified)
+
+                    user_karma = karma.get(user_id)
+                    for scope in cls.scopes():
+                        score = (
+                            user_karma if user_karma is not None and scope in member_of else ""
+                        )
+                        update_if_built(keys=[cls.key(scope)], args=[user_id, score], client=pipe)
+                pipe.execute()
+
+
+@receiver(post_save, sender=Wallet)
+@receiver(post_delete, sender=Wallet)
+@receiver(post_save, sender=UserRoleLink)
+@receiver(post_delete, sender=UserRoleLink)
+def update_karma_rank_index(sender, instance, *args, **kwargs):
+    if sender is UserRoleLink and instance.role_id not in KarmaRankIndex.get_role_ids():
+        return
+
+    user_id = instance.user_id
+    transaction.on_commit(lambda: KarmaRankIndex.update_user(user_id))
+
+
+@receiver(karma_awarded)
+def update_karma_rank_index_for_award(sender, user_ids, **kwargs):
+    KarmaRankIndex.update_users(user_ids)
+
+
+class OrgRanking:
+    """
+    Ranking of organizations, districts or zones by the wallet karma of their
+    verified members, either over everything or inside one zone or district.
+
+    Each table is computed with one GROUP BY query and stored in Redis as a
+    sorted set of group ids scored by rank and a hash of their karma, so a rank
+    or karma lookup reads one entry and a top-N read one range, whatever the
+    number of groups. Tables are rebuilt every ORG_RANKING_REFRESH_INTERVAL
+    seconds, by the build_org_rankings command or by the first read that finds
+    them expired.
+    """
+
+    ORG = "org"
+    DISTRICT = "district"
+    ZONE = "zone"
+
+    GROUP_FIELDS = {
+        ORG: "org",
+        DISTRICT: "org__district",
+        ZONE: "org__district__zone",
+    }
+
+    def __init__(
+        self,
+        group: str = ORG,
+        org_type: str = OrganizationType.COLLEGE.value,
+        zone=None,
+        district=None,
+    ) -> None:
+        if group not in self.GROUP_FIELDS:
+            raise ValueError(f"Unknown ranking group '{group}'")
+
+        self.group = group
+        self.org_type = org_type
+        self.zone_id = getattr(zone, "id", zone)
+        self.district_id = getattr(district, "id", district)
+        # group id: (rank, karma), filled by the lookups of this instance
+        self._entries = {}
+        # the whole table, set once this instance has built it
+        self._rows = None
+
+    def key(self) -> str:
+        scope = (
+            f"district={self.district_id}" if self.district_id
+            else f"zone={self.zone_id}" if self.zone_id
+            else "global"
+        )
+        return f"org_ranking:{self.org_type}:{self.group}:{scope}"
+
+    def get_queryset(self) -> QuerySet:
+        links = UserOrganizationLink.objects.filter(
+            org__org_type=self.org_type, verified=True
+        )
+        if self.district_id:
+            links = links.filter(org__district_id=self.district_id)
+        elif self.zone_id:
+            links = links.filter(org__district__zone_id=self.zone_id)
+
+        group_field = self.GROUP_FIELDS[self.group]
+        tie_breaker = "org__created_at" if self.group == self.ORG else group_field
+        return (
+            links.exclude(**{f"{group_field}__isnull": True})
+            .values_list(group_field)
+            .annotate(total_karma=Coalesce(Sum("user__wallet_user__karma"), Value(0)))
+            .order_by("-total_karma", tie_breaker)
+        )
+
+    def build(self) -> list[tuple[str, int]]:
+        rows = list(self.get_queryset())
+        key = self.key()
+        timeout = settings.ORG_RANKING_REFRESH_INTERVAL
+
+        # MULTI/EXEC, readers see either the old table or the new one
+        with get_redis_client().pipeline() as pipe:
+            pipe.delete(f"{key}:ranks", f"{key}:karma")
+            if rows:
+                pipe.zadd(
+                    f"{key}:ranks",
+                    {group_id: rank for rank, (group_id, _) in enumerate(rows, start=1)},
+                )
+                pipe.hset(f"{key}:karma", mapping=dict(rows))
+                pipe.expire(f"{key}:ranks", timeout)
+                pipe.expire(f"{key}:karma", timeout)
+            pipe.set(key, DateTimeUtils.get_current_utc_time().isoformat(), ex=timeout)
+            pipe.execute()
+
+        self._entries = {
+            group_id: (rank, karma)
+            for rank, (group_id, karma) in enumerate(rows, start=1)
+        }
+        self._rows = rows
+        return rows
+
+    def get_entry(self, group_id: str) -> tuple[int | None, int | None]:
+        """
+        Returns the (rank, total karma) of a group, (None, None) if it is not
+        ranked. The table is built if it has expired.
+        """
+        if group_id in self._entries or self._rows is not None:
+            return self._entries.get(group_id, (None, None))
+
+        key = self.key()
+        with get_redis_client().pipeline(transaction=False) as pipe:
+            pipe.exists(key)
+            pipe.zscore(f"{key}:ranks", group_id)
+            pipe.hget(f"{key}:karma", group_id)
+            built, rank, karma = pipe.execute()
+
+        if not built:
+            self.build()
+            return self._entries.get(group_id, (None, None))
+
+        entry = (None, None) if rank is None else (int(rank), int(karma))
+        self._entries[group_id] = entry
+        return entry
+
+    def get_rank(self, group_id: str) -> int | None:
+        return self.get_entry(group_id)[0]
+
+    def get_karma(self, group_id: str) -> int | None:
+        return self.get_entry(group_id)[1]
+
+    def get_top(self, limit: int) -> list[tuple[str, int]]:
+        """
+        Returns the first rows of the ranking as (id, total karma).
+        """
+        if limit <= 0:
+            return []
+        if self._rows is None:
+            key = self.key()
+            client = get_redis_client()
+            with client.pipeline(transaction=False) as pipe:
+                pipe.exists(key)
+                pipe.zrange(f"{key}:ranks", 0, limit - 1)
+                built, group_ids = pipe.execute()
+
+            if built:
+                group_ids = [group_id.decode() for group_id in group_ids]
+                karma = client.hmget(f"{key}:karma", group_ids) if group_ids else []
+                for rank, (group_id, value) in enumerate(zip(group_ids, karma), start=1):
+                    self._entries[group_id] = (rank, int(value))
+                return [(group_id, self._entries[group_id][1]) for group_id in group_ids]
+
+            self.build()
+
+        return self._rows[:limit]
+
+    @classmethod
+    def build_all(cls, org_type: str = OrganizationType.COLLEGE.value) -> list["OrgRanking"]:
+        """
+        Rebuilds the global tables and the per zone and per district tables
+        served by the dashboards.
+        """
+        rankings = [cls(group, org_type) for group in cls.GROUP_FIELDS]
+        rankings += [
+            cls(cls.DISTRICT, org_type, zone=zone_id)
+            for zone_id in Zone.objects.values_list("id", flat=True)
+        ]
+        rankings += [
+            cls(cls.ORG, org_type, district=district_id)
+            for district_id in District.objects.values_list("id", flat=True)
+        ]
+        for ranking in rankings:
+            ranking.build()
+        return rankings
@@ -0,0 +1,140 @@
+import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import DateField, QuerySet, Sum
+from django.db.models.functions import Trunc
+
+from db.organization import UserOrganizationLink
+from db.task import KarmaActivityLog
+from utils.utils import DateTimeUtils
+
+
+class KarmaSeries:
+    """
+    Karma earned per day, week or month inside a scope (an organization, a
+    district, a zone, an interest group or everyone).
+
+    All the buckets missing from the cache are read with a single GROUP BY query
+    and buckets with no karma are filled with zeros. Closed buckets, which no
+    longer change, are cached for KARMA_SERIES_CACHE_TIMEOUT seconds while the
+    current one is always read from the database.
+    """
+
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+    INTERVALS = (DAY, WEEK, MONTH)
+
+    def __init__(self, org=None, district=None, zone=None, ig=None) -> None:
+        self.org = org
+        self.district = district
+        self.zone = zone
+        self.ig = ig
+
+    @property
+    def scope_key(self) -> str:
+        return ":".join(
+            f"{name}={getattr(scope, 'id', scope)}"
+            for name, scope in (
+                ("org", self.org),
+                ("district", self.district),
+                ("zone", self.zone),
+                ("ig", self.ig),
+            )
+            if scope is not None
+        ) or "global"
+
+    def key(self, interval: str, bucket: datetime.date) -> str:
+        return f"karma_series:{self.scope_key}:{interval}:{bucket.isoformat()}"
+
+    def get_logs(self) -> QuerySet:
+        logs = KarmaActivityLog.objects.all()
+
+        links = UserOrganizationLink.objects.all()
+        if self.org is not None:
+            links = links.filter(org=self.org)
+        if self.district is not None:
+            links = links.filter(org__district=self.district)
+        if self.zone is not None:
+            links = links.filter(org__district__zone=self.zone)
+        if self.org is not None or self.district is not None or self.zone is not None:
+            logs = logs.filter(user_id__in=links.values("user_id"))
+
+        if self.ig is not None:
+            logs = logs.filter(task__ig=self.ig)
+        return logs
+
+    @classmethod
+    def get_bucket_start(cls, interval: str, day: datetime.date) -> datetime.date:
+        if interval == cls.WEEK:
+            return day - datetime.timedelta(days=day.weekday())
+        if interval == cls.MONTH:
+            return day.replace(day=1)
+        return day
+
+    @classmethod
+    def get_previous_bucket(cls, interval: str, bucket: datetime.date) -> datetime.date:
+        if interval == cls.WEEK:
+            return bucket - datetime.timedelta(weeks=1)
+        if interval == cls.MONTH:
+            return (bucket - datetime.timedelta(days=1)).replace(day=1)
+        return bucket - datetime.timedelta(days=1)
+
+    def get_buckets(self, interval: str, periods: int) -> list[datetime.date]:
+        """
+        Returns the start of the last `periods` buckets, the current one first.
+        """
+        bucket = self.get_bucket_start(
+            interval, DateTimeUtils.get_current_utc_time().date()
+        )
+        buckets = []
+        for _ in range(periods):
+            buckets.append(bucket)
+            bucket = self.get_previous_bucket(interval, bucket)
+        return buckets
+
+    def aggregate(self, interval: str, since: datetime.date) -> dict[datetime.date, int]:
+        return dict(
+            self.get_logs()
+            .filter(created_at__date__gte=since)
+            .annotate(bucket=Trunc("created_at", interval, output_field=DateField()))
+            .values_list("bucket")
+            .annotate(karma=Sum("karma"))
+            .order_by()
+        )
+
+    def get(self, interval: str = DAY, periods: int = 7) -> dict[datetime.date, int]:
+        """
+        Returns {bucket start: karma} for the last `periods` buckets, the current
+        one first.
+        """
+        if interval not in self.INTERVALS:
+            raise ValueError(f"Unknown interval '{interval}'")
+
+        buckets = self.get_buckets(interval, periods)
+        current, closed = buckets[0], buckets[1:]
+
+        closed_keys = {self.key(interval, bucket): bucket for bucket in closed}
+        karma = {
+            closed_keys[key]: value
+            for key, value in cache.get_many(list(closed_keys)).items()
+        }
+
+        missing = [bucket for bucket in buckets if bucket not in karma]
+        if missing:
+            fetched = self.aggregate(interval, min(missing))
+            for bucket in missing:
+                karma[bucket] = fetched.get(bucket) or 0
+
+            cache.set_many(
+                {
+                    self.key(interval, bucket): karma[bucket]
+                    for bucket in missing
+                    if bucket != current
+                },
+                settings.KARMA_SERIES_CACHE_TIMEOUT,
+            )
+
+        return {bucket: karma[bucket] for bucket in buckets}
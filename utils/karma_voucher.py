@@ -1,5 +1,8 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from io import BytesIO
-from typing import Optional
+from typing import Iterable, Iterator
 
 from PIL import Image, ImageDraw, ImageFont
 
@@ -8,6 +11,28 @@ import time
 image_location = './api/dashboard/karma_voucher/assets/karmacard.png'
 font_location =  './api/dashboard/karma_voucher/fonts/Roboto-Light.ttf'
 
+# (field, position, font size) of each text drawn on the card
+VOUCHER_LAYOUT = (
+    ("name", (135, 250), 60),
+    ("hashtag", (135, 450), 45),
+    ("karma", (920, 135), 45),
+    ("code", (135, 135), 20),
+    ("month", (135, 375), 30),
+)
+
+
+@lru_cache(maxsize=1)
+def load_template() -> Image.Image:
+    """decodes the card template once per process"""
+    with Image.open(image_location) as image:
+        return image.convert('RGB')
+
+
+@lru_cache(maxsize=None)
+def load_font(size: int) -> ImageFont.FreeTypeFont:
+    return ImageFont.truetype(font_location, size=size)
+
+
 def generate_karma_voucher(name, hashtag, karma, code, month):
     """
     Generate a karma voucher for the given users
@@ -17,43 +42,42 @@ def generate_karma_voucher(name, hashtag, karma, code, month):
     :param code:
     :param month:
     :return:
-    """   
-
-
-    image = Image.open(image_location)
-    image = image.convert('RGB')
+    """
+    fields = {"name": name, "hashtag": hashtag, "karma": karma, "code": code, "month": month}
 
+    image = load_template().copy()
     draw = ImageDraw.Draw(image)
-    x = 135
-    y = 250
-    font1 = ImageFont.truetype(font_location, size=60)
-    draw.text((x, y), name, fill=(255, 255, 255), font=font1)
-
-    x1 = 135
-    y1 = 450
-    font2 = ImageFont.truetype(font_location, size=45)
-    draw.text((x1, y1), hashtag, fill=(255, 255, 255), font=font2)
-
-    x2 = 920
-    y2 = 135
-    font3 = ImageFont.truetype(font_location, size=45)
-    draw.text((x2, y2), karma, fill=(255, 255, 255), font=font3)
-
-    x3 = 135
-    y3 = 135
-    font3 = ImageFont.truetype(font_location, size=20)
-    draw.text((x3, y3), code, fill=(255, 255, 255), font=font3)
-
-    x3 = 135
-    y3 = 375
-    font3 = ImageFont.truetype(font_location, size=30)
-    draw.text((x3, y3), month, fill=(255, 255, 255), font=font3)
+    for field, position, size in VOUCHER_LAYOUT:
+        draw.text(position, fields[field], fill=(255, 255, 255), font=load_font(size))
 
     image_data = BytesIO()
     image.save(image_data, format='JPEG')
     return image_data
 
 
+def render_karma_voucher(fields: dict) -> bytes:
+    """process pool entry point, returns the JPEG bytes of one voucher"""
+    return generate_karma_voucher(**fields).getvalue()
+
+
+@lru_cache(maxsize=None)
+def get_render_pool(workers: int) -> ProcessPoolExecutor:
+    # spawned workers only import this module, not the forked web worker's state
+    return ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context('spawn')
+    )
+
+
+def render_karma_vouchers(vouchers: Iterable[dict], workers: int, chunk_size: int = 25) -> Iterator[bytes]:
+    """
+    Renders vouchers on a pool of worker processes, each keeping its own decoded
+    template and fonts, and yields the JPEG bytes in input order.
+    """
+    if workers <= 1:
+        return map(render_karma_voucher, vouchers)
+    return get_render_pool(workers).map(render_karma_voucher, vouchers, chunksize=chunk_size)
+
+
 def generate_ordered_id(count):
     day = time.strftime('%d')
     month = time.strftime('%m')
@@ -0,0 +1,195 @@
+import time
+import uuid
+from contextlib import suppress
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.template.loader import get_template
+
+from db.notification import MailOutbox
+from utils.utils import DateTimeUtils
+
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+FAILED = "failed"
+
+RECIPIENT_SEPARATOR = ","
+
+
+@lru_cache(maxsize=64)
+def get_mail_template(template_name: str):
+    """loads and compiles a mail template once per process"""
+    return get_template(template_name)
+
+
+class MailQueue:
+    """
+    Transactional email outbox.
+
+    Requests only render the mail and insert a MailOutbox row; the
+    send_mail_outbox worker drains pending rows in batches over one SMTP
+    connection, retrying failures with exponential backoff.
+    """
+
+    METRICS_KEY = "mail_outbox:metrics"
+
+    @staticmethod
+    def render(template_name: str, context: dict) -> str:
+        return get_mail_template(template_name).render(context)
+
+    @staticmethod
+    def enqueue(subject: str, body: str, recipients: list[str]) -> MailOutbox:
+        """
+        Queues an html mail, sent once the surrounding transaction commits.
+        """
+        now = DateTimeUtils.get_current_utc_time()
+        return MailOutbox.objects.create(
+            id=str(uuid.uuid4()),
+            subject=subject,
+            body=body,
+            from_email=settings.FROM_MAIL,
+            recipients=RECIPIENT_SEPARATOR.join(recipients),
+            status=PENDING,
+            next_attempt_at=now,
+            created_at=now,
+        )
+
+    @staticmethod
+    def claim_batch(batch_size: int) -> list[MailOutbox]:
+        """
+        Marks up to batch_size due mails as sending and returns them. Rows locked by
+        another worker are skipped, so several workers can drain the queue.
+        """
+        now = DateTimeUtils.get_current_utc_time()
+        with transaction.atomic():
+            batch = list(
+                MailOutbox.objects.select_for_update(skip_locked=True)
+                .filter(status=PENDING, next_attempt_at__lte=now)
+                .order_by("next_attempt_at")[:batch_size]
+            )
+            MailOutbox.objects.filter(id__in=[mail.id for mail in batch]).update(
+                status=SENDING, next_attempt_at=now
+            )
+        return batch
+
+    @classmethod
+    def send_batch(cls, batch: list[MailOutbox]) -> dict:
+        """
+        Sends the mails over a single connection and records the outcome of each.
+        If the connection cannot be opened every mail of the batch counts as a
+        failed attempt, so a lasting SMTP outage still reaches the dead letters.
+        """
+        sent = failed = 0
+        latencies = []
+
+        connection = get_connection()
+        try:
+            connection.open()
+        except Exception as e:
+            for mail in batch:
+                cls.mark_failed(mail, e)
+            cls.record_metrics(0, len(batch), [])
+            return {"sent": 0, "failed": len(batch)}
+
+        try:
+            for mail in batch:
+                message = EmailMultiAlternatives(
+                    subject=mail.subject,
+                    body=mail.body,
+                    from_email=mail.from_email,
+                    to=mail.recipients.split(RECIPIENT_SEPARATOR),
+                    connection=connection,
+                )
+                message.attach_alternative(mail.body, "text/html")
+
+                start = time.perf_counter()
+                try:
+                    message.send(fail_silently=False)
+                except Exception as e:
+                    failed += 1
+                    cls.mark_failed(mail, e)
+                    continue
+
+                latencies.append(time.perf_counter() - start)
+                sent += 1
+                MailOutbox.objects.filter(id=mail.id).update(
+                    status=SENT, sent_at=DateTimeUtils.get_current_utc_time()
+                )
+        finally:
+            # the mails are recorded already, a failing QUIT must not stop the worker
+            with suppress(Exception):
+                connection.close()
+
+        cls.record_metrics(sent, failed, latencies)
+        return {"sent": sent, "failed": failed}
+
+    @staticmethod
+    def mark_failed(mail: MailOutbox, error: Exception):
+        attempts = mail.attempts + 1
+        backoff = settings.MAIL_OUTBOX_RETRY_BACKOFF * 2 ** (attempts - 1)
+        MailOutbox.objects.filter(id=mail.id).update(
+            attempts=attempts,
+            last_error=str(error),
+            status=FAILED if attempts >= settings.MAIL_OUTBOX_MAX_ATTEMPTS else PENDING,
+            next_attempt_at=DateTimeUtils.get_current_utc_time()
+            + timedelta(seconds=backoff),
+        )
+
+    @staticmethod
+    def release_stale():
+        """
+        Puts back mails left in sending by a worker that died mid batch.
+        """
+        stale_before = DateTimeUtils.get_current_utc_time() - timedelta(
+            seconds=settings.MAIL_OUTBOX_SENDING_TIMEOUT
+        )
+        return MailOutbox.objects.filter(
+            status=SENDING, next_attempt_at__lt=stale_before
+        ).update(status=PENDING)
+
+    @classmethod
+    def metrics_key(cls, name: str) -> str:
+        return f"{cls.METRICS_KEY}:{name}"
+
+    @classmethod
+    def incr_metric(cls, name: str, delta: int):
+        # add is a no-op when the counter exists, incr is atomic across workers
+        key = cls.metrics_key(name)
+        cache.add(key, 0, None)
+        cache.incr(key, delta)
+
+    @classmethod
+    def record_metrics(cls, sent: int, failed: int, latencies: list[float]):
+        if sent:
+            cls.incr_metric("sent", sent)
+        if failed:
+            cls.incr_metric("failed", failed)
+        if latencies:
+            cls.incr_metric("send_latency_us", round(sum(latencies) * 1e6))
+            cache.set(cls.metrics_key("last_send_latency"), latencies[-1], None)
+
+    @classmethod
+    def get_metrics(cls) -> dict:
+        """
+        Returns the queue depth per status and the send counters and latency.
+        """
+        names = ["sent", "failed", "send_latency_us", "last_send_latency"]
+        values = cache.get_many([cls.metrics_key(name) for name in names])
+        sent, failed, latency_us, last_latency = (
+            values.get(cls.metrics_key(name)) for name in names
+        )
+
+        return {
+            "sent": sent or 0,
+            "failed": failed or 0,
+            "send_latency_total": (latency_us or 0) / 1e6,
+            "last_send_latency": last_latency,
+            "average_send_latency": (latency_us / 1e6 / sent) if sent and latency_us else None,
+            "queue_depth": MailOutbox.objects.filter(status=PENDING).count(),
+            "dead_letters": MailOutbox.objects.filter(status=FAILED).count(),
+        }
@@ -1,8 +1,14 @@
 import datetime
+import threading
+import time
+from dataclasses import dataclass
 from datetime import datetime
 
 import jwt
 from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.http import HttpRequest
 from rest_framework import authentication
 from rest_framework.authentication import get_authorization_header
@@ -14,7 +20,7 @@ from utils.utils import DateTimeUtils
 from .exception import UnauthorizedAccessException
 from .response import CustomResponse
 
-from db.user import DynamicRole, DynamicUser
+from db.user import DynamicRole, DynamicUser, Role
 
 
 # def get_current_utc_time():
@@ -66,14 +72,67 @@ class CustomizePermission(BasePermission):
         return f'{self.token_prefix} realm="api"'
 
 
+@dataclass(frozen=True)
+class JWTClaims:
+    """
+    The verified claims of a request's access token.
+
+    Attributes:
+        id (str): The id of the user the token was issued to.
+        muid (str): The muid of the user, if present in the token.
+        roles (list[str]): The roles of the user, if present in the token.
+        expiry (datetime): The parsed expiry of the token.
+        payload (dict): The raw decoded payload.
+    """
+
+    id: str | None
+    muid: str | None
+    roles: list[str] | None
+    expiry: datetime | None
+    payload: dict
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> "JWTClaims":
+        expiry = payload.get("expiry")
+        return cls(
+            id=payload.get("id"),
+            muid=payload.get("muid"),
+            roles=payload.get("roles"),
+            expiry=datetime.strptime(expiry, "%Y-%m-%d %H:%M:%S%z") if expiry else None,
+            payload=payload,
+        )
+
+
 class JWTUtils:
+    CLAIMS_ATTRIBUTE = "_jwt_claims"
+
     @staticmethod
-    def fetch_role(request):
+    def _get_http_request(request) -> HttpRequest:
+        # DRF wraps the HttpRequest, keep the claims on the inner one so the view,
+        # the decorators and the middleware all share them
+        return getattr(request, "_request", request)
+
+    @staticmethod
+    def get_claims(request) -> JWTClaims:
+        """
+        Returns the claims of the request's bearer token, decoding and verifying
+        the token only the first time they are asked for in a request.
+        """
+        http_request = JWTUtils._get_http_request(request)
+        if (claims := getattr(http_request, JWTUtils.CLAIMS_ATTRIBUTE, None)) is not None:
+            return claims
+
         token = authentication.get_authorization_header(request).decode("utf-8").split()
         payload = jwt.decode(
             token[1], settings.SECRET_KEY, algorithms=["HS256"], verify=True
         )
-        roles = payload.get("roles")
+        claims = JWTClaims.from_payload(payload)
+        setattr(http_request, JWTUtils.CLAIMS_ATTRIBUTE, claims)
+        return claims
+
+    @staticmethod
+    def fetch_role(request):
+        roles = JWTUtils.get_claims(request).roles
         if roles is None:
             raise Exception(
                 "The corresponding JWT token does not contain the 'roles' key"
@@ -82,11 +141,7 @@ class JWTUtils:
 
     @staticmethod
     def fetch_user_id(request):
-        token = authentication.get_authorization_header(request).decode("utf-8").split()
-        payload = jwt.decode(
-            token[1], settings.SECRET_KEY, algorithms=["HS256"], verify=True
-        )
-        user_id = payload.get("id")
+        user_id = JWTUtils.get_claims(request).id
         if user_id is None:
             raise Exception(
                 "The corresponding JWT token does not contain the 'user_id' key"
@@ -95,11 +150,7 @@ class JWTUtils:
 
     @staticmethod
     def fetch_muid(request):
-        token = authentication.get_authorization_header(request).decode("utf-8").split()
-        payload = jwt.decode(
-            token[1], settings.SECRET_KEY, algorithms=["HS256"], verify=True
-        )
-        muid = payload.get("muid")
+        muid = JWTUtils.get_claims(request).muid
         if muid is None:
             raise Exception(
                 "The corresponding JWT token does not contain the 'muid' key"
@@ -109,7 +160,6 @@ class JWTUtils:
     @staticmethod
     def is_jwt_authenticated(request):
         token_prefix = "Bearer"
-        secret_key = SECRET_KEY
         try:
             auth_header = get_authorization_header(request).decode("utf-8")
             if not auth_header or not auth_header.startswith(token_prefix):
@@ -119,15 +169,16 @@ class JWTUtils:
             if not token:
                 raise UnauthorizedAccessException("Empty Token")
 
-            payload = jwt.decode(token, secret_key, algorithms=["HS256"], verify=True)
+            claims = JWTUtils.get_claims(request)
 
-            user_id = payload.get("id")
-            expiry = datetime.strptime(payload.get("expiry"), "%Y-%m-%d %H:%M:%S%z")
-
-            if not user_id or expiry < DateTimeUtils.get_current_utc_time():
+            if (
+                not claims.id
+                or claims.expiry is None
+                or claims.expiry < DateTimeUtils.get_current_utc_time()
+            ):
                 raise UnauthorizedAccessException("Token Expired or Invalid")
 
-            return None, payload
+            return None, claims.payload
         except jwt.exceptions.InvalidSignatureError as e:
             raise UnauthorizedAccessException(
                 {
@@ -181,20 +232,93 @@ def role_required(roles):
     return decorator
 
 
+class DynamicPermissionIndex:
+    """
+    In-process index of the role titles and user ids allowed for each dynamic type.
+
+    Entries are built from the database once and then served from memory, so
+    dynamic_role_required does not query DynamicRole and DynamicUser on every
+    request. Any change to those tables bumps a version kept in the shared cache,
+    which makes every process rebuild its entries; the TTL bounds staleness for
+    changes that bypass signals, such as queryset updates.
+    """
+
+    TTL = 300
+    VERSION_KEY = "dynamic_permission_index:version"
+    ENTRY_KEY = "dynamic_permission_index:{type}"
+
+    _entries = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def _get_version(cls) -> int:
+        return cache.get(cls.VERSION_KEY, 0)
+
+    @classmethod
+    def _load(cls, type: str) -> tuple[frozenset, frozenset]:
+        roles = frozenset(
+            DynamicRole.objects.filter(type=type).values_list("role__title", flat=True)
+        )
+        users = frozenset(
+            DynamicUser.objects.filter(type=type).values_list("user_id", flat=True)
+        )
+        return roles, users
+
+    @classmethod
+    def get(cls, type: str) -> tuple[frozenset, frozenset]:
+        """
+        Returns the frozen sets of role titles and user ids allowed for the type.
+        """
+        version = cls._get_version()
+        entry = cls._entries.get(type)
+        if entry and entry[0] == version and entry[1] > time.monotonic():
+            return entry[2], entry[3]
+
+        with cls._lock:
+            shared = cache.get(cls.ENTRY_KEY.format(type=type))
+            if shared and shared[0] == version:
+                roles, users = shared[1], shared[2]
+            else:
+                roles, users = cls._load(type)
+                cache.set(
+                    cls.ENTRY_KEY.format(type=type), (version, roles, users), cls.TTL
+                )
+
+            cls._entries[type] = (version, time.monotonic() + cls.TTL, roles, users)
+        return roles, users
+
+    @classmethod
+    def invalidate(cls):
+        """
+        Drops the index in this process and, through the shared version, in every
+        other process.
+        """
+        cls._entries.clear()
+        try:
+            cache.incr(cls.VERSION_KEY)
+        except ValueError:
+            cache.set(cls.VERSION_KEY, 1, None)
+
+
+@receiver(post_save, sender=DynamicRole)
+@receiver(post_save, sender=DynamicUser)
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=DynamicRole)
+@receiver(post_delete, sender=DynamicUser)
+@receiver(post_delete, sender=Role)
+def invalidate_dynamic_permission_index(sender, instance, *args, **kwargs):
+    DynamicPermissionIndex.invalidate()
+
+
 def dynamic_role_required(type):
     def decorator(view_func):
         def wrapped_view_func(obj, request, *args, **kwargs):
-            dynamic_roles = DynamicRole.objects.filter(type=type).values_list('role__title', flat=True)
-            roles = set(dynamic_roles)
-            for role in JWTUtils.fetch_role(request):
-                if role in roles:
-                    response = view_func(obj, request, *args, **kwargs)
-                    return response
-            dynamic_users = DynamicUser.objects.filter(type=type).values_list('user__id', flat=True)
-            user = JWTUtils.fetch_user_id(request)
-            if user in dynamic_users:
-                response = view_func(obj, request, *args, **kwargs)
-                return response
+            roles, users = DynamicPermissionIndex.get(type)
+            if not roles.isdisjoint(JWTUtils.fetch_role(request)) or (
+                JWTUtils.fetch_user_id(request) in users
+            ):
+                return view_func(obj, request, *args, **kwargs)
+
             res = CustomResponse().get_unauthorized_response()
             return res
 
@@ -0,0 +1,89 @@
+import hashlib
+import os
+from io import BytesIO
+
+from decouple import config as decouple_config
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.views.decorators.http import condition
+from django.views.static import serve
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+PROFILE_PIC_DIR = "user/profile"
+
+# name: edge in pixels of the square variants generated on upload, sized for
+# 2x screens (list avatars, cards, the profile page)
+PROFILE_PIC_SIZES = {
+    "small": 96,
+    "medium": 256,
+    "large": 512,
+}
+
+# variants are named after the upload's content hash, so a URL never changes meaning
+PROFILE_PIC_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def get_profile_pic_path(content_hash: str, size: str) -> str:
+    return f"{PROFILE_PIC_DIR}/{content_hash[:2]}/{content_hash}-{PROFILE_PIC_SIZES[size]}.webp"
+
+
+def get_profile_pic_url(content_hash: str | None, size: str = "large") -> str | None:
+    """URL of one variant, built without touching the storage"""
+    if not content_hash:
+        return None
+    return f"{decouple_config('BE_DOMAIN_NAME')}{settings.MEDIA_URL}{get_profile_pic_path(content_hash, size)}"
+
+
+def save_profile_pic(pic) -> str:
+    """
+    Generates every size of an uploaded picture and returns its content hash.
+    Pictures that were uploaded before are not processed again.
+
+    Raises ValueError if the upload is not an image Pillow can read.
+    """
+    data = pic.read()
+    content_hash = hashlib.sha256(data).hexdigest()
+
+    fs = FileSystemStorage()
+    missing = {
+        size: path
+        for size in PROFILE_PIC_SIZES
+        if not fs.exists(path := get_profile_pic_path(content_hash, size))
+    }
+    if not missing:
+        return content_hash
+
+    try:
+        with Image.open(BytesIO(data)) as image:
+            # lets JPEG decode at a reduced scale instead of full resolution
+            image.draft("RGB", (max(PROFILE_PIC_SIZES.values()),) * 2)
+            image = ImageOps.exif_transpose(image)
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        raise ValueError("Expected an image") from e
+
+    for size, path in missing.items():
+        edge = PROFILE_PIC_SIZES[size]
+        variant = ImageOps.fit(image, (edge, edge), Image.LANCZOS)
+        output = BytesIO()
+        variant.save(output, format="WEBP", quality=80, method=6)
+        fs.save(path, ContentFile(output.getvalue()))
+
+    return content_hash
+
+
+def get_profile_pic_etag(request, path):
+    # the path already carries the content hash and size
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+@condition(etag_func=get_profile_pic_etag)
+def serve_profile_pic(request, path):
+    """
+    Serves a profile picture variant with an ETag and Last-Modified, letting
+    browsers and proxies keep it for a year.
+    """
+    response = serve(request, f"{PROFILE_PIC_DIR}/{path}", document_root=settings.MEDIA_ROOT)
+    response["Cache-Control"] = PROFILE_PIC_CACHE_CONTROL
+    return response
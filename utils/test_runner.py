@@ -0,0 +1,25 @@
+from django.apps import apps
+from django.test.runner import DiscoverRunner
+
+
+class UnmanagedModelTestRunner(DiscoverRunner):
+    """
+    The db models are unmanaged, the schema lives in the alter scripts, and the
+    db app has no models module, so migrate never creates their tables. They are
+    created in every test database once it is set up.
+    """
+
+    def setup_databases(self, **kwargs):
+        old_config = super().setup_databases(**kwargs)
+        models = [
+            model
+            for model in apps.get_app_config("db").get_models()
+            if not model._meta.proxy
+        ]
+        # only the test databases that were created, never the real ones
+        for connection, *_ in old_config:
+            # one editor, so foreign keys are added once every table exists
+            with connection.schema_editor() as editor:
+                for model in models:
+                    editor.create_model(model)
+        return old_config
@@ -0,0 +1,148 @@
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from django.core import mail
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from db.notification import MailOutbox
+from utils.mail_outbox import FAILED, PENDING, SENDING, SENT, MailQueue
+from utils.utils import DateTimeUtils
+
+BACKOFF = 30
+MAX_ATTEMPTS = 3
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    MAIL_OUTBOX_RETRY_BACKOFF=BACKOFF,
+    MAIL_OUTBOX_MAX_ATTEMPTS=MAX_ATTEMPTS,
+)
+class MailQueueTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.now = DateTimeUtils.get_current_utc_time()
+
+    def queue_mail(self, **fields) -> MailOutbox:
+        return MailOutbox.objects.create(
+            **{
+                "id": str(uuid.uuid4()),
+                "subject": "Subject",
+                "body": "<p>Body</p>",
+                "from_email": "no-reply@mulearn.org",
+                "recipients": "user@example.com",
+                "status": PENDING,
+                "next_attempt_at": self.now,
+                **fields,
+            }
+        )
+
+    def test_claim_batch_takes_due_mails_only(self):
+        due = [self.queue_mail() for _ in range(3)]
+        self.queue_mail(next_attempt_at=self.now + timedelta(hours=1))
+        self.queue_mail(status=SENT)
+
+        batch = MailQueue.claim_batch(10)
+
+        self.assertCountEqual([m.id for m in batch], [m.id for m in due])
+        self.assertEqual(MailOutbox.objects.filter(status=SENDING).count(), 3)
+        self.assertEqual(MailQueue.claim_batch(10), [])
+
+    def test_claim_batch_respects_batch_size(self):
+        for _ in range(5):
+            self.queue_mail()
+
+        self.assertEqual(len(MailQueue.claim_batch(2)), 2)
+        self.assertEqual(MailOutbox.objects.filter(status=PENDING).count(), 3)
+
+    def test_send_batch_delivers_every_mail(self):
+        self.queue_mail(recipients="a@example.com")
+        self.queue_mail(recipients="b@example.com,c@example.com")
+
+        result = MailQueue.send_batch(MailQueue.claim_batch(10))
+
+        self.assertEqual(result, {"sent": 2, "failed": 0})
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertCountEqual(
+            [message.to for message in mail.outbox],
+            [["a@example.com"], ["b@example.com", "c@example.com"]],
+        )
+        self.assertEqual(mail.outbox[0].alternatives, [("<p>Body</p>", "text/html")])
+        self.assertFalse(MailOutbox.objects.exclude(status=SENT).exists())
+        self.assertFalse(MailOutbox.objects.filter(sent_at__isnull=True).exists())
+
+        metrics = MailQueue.get_metrics()
+        self.assertEqual(metrics["sent"], 2)
+        self.assertEqual(metrics["queue_depth"], 0)
+
+    def test_failed_send_is_retried_with_exponential_backoff(self):
+        outbox_mail = self.queue_mail()
+
+        with mock.patch(
+            "utils.mail_outbox.EmailMultiAlternatives.send", side_effect=OSError("refused")
+        ):
+            result = MailQueue.send_batch(MailQueue.claim_batch(10))
+            outbox_mail.refresh_from_db()
+
+            self.assertEqual(result, {"sent": 0, "failed": 1})
+            self.assertEqual(outbox_mail.status, PENDING)
+            self.assertEqual(outbox_mail.attempts, 1)
+            self.assertEqual(outbox_mail.last_error, "refused")
+            first_delay = outbox_mail.next_attempt_at - self.now
+            self.assertGreaterEqual(first_delay, timedelta(seconds=BACKOFF))
+            self.assertLess(first_delay, timedelta(seconds=2 * BACKOFF))
+
+            # not due yet
+            self.assertEqual(MailQueue.claim_batch(10), [])
+
+            MailOutbox.objects.filter(id=outbox_mail.id).update(next_attempt_at=self.now)
+            MailQueue.send_batch(MailQueue.claim_batch(10))
+            outbox_mail.refresh_from_db()
+
+        self.assertEqual(outbox_mail.attempts, 2)
+        self.assertGreaterEqual(
+            outbox_mail.next_attempt_at - self.now, timedelta(seconds=2 * BACKOFF)
+        )
+        self.assertEqual(MailQueue.get_metrics()["failed"], 2)
+
+    def test_mail_is_dead_lettered_after_the_last_attempt(self):
+        outbox_mail = self.queue_mail(attempts=MAX_ATTEMPTS - 1)
+
+        with mock.patch(
+            "utils.mail_outbox.EmailMultiAlternatives.send", side_effect=OSError("refused")
+        ):
+            MailQueue.send_batch(MailQueue.claim_batch(10))
+        outbox_mail.refresh_from_db()
+
+        self.assertEqual(outbox_mail.status, FAILED)
+        self.assertEqual(outbox_mail.attempts, MAX_ATTEMPTS)
+        self.assertEqual(MailQueue.claim_batch(10), [])
+        self.assertEqual(MailQueue.get_metrics()["dead_letters"], 1)
+
+    def test_connection_failure_fails_the_whole_batch(self):
+        self.queue_mail()
+        self.queue_mail()
+        connection = mock.Mock()
+        connection.open.side_effect = OSError("connection refused")
+
+        with mock.patch("utils.mail_outbox.get_connection", return_value=connection):
+            result = MailQueue.send_batch(MailQueue.claim_batch(10))
+
+        self.assertEqual(result, {"sent": 0, "failed": 2})
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertFalse(MailOutbox.objects.filter(status=SENDING).exists())
+        self.assertEqual(
+            list(MailOutbox.objects.values_list("attempts", flat=True).distinct()), [1]
+        )
+
+    def test_release_stale_puts_back_abandoned_mails(self):
+        stale = self.queue_mail(status=SENDING, next_attempt_at=self.now - timedelta(hours=1))
+        fresh = self.queue_mail(status=SENDING)
+
+        self.assertEqual(MailQueue.release_stale(), 1)
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual(stale.status, PENDING)
+        self.assertEqual(fresh.status, SENDING)
@@ -1,7 +1,7 @@
-import csv
+import base64
 import datetime
-import gzip
 import io
+import json
 from datetime import timedelta
 
 import openpyxl
@@ -9,12 +9,14 @@ import pytz
 import requests
 from decouple import config
 from django.conf import settings
-from django.core.mail import EmailMessage, send_mail
+from django.core.exceptions import FieldDoesNotExist
+from django.core.mail import EmailMessage
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
-from django.db.models import Q
-from django.db.models.query import QuerySet
-from django.http import HttpResponse
-from django.template.loader import render_to_string
+from django.db.models import F, Q
+from django.db.models.query import ModelIterable, QuerySet, ValuesIterable
+from django.http import StreamingHttpResponse
+
+from .export import StreamingExport
 
 
 class CommonUtils:
@@ -38,6 +40,12 @@ class CommonUtils:
 
         Returns:
             - QuerySet or dict: The paginated queryset or a dictionary containing the paginated queryset and pagination information.
+
+        Passing a ``cursor`` query parameter (empty for the first page) switches to
+        keyset pagination, which skips the ``COUNT(*)`` and ``OFFSET`` of the page
+        based mode and returns ``nextCursor``/``prevCursor`` instead of page numbers.
+        Grouped querysets and orderings on more than one field keep the page based
+        mode.
         """
         if sort_fields is None:
             sort_fields = {}
@@ -61,6 +69,16 @@ class CommonUtils:
                     sort_field_name = f"-{sort_field_name}"
 
                 queryset = queryset.order_by(sort_field_name)
+
+        if (
+            is_pagination
+            and "cursor" in request.query_params
+            and _CursorPaginator.supports(queryset)
+        ):
+            return _CursorPaginator.paginate(
+                queryset, request.query_params.get("cursor"), per_page
+            )
+
         if is_pagination:
             paginator = Paginator(queryset, per_page)
             try:
@@ -86,24 +104,218 @@ class CommonUtils:
         return queryset
 
     @staticmethod
-    def generate_csv(queryset: QuerySet, csv_name: str) -> HttpResponse:
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = f'attachment; filename="{csv_name}.csv"'
-        fieldnames = list(queryset[0].keys())
-        writer = csv.DictWriter(response, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(queryset)
-
-        compressed_response = HttpResponse(
-            gzip.compress(response.content),
-            content_type="text/csv",
+    def generate_csv(queryset: QuerySet, csv_name: str) -> StreamingHttpResponse:
+        """
+        Streams the rows as a gzip compressed CSV download.
+        Prefer StreamingExport.from_queryset for new exports so rows are read lazily.
+        """
+        return StreamingExport(queryset, csv_name).csv_response()
+
+
+class _CursorPaginator:
+    """
+    Keyset pagination over a queryset ordered by a single sort key and the primary key.
+
+    The cursor is an opaque url-safe token holding the sort field, the sort key and
+    primary key of the boundary row, and the direction to move in. Each page is
+    fetched with a ``WHERE (key, pk) > (last_key, last_pk)`` style filter so its cost
+    does not depend on how deep into the result set it is.
+    """
+
+    KEY_ALIAS = "_cursor_key"
+    PK_ALIAS = "_cursor_pk"
+
+    @staticmethod
+    def encode(field: str, value, pk, direction: str) -> str:
+        if isinstance(value, (datetime.date, datetime.datetime)):
+            value = value.isoformat()
+        elif value is not None and not isinstance(value, (int, float, bool, str)):
+            value = str(value)
+
+        payload = json.dumps(
+            {"f": field, "v": value, "id": str(pk), "d": direction},
+            separators=(",", ":"),
         )
-        compressed_response[
-            "Content-Disposition"
-        ] = f'attachment; filename="{csv_name}.csv"'
-        compressed_response["Content-Encoding"] = "gzip"
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
 
-        return compressed_response
+    @staticmethod
+    def decode(cursor: str):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            return payload["f"], payload["v"], payload["id"], payload["d"]
+        except (ValueError, KeyError, TypeError):
+            return None
+
+    @staticmethod
+    def get_sort_key(queryset: QuerySet) -> tuple[str | None, bool] | None:
+        """
+        Returns the field the queryset is ordered by and whether it is descending,
+        using the model's Meta.ordering when the query sets none. An unordered
+        queryset is keyed on the primary key alone; orderings that are not a single
+        plain field return None.
+        """
+        query = queryset.query
+        ordering = query.order_by
+        if not ordering and query.default_ordering:
+            ordering = queryset.model._meta.ordering
+        if not ordering:
+            return None, False
+        if len(ordering) != 1 or not isinstance(ordering[0], str):
+            return None
+
+        field = ordering[0]
+        descending = field.startswith("-")
+        field = field.lstrip("-")
+        if field == "?":
+            return None
+        return (None, descending) if field in ("pk", queryset.model._meta.pk.name) else (field, descending)
+
+    @classmethod
+    def supports(cls, queryset) -> bool:
+        """
+        Keyset pagination needs model or values() rows and a single key ordering.
+        Grouped and aggregated querysets keep the page based mode, since adding
+        the primary key to them would split every group into its rows.
+        """
+        if not isinstance(queryset, QuerySet):
+            return False
+        if queryset._iterable_class not in (ModelIterable, ValuesIterable):
+            return False
+        query = queryset.query
+        if query.group_by is not None or query.distinct_fields:
+            return False
+        if any(
+            getattr(annotation, "contains_aggregate", False)
+            for annotation in query.annotations.values()
+        ):
+            return False
+        return cls.get_sort_key(queryset) is not None
+
+    @staticmethod
+    def get_after_filter(field, value, pk, descending: bool) -> Q:
+        """
+        Builds the filter selecting rows that come after (value, pk) in an ordering
+        where NULL keys sort first ascending and last descending.
+        """
+        lookup = "lt" if descending else "gt"
+        pk_after = Q(**{f"pk__{lookup}": pk})
+
+        if field is None:
+            return pk_after
+
+        if value is None:
+            null_rows = Q(**{f"{field}__isnull": True}) & pk_after
+            return null_rows if descending else null_rows | Q(**{f"{field}__isnull": False})
+
+        after = Q(**{f"{field}__{lookup}": value}) | (Q(**{field: value}) & pk_after)
+        return after | Q(**{f"{field}__isnull": True}) if descending else after
+
+    @staticmethod
+    def get_ordering(field, descending: bool, reverse: bool) -> list:
+        descending = descending != reverse
+        ordering = ["-pk" if descending else "pk"]
+        if field is not None:
+            key = F(field)
+            key = key.desc(nulls_last=True) if descending else key.asc(nulls_first=True)
+            ordering.insert(0, key)
+        return ordering
+
+    @classmethod
+    def get_key_columns(cls, queryset: QuerySet, field) -> tuple[QuerySet, str, str | None]:
+        """
+        Returns the queryset and the names the pk and sort key are read from on
+        each row. Columns the rows already carry are read as they are, the rest is
+        annotated under an alias.
+        """
+        meta = queryset.model._meta
+        annotations = {}
+
+        if queryset._iterable_class is ModelIterable:
+            pk_column = meta.pk.attname
+            key_column = field
+            if field is not None:
+                try:
+                    model_field = meta.get_field(field)
+                    if model_field.is_relation or not model_field.concrete:
+                        raise FieldDoesNotExist
+                    key_column = model_field.attname
+                except FieldDoesNotExist:
+                    key_column = cls.KEY_ALIAS
+                    annotations[cls.KEY_ALIAS] = F(field)
+        else:
+            query = queryset.query
+            selected = {*query.values_select, *query.annotation_select, *query.extra_select}
+            pk_column = next(
+                (name for name in (meta.pk.attname, meta.pk.name, "pk") if name in selected),
+                cls.PK_ALIAS,
+            )
+            if pk_column == cls.PK_ALIAS:
+                annotations[cls.PK_ALIAS] = F("pk")
+            key_column = field
+            if field is not None and field not in selected:
+                key_column = cls.KEY_ALIAS
+                annotations[cls.KEY_ALIAS] = F(field)
+
+        if annotations:
+            queryset = queryset.annotate(**annotations)
+        return queryset, pk_column, key_column
+
+    @classmethod
+    def get_row_value(cls, row, column):
+        if isinstance(row, dict):
+            # the aliases were only added to read the cursor from
+            return row.pop(column) if column in (cls.KEY_ALIAS, cls.PK_ALIAS) else row[column]
+        return getattr(row, column)
+
+    @classmethod
+    def paginate(cls, queryset: QuerySet, cursor: str, per_page: int) -> dict:
+        field, descending = cls.get_sort_key(queryset)
+        direction = "next"
+
+        queryset, pk_column, key_column = cls.get_key_columns(queryset, field)
+
+        if cursor and (decoded := cls.decode(cursor)) and decoded[0] == field:
+            _, value, pk, direction = decoded
+            reverse = direction == "prev"
+            queryset = queryset.filter(
+                cls.get_after_filter(field, value, pk, descending != reverse)
+            )
+        else:
+            cursor = None
+
+        reverse = direction == "prev"
+        rows = list(
+            queryset.order_by(*cls.get_ordering(field, descending, reverse))[
+                : per_page + 1
+            ]
+        )
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        if reverse:
+            rows.reverse()
+
+        keys = [
+            (
+                cls.get_row_value(row, key_column) if field is not None else None,
+                cls.get_row_value(row, pk_column),
+            )
+            for row in rows
+        ]
+
+        is_next = bool(rows) and (has_more if not reverse else cursor is not None)
+        is_prev = bool(rows) and (has_more if reverse else cursor is not None)
+
+        return {
+            "queryset": rows,
+            "pagination": {
+                "perPage": per_page,
+                "isNext": is_next,
+                "isPrev": is_prev,
+                "nextCursor": cls.encode(field, *keys[-1], "next") if is_next else None,
+                "prevCursor": cls.encode(field, *keys[0], "prev") if is_prev else None,
+            },
+        }
 
 
 class DateTimeUtils:
@@ -199,6 +411,9 @@ def send_template_mail(
     The function `send_user_mail` sends an email to a user with the provided user data, subject, and
     address.
 
+    Mails without attachments are rendered here and queued in the mail outbox, the
+    send_mail_outbox worker delivers them, so the request does not wait on SMTP.
+
     :param context: A dictionary containing user data such as name, email, and any other relevant
     information
     :param subject: The subject of the email that will be sent to the user
@@ -206,10 +421,11 @@ def send_template_mail(
     template file. It is used to specify the location of the email template file that will be rendered
     and used as the content of the email
     attachment: The Attachment That send to the user
+    :return: the number of mails queued or sent
     """
-    status = None
+    from .mail_outbox import MailQueue
 
-    email_content = render_to_string(
+    email_content = MailQueue.render(
         f"mails/{'/'.join(map(str, address))}",
         {"user": context, "base_url": settings.FR_DOMAIN_NAME},
     )
@@ -217,14 +433,8 @@ def send_template_mail(
         mail = context["email"]
 
     if attachment is None:
-        return send_mail(
-            subject=subject,
-            message=email_content,
-            from_email=settings.FROM_MAIL,
-            recipient_list=[mail],
-            html_message=email_content,
-            fail_silently=False,
-        )
+        MailQueue.enqueue(subject=subject, body=email_content, recipients=[mail])
+        return 1
 
     email = EmailMessage(
         subject=subject,